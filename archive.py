@@ -0,0 +1,30 @@
+import json
+import zlib
+from models import Task
+
+# Выполненные задачи старше ARCHIVE_AFTER_DAYS переносятся из tasks в сжатые сегменты
+# task_archive по SEGMENT_SIZE штук; очки остаются в rewards и points_ledger
+ARCHIVE_AFTER_DAYS = 30
+SEGMENT_SIZE = 2000
+
+def encode_segment(rows):
+    # rows: (task_id, title, description, points, assigned_to, deadline, completed_at)
+    return zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def decode_segment(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+def row_to_task(row):
+    task = Task(*row[:4])
+    task.assigned_to = row[4] or None
+    task.deadline = row[5] or None
+    task.completed = True
+    return task
+
+def matches(row, since=None, until=None, member_id=None):
+    completed_at = row[6] or ''
+    if since is not None and completed_at < str(since):
+        return False
+    if until is not None and completed_at >= str(until):
+        return False
+    return member_id is None or row[4] == member_id
\ No newline at end of file
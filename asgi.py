@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import re
+from functools import partial
+from urllib.parse import parse_qs
+from database import Database, as_date
+import instrumentation
+from manager import FamilyTaskManager
+
+MAX_BODY = 64 * 1024
+BUCKETS = (None, 'day', 'week')
+
+class HTTPError(Exception):
+    def __init__(self, status, message=''):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def parse_int(value, message):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, message)
+
+def parse_date(value, message):
+    # Дата проверяется заранее, иначе ошибка возникла бы уже при записи
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise HTTPError(400, message)
+    try:
+        as_date(value)
+    except ValueError:
+        raise HTTPError(400, message)
+    return value
+
+def parse_text(body, key, message, required=False):
+    value = body.get(key, '')
+    if not isinstance(value, str) or required and not value:
+        raise HTTPError(400, message)
+    return value
+
+class ReaderPool:
+    def __init__(self, factory, size=4):
+        self._factory = factory
+        self._size = size
+        self._idle = asyncio.Queue()
+        self._opened = 0
+        self._connections = []
+    
+    async def _acquire(self):
+        # Соединения открываются по требованию, но не больше size
+        if self._idle.empty() and self._opened < self._size:
+            self._opened += 1
+            try:
+                db = await asyncio.to_thread(self._factory)
+            except BaseException:
+                self._opened -= 1
+                raise
+            self._connections.append(db)
+            return db
+        return await self._idle.get()
+    
+    async def run(self, name, *args):
+        db = await self._acquire()
+        try:
+            return await asyncio.to_thread(getattr(db, name), *args)
+        finally:
+            self._idle.put_nowait(db)
+    
+    def close(self):
+        for db in self._connections:
+            db.close()
+        self._connections = []
+        self._opened = 0
+
+class TaskService:
+    def __init__(self, db_name='family_task_manager.db', readers=4, max_pending=256):
+        self.db_name = db_name
+        self.readers = readers
+        self.max_pending = max_pending
+        self.manager = None
+        self.pool = None
+        self.routes = [
+            ('GET', re.compile(r'/api/tasks'), self.list_tasks),
+            ('POST', re.compile(r'/api/tasks'), self.add_task),
+            ('POST', re.compile(r'/api/tasks/(\d+)/assign'), self.assign_task),
+            ('POST', re.compile(r'/api/tasks/(\d+)/complete'), self.complete_task),
+            ('GET', re.compile(r'/api/members'), self.list_members),
+            ('POST', re.compile(r'/api/members'), self.add_member),
+            ('GET', re.compile(r'/api/rewards'), self.rewards),
+            ('GET', re.compile(r'/api/search'), self.search),
+        ]
+    
+    def start(self):
+        # Колбэки рабочего потока базы возвращаются в цикл событий
+        loop = asyncio.get_running_loop()
+        self.manager = FamilyTaskManager(threaded=True, dispatch=loop.call_soon_threadsafe,
+                                         db_name=self.db_name)
+        self.pool = ReaderPool(partial(Database, self.db_name, readonly=True), self.readers)
+    
+    def stop(self):
+        if self.manager is not None:
+            self.manager.close()
+            self.pool.close()
+            self.manager = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if self.manager is None:
+            self.start()
+        try:
+            handler, args = self.route(scope['method'], scope['path'])
+            query = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode()).items()}
+            body = await self.read_body(receive) if scope['method'] == 'POST' else None
+            status, data = await handler(query, body, *args)
+        except HTTPError as error:
+            status, data = error.status, {'error': error.message}
+        await self.respond(send, status, data)
+    
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    def route(self, method, path):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                if route_method == method:
+                    return handler, [int(group) for group in match.groups()]
+                allowed = True
+        raise HTTPError(405 if allowed else 404, 'Метод не поддерживается' if allowed else 'Не найдено')
+    
+    async def read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY:
+                raise HTTPError(413, 'Слишком большой запрос')
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        if not size:
+            return {}
+        try:
+            data = json.loads(b''.join(chunks))
+        except ValueError:
+            raise HTTPError(400, 'Некорректный JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(400, 'Ожидался JSON-объект')
+        return data
+    
+    async def respond(self, send, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        headers = [(b'content-type', b'application/json; charset=utf-8'),
+                   (b'content-length', str(len(body)).encode())]
+        if status == 503:
+            headers.append((b'retry-after', b'1'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+    
+    async def write(self, mutate):
+        # Очередь записи ограничена: при переполнении клиент повторяет запрос позже
+        if self.manager.pending_writes() >= self.max_pending:
+            raise HTTPError(503, 'Очередь записи переполнена')
+        result = mutate()
+        await asyncio.wrap_future(self.manager.barrier())
+        return result
+    
+    async def list_tasks(self, query, body):
+        status = query.get('status', 'open')
+        manager = self.manager
+        if status == 'completed':
+            tasks = await self.pool.run('get_tasks', 'completed')
+        elif status == 'open':
+            tasks = manager.get_available_tasks() + manager.get_assigned_tasks()
+        elif status in ('available', 'assigned'):
+            tasks = getattr(manager, f'get_{status}_tasks')()
+        else:
+            raise HTTPError(400, 'Неизвестный статус')
+        return 200, [task.as_dict() for task in tasks]
+    
+    async def add_task(self, query, body):
+        title = parse_text(body, 'title', 'Название не указано', required=True)
+        description = parse_text(body, 'description', 'Описание должно быть строкой')
+        points = parse_int(body.get('points', 0), 'Баллы должны быть числом')
+        task = await self.write(lambda: self.manager.add_task(title, description, points))
+        return 201, task.as_dict()
+    
+    async def assign_task(self, query, body, task_id):
+        manager = self.manager
+        member_id = parse_int(body.get('member_id'), 'Участник не указан')
+        deadline = parse_date(body.get('deadline'), 'Некорректный срок')
+        if not manager.get_task(task_id) or not manager.get_member(member_id):
+            raise HTTPError(404, 'Задача или участник не найдены')
+        await self.write(lambda: manager.assign_task(task_id, member_id, deadline))
+        return 200, manager.get_task(task_id).as_dict()
+    
+    async def complete_task(self, query, body, task_id):
+        if not await self.write(lambda: self.manager.complete_task(task_id)):
+            raise HTTPError(409, 'Задача не назначена или уже выполнена')
+        return 200, self.manager.get_task(task_id).as_dict()
+    
+    async def list_members(self, query, body):
+        return 200, [member.as_dict() for member in self.manager.members]
+    
+    async def add_member(self, query, body):
+        name = parse_text(body, 'name', 'Имя не указано', required=True)
+        member = await self.write(lambda: self.manager.add_member(name))
+        return 201, member.as_dict()
+    
+    async def rewards(self, query, body):
+        since, until, bucket = query.get('since'), query.get('until'), query.get('bucket')
+        if since is None and until is None and bucket is None:
+            return 200, [{'member_id': member_id, 'name': name, 'points': points}
+                         for member_id, name, points in self.manager.get_rewards()]
+        if bucket not in BUCKETS:
+            raise HTTPError(400, 'Неизвестный интервал')
+        since = parse_date(since, 'Некорректная дата начала')
+        until = parse_date(until, 'Некорректная дата конца')
+        rows = await self.pool.run('get_points_window', since, until, bucket)
+        if bucket:
+            return 200, [{'bucket': key, 'member_id': member_id, 'name': name, 'points': points}
+                         for key, member_id, name, points in rows]
+        return 200, [{'member_id': member_id, 'name': name, 'points': points}
+                     for member_id, name, points in rows]
+    
+    async def search(self, query, body):
+        text = query.get('q', '').strip()
+        if not text:
+            return 200, []
+        tasks = await self.pool.run('search_tasks', text, query.get('status'))
+        return 200, [task.as_dict() for task in tasks]
+
+app = TaskService()
+
+def main():
+    parser = argparse.ArgumentParser(description='Family Task Manager ASGI server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--profile', action='store_true', help='собрать статистику времени работы')
+    args = parser.parse_args()
+    if instrumentation.enabled(args.profile):
+        instrumentation.install()
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
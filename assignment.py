@@ -0,0 +1,65 @@
+import heapq
+
+# Стоимость участника: открытая нагрузка в баллах плюс доля уже заработанных баллов.
+# Чем меньше стоимость, тем раньше участник получает следующую задачу.
+REWARDS_WEIGHT = 0.5
+
+STRATEGIES = {}
+
+def strategy(name):
+    def register(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return register
+
+@strategy('balanced')
+def balanced_cost(load, count, rewards):
+    return load + REWARDS_WEIGHT * rewards
+
+@strategy('load')
+def load_cost(load, count, rewards):
+    return load
+
+@strategy('count')
+def count_cost(load, count, rewards):
+    return count
+
+@strategy('points')
+def points_cost(load, count, rewards):
+    # Выравнивает итог: заработанное плюс то, что ещё предстоит заработать
+    return load + rewards
+
+def member_loads(manager):
+    loads = {}
+    for member in manager.members:
+        tasks = manager.get_member_tasks(member.member_id)
+        open_tasks = [task for task in tasks if not task.completed]
+        loads[member.member_id] = (sum(task.points for task in open_tasks), len(open_tasks),
+                                   manager.get_points(member.member_id) or 0)
+    return loads
+
+def plan(tasks, loads, deadline, strategy='balanced'):
+    # Жадное распределение по убыванию баллов (LPT): задача уходит участнику с минимальной
+    # стоимостью из кучи, O(T log M) для T задач и M участников
+    cost = STRATEGIES.get(strategy)
+    if cost is None:
+        raise ValueError(f'Неизвестная стратегия распределения: {strategy}')
+    heap = [(cost(load, count, rewards), member_id, load, count, rewards)
+            for member_id, (load, count, rewards) in loads.items()]
+    if not heap:
+        return []
+    heapq.heapify(heap)
+    assignments = []
+    for task in sorted(tasks, key=lambda task: (-task.points, task.task_id)):
+        value, member_id, load, count, rewards = heap[0]
+        load += task.points
+        count += 1
+        heapq.heapreplace(heap, (cost(load, count, rewards), member_id, load, count, rewards))
+        assignments.append((task.task_id, member_id, deadline))
+    return assignments
+
+def spread(loads, strategy='balanced'):
+    # Качество распределения: разброс стоимости между самым загруженным и самым свободным
+    cost = STRATEGIES[strategy]
+    values = [cost(*load) for load in loads.values()]
+    return max(values) - min(values) if values else 0
\ No newline at end of file
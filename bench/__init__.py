@@ -0,0 +1,3 @@
+from bench.generator import generate, parse_count
+from bench.runner import compare, measure, summarize
+from bench.scenarios import SCENARIOS, BenchContext, Skipped, scenario
\ No newline at end of file
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+from bench.generator import generate, parse_count
+from bench.runner import compare, load_report, metadata, save_report
+from bench.scenarios import SCENARIOS, BenchContext, Skipped
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Бенчмарки Family Task Manager')
+    parser.add_argument('--tasks', type=parse_count, default=parse_count('10k'), help='число задач: 1k, 100k, 10M')
+    parser.add_argument('--members', type=parse_count)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='запустить только указанные сценарии')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    parser.add_argument('--baseline', help='отчёт прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='допустимое замедление относительно базового прогона')
+    parser.add_argument('--workdir', help='каталог для сгенерированных баз')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        source = os.path.join(workdir, 'bench.db')
+        started = time.perf_counter()
+        dataset = generate(source, args.tasks, args.members, seed=args.seed)
+        dataset['seconds'] = time.perf_counter() - started
+        args.members = dataset['members']
+        print(f"Сгенерировано {dataset['tasks']} задач за {dataset['seconds']:.1f} с", file=sys.stderr)
+        ctx = BenchContext(source, workdir, args.repeat, args.seed)
+        results = {}
+        skipped = {}
+        for name in args.scenario or SCENARIOS:
+            print(f'{name}...', file=sys.stderr)
+            try:
+                results[name] = SCENARIOS[name](ctx)
+            except Skipped as reason:
+                skipped[name] = str(reason)
+            except Exception:
+                skipped[name] = traceback.format_exc(limit=3)
+    
+    report = {'meta': metadata(args), 'dataset': dataset, 'results': results, 'skipped': skipped}
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, load_report(args.baseline)['results'], args.threshold)
+        report['regressions'] = [
+            {'scenario': scenario, 'name': name, 'metric': metric, 'baseline': before,
+             'current': after, 'ratio': ratio}
+            for scenario, name, metric, before, after, ratio in regressions
+        ]
+    if args.output:
+        save_report(report, args.output)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    for scenario, name, metric, before, after, ratio in regressions:
+        print(f'РЕГРЕССИЯ {scenario}/{name} {metric}: {before:.3f} -> {after:.3f} (x{ratio:.2f})', file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
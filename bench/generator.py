@@ -0,0 +1,76 @@
+import random
+from datetime import date, datetime, timedelta
+from database import Database
+
+NAMES = ('Мама', 'Папа', 'Аня', 'Боря', 'Вика', 'Гоша', 'Даша', 'Егор', 'Женя', 'Зоя')
+
+VERBS = ('Помыть', 'Купить', 'Убрать', 'Починить', 'Заплатить за', 'Погулять с', 'Полить', 'Разобрать')
+
+OBJECTS = ('посуду', 'продукты', 'комнату', 'кран', 'интернет', 'собакой', 'цветы', 'шкаф',
+           'балкон', 'машину', 'квартиру', 'ковёр')
+
+DETAILS = ('до ужина', 'после школы', 'в выходные', 'срочно', 'как договаривались', 'вместе')
+
+def parse_count(value):
+    # 1k, 250k, 10M
+    value = str(value).strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+def generate(db_name, tasks=10000, members=None, assigned=0.6, completed=0.5, seed=0,
+             days=90, chunk_size=50000, today=None):
+    # Пишет напрямую через executemany: генерация 10M задач не проходит через менеджер
+    rng = random.Random(seed)
+    members = members or max(3, min(10000, tasks // 200))
+    today = today or date.today()
+    db = Database(db_name)
+    conn = db.conn
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    cursor.executemany('INSERT INTO members (member_id, name) VALUES (?, ?)',
+                       [(member_id, f'{NAMES[member_id % len(NAMES)]} {member_id}')
+                        for member_id in range(1, members + 1)])
+    cursor.executemany('INSERT INTO rewards (member_id, points) VALUES (?, 0)',
+                       [(member_id,) for member_id in range(1, members + 1)])
+    conn.commit()
+    totals = {}
+    stats = {'members': members, 'tasks': tasks, 'assigned': 0, 'completed': 0}
+    for start in range(1, tasks + 1, chunk_size):
+        rows = []
+        ledger = []
+        for task_id in range(start, min(start + chunk_size, tasks + 1)):
+            points = rng.randint(1, 30)
+            assigned_to = deadline = completed_at = None
+            is_completed = 0
+            if rng.random() < assigned:
+                assigned_to = rng.randint(1, members)
+                deadline = (today + timedelta(days=rng.randint(-30, 30))).isoformat()
+                stats['assigned'] += 1
+                if rng.random() < completed:
+                    is_completed = 1
+                    stats['completed'] += 1
+                    moment = datetime.combine(today, datetime.min.time()) - timedelta(
+                        seconds=rng.randint(0, days * 86400))
+                    completed_at = moment.strftime('%Y-%m-%d %H:%M:%S')
+                    ledger.append((assigned_to, task_id, points, completed_at))
+                    totals[assigned_to] = totals.get(assigned_to, 0) + points
+            title = f'{rng.choice(VERBS)} {rng.choice(OBJECTS)}'
+            rows.append((task_id, title, f'{title} {rng.choice(DETAILS)}', points,
+                         assigned_to, deadline, is_completed, completed_at))
+        cursor.execute('BEGIN')
+        cursor.executemany('''
+        INSERT INTO tasks (task_id, title, description, points, assigned_to, deadline, completed, completed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.executemany('''
+        INSERT INTO points_ledger (member_id, task_id, points, created_at)
+        VALUES (?, ?, ?, ?)
+        ''', ledger)
+        conn.commit()
+    cursor.executemany('UPDATE rewards SET points = ? WHERE member_id = ?',
+                       [(points, member_id) for member_id, points in totals.items()])
+    conn.commit()
+    db.close()
+    return stats
\ No newline at end of file
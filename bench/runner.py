@@ -0,0 +1,74 @@
+import json
+import platform
+import sqlite3
+import statistics
+import time
+from datetime import datetime
+
+# Метрики, по которым сравнение с базовым прогоном ищет регрессии (больше - хуже)
+COMPARED_METRICS = ('median_ms', 'bytes_per_item')
+
+def measure(fn, repeat=5, warmup=1, setup=None):
+    samples = []
+    for run in range(warmup + repeat):
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        if setup:
+            fn(argument)
+        else:
+            fn()
+        elapsed = time.perf_counter() - started
+        if run >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+def summarize(samples, ops=1):
+    ordered = sorted(samples)
+    result = {
+        'runs': len(ordered),
+        'median_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'min_ms': ordered[0] * 1000,
+    }
+    if ops > 1:
+        result['ops_per_sec'] = ops / statistics.median(ordered)
+    return result
+
+def throughput(count, seconds):
+    return {'items': count, 'seconds': seconds, 'items_per_sec': count / seconds if seconds else None}
+
+def metadata(args):
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'tasks': args.tasks,
+        'members': args.members,
+        'seed': args.seed,
+        'repeat': args.repeat,
+    }
+
+def compare(results, baseline, threshold=0.25):
+    regressions = []
+    for scenario, metrics in results.items():
+        for name, values in metrics.items():
+            previous = baseline.get(scenario, {}).get(name)
+            if not isinstance(values, dict) or not isinstance(previous, dict):
+                continue
+            for metric in COMPARED_METRICS:
+                if values.get(metric) is None or not previous.get(metric):
+                    continue
+                ratio = values[metric] / previous[metric]
+                values.setdefault('baseline', {})[metric] = previous[metric]
+                if ratio > 1 + threshold:
+                    regressions.append((scenario, name, metric, previous[metric], values[metric], ratio))
+    return regressions
+
+def load_report(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
\ No newline at end of file
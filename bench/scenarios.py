@@ -0,0 +1,400 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from database import Database
+from manager import FamilyTaskManager
+from models import Task
+from bench.runner import measure, summarize, throughput
+
+SCENARIOS = {}
+
+SEARCH_QUERIES = ('посуду', 'куп прод', 'починить кран', 'срочно', 'балк')
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+class Skipped(Exception):
+    pass
+
+def days_ago(days):
+    return date.today() - timedelta(days=days)
+
+class BenchContext:
+    def __init__(self, source, workdir, repeat=5, seed=0):
+        self.source = source
+        self.workdir = workdir
+        self.repeat = repeat
+        self.seed = seed
+        self._copies = 0
+    
+    def copy(self):
+        # Сценарии, меняющие данные, работают на свежей копии сгенерированной базы
+        self._copies += 1
+        path = os.path.join(self.workdir, f'copy-{self._copies}.db')
+        shutil.copyfile(self.source, path)
+        return path
+    
+    def empty(self):
+        self._copies += 1
+        return os.path.join(self.workdir, f'empty-{self._copies}.db')
+    
+    def sample(self, items, count):
+        items = list(items)
+        return random.Random(self.seed).sample(items, min(count, len(items)))
+
+@scenario('load_data')
+def load_data(ctx):
+    results = {}
+    for name, lazy in (('load_data', False), ('load_data_lazy', True)):
+        results[name] = measure(lambda: FamilyTaskManager(lazy=lazy, db_name=ctx.source).close(),
+                                ctx.repeat)
+    return results
+
+@scenario('get_tasks')
+def get_tasks(ctx):
+    db = Database(ctx.source)
+    results = {}
+    for filter_type in ('available', 'assigned', 'open', 'completed'):
+        results[filter_type] = measure(lambda: db.get_tasks(filter_type), ctx.repeat)
+        # Задержка одного запроса страницы: здесь видны индексы по статусу
+        results[f'{filter_type}_page'] = measure(lambda: db.get_tasks_page(filter_type, None, 100),
+                                                 ctx.repeat * 10)
+    results['member_tasks'] = measure(
+        lambda: db.conn.execute('SELECT task_id FROM tasks WHERE assigned_to = 1').fetchall(),
+        ctx.repeat * 10)
+    db.close()
+    return results
+
+@scenario('complete_task')
+def complete_task(ctx):
+    manager = FamilyTaskManager(db_name=ctx.copy())
+    assigned = ctx.sample((task.task_id for task in manager.get_assigned_tasks()), 1200)
+    samples = []
+    for task_id in assigned[:200]:
+        started = time.perf_counter()
+        manager.complete_task(task_id)
+        samples.append(time.perf_counter() - started)
+    batch = assigned[200:]
+    started = time.perf_counter()
+    manager.complete_tasks(batch)
+    results = {'complete_task': summarize(samples or [0.0]),
+               'complete_tasks': throughput(len(batch), time.perf_counter() - started)}
+    manager.close()
+    return results
+
+@scenario('write_behind')
+def write_behind(ctx):
+    # Поштучные назначения и выполнения: коммит на каждое действие против пачек журнала
+    results = {}
+    for name, enabled in (('commit_each', False), ('journal', True)):
+        manager = FamilyTaskManager(db_name=ctx.copy(), write_behind=enabled)
+        member_id = manager.members[0].member_id
+        available = ctx.sample((task.task_id for task in manager.get_available_tasks()), 1000)
+        started = time.perf_counter()
+        for task_id in available:
+            manager.assign_task(task_id, member_id, date.today().isoformat())
+            manager.complete_task(task_id)
+        manager.flush_journal()
+        results[name] = throughput(len(available) * 2, time.perf_counter() - started)
+        manager.close()
+    return results
+
+@scenario('auto_assign')
+def auto_assign(ctx):
+    import assignment
+    results = {}
+    for strategy in ('balanced', 'load', 'points'):
+        manager = FamilyTaskManager(db_name=ctx.copy())
+        before = assignment.spread(assignment.member_loads(manager), strategy)
+        started = time.perf_counter()
+        assignments = manager.auto_assign(date.today().isoformat(), strategy)
+        result = throughput(len(assignments), time.perf_counter() - started)
+        # Разброс стоимости до и после: чем меньше spread_after, тем ровнее нагрузка
+        result['spread_before'] = before
+        result['spread_after'] = assignment.spread(assignment.member_loads(manager), strategy)
+        results[strategy] = result
+        manager.close()
+    return results
+
+@scenario('archive')
+def archive_tasks(ctx):
+    # Запуск до и после архивации: загрузка должна зависеть только от активных задач
+    path = ctx.copy()
+    results = {'load_before': measure(lambda: FamilyTaskManager(db_name=path).close(), ctx.repeat)}
+    manager = FamilyTaskManager(db_name=path)
+    started = time.perf_counter()
+    archived = manager.archive_completed(older_than_days=7)
+    results['archive_completed'] = throughput(len(archived), time.perf_counter() - started)
+    results['archive_completed'].update(manager.archive_stats())
+    results['archived_window'] = measure(
+        lambda: manager.get_archived_tasks(since=days_ago(30), until=days_ago(23)), ctx.repeat)
+    results['archived_task'] = measure(lambda: manager.get_archived_task(archived[len(archived) // 2]),
+                                       ctx.repeat * 10) if archived else None
+    manager.close()
+    results['load_after'] = measure(lambda: FamilyTaskManager(db_name=path).close(), ctx.repeat)
+    return results
+
+def sync_result(stats):
+    items = stats['sent'] + stats['received']
+    result = throughput(items, stats['seconds'])
+    result['bytes'] = stats['bytes_sent'] + stats['bytes_received']
+    result['bytes_per_item'] = result['bytes'] / items if items else None
+    result['revoked'] = stats['revoked'] + stats['peer_revoked']
+    return result
+
+def replica_state(path):
+    db = Database(path)
+    cursor = db.conn.cursor()
+    cursor.execute('''
+    SELECT s.gid, t.title, t.points, a.gid, t.completed FROM tasks t
+    JOIN sync_rows s ON s.kind = 'task' AND s.local_id = t.task_id
+    LEFT JOIN sync_rows a ON a.kind = 'member' AND a.local_id = t.assigned_to
+    ''')
+    tasks = sorted(cursor.fetchall(), key=repr)
+    # Задачи, за которые очки начислены больше одного раза
+    cursor.execute('''
+    SELECT COUNT(*) FROM (
+        SELECT task_id FROM points_ledger WHERE task_id IS NOT NULL
+        GROUP BY task_id HAVING SUM(CASE WHEN points > 0 THEN 1 WHEN points < 0 THEN -1 ELSE 0 END) > 1
+    )
+    ''')
+    doubled = cursor.fetchone()[0]
+    rewards = sorted((name, points) for member_id, name, points in db.get_rewards())
+    db.close()
+    return tasks, rewards, doubled
+
+@scenario('sync')
+def sync_replicas(ctx):
+    # Две копии одной базы расходятся независимыми правками, часть задач выполнена на обеих;
+    # первая синхронизация полная (через файл), дальше по сети передаются только изменения
+    import threading
+    import sync
+    local, remote = ctx.copy(), ctx.copy()
+    db = Database(local)
+    results = {'initial': sync_result(sync.sync_with(db, remote))}
+    db.close()
+    manager = FamilyTaskManager(db_name=local, lazy=True)
+    available = sorted(task.task_id for task in manager.get_available_tasks())
+    manager.close()
+    count = max(10, min(2000, len(available) // 30))
+    chosen = ctx.sample(available, count * 3)
+    for index, path in enumerate((local, remote)):
+        manager = FamilyTaskManager(db_name=path, lazy=True)
+        member_id = manager.members[index % len(manager.members)].member_id
+        # Средняя треть выбранных задач выполняется на обеих копиях разными участниками
+        task_ids = chosen[index * count:(index + 2) * count]
+        with manager.transaction():
+            manager.assign_tasks([(task_id, member_id, date.today().isoformat()) for task_id in task_ids])
+            manager.complete_tasks(task_ids)
+            manager.add_tasks([(f'Новая задача {index}-{number}', '', 5) for number in range(count)])
+        manager.close()
+    server = sync.SyncServer(remote, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    db = Database(local)
+    try:
+        results['delta'] = sync_result(sync.sync_with(db, server.server_address))
+        results['noop'] = sync_result(sync.sync_with(db, server.server_address))
+    finally:
+        db.close()
+        server.shutdown()
+        server.server_close()
+    local_state, remote_state = replica_state(local), replica_state(remote)
+    results['delta'].update({'conflicts': count, 'converged': local_state == remote_state,
+                             'double_awarded': local_state[2] + remote_state[2]})
+    return results
+
+@scenario('get_rewards')
+def get_rewards(ctx):
+    manager = FamilyTaskManager(lazy=True, db_name=ctx.source)
+    db = Database(ctx.source)
+    results = {
+        'leaderboard': measure(manager.get_rewards, ctx.repeat * 10),
+        'database': measure(db.get_rewards, ctx.repeat),
+        'window_30_days': measure(lambda: manager.get_rewards(since=days_ago(30)), ctx.repeat),
+        'daily_buckets': measure(lambda: manager.get_rewards(since=days_ago(30), bucket='day'), ctx.repeat),
+    }
+    db.close()
+    manager.close()
+    return results
+
+@scenario('remove_member')
+def remove_member(ctx):
+    def setup():
+        manager = FamilyTaskManager(db_name=ctx.copy())
+        busiest = max(manager.members, key=lambda member: len(manager.get_member_tasks(member.member_id)))
+        return manager, busiest.member_id
+    
+    def run(prepared):
+        manager, member_id = prepared
+        manager.remove_member(member_id)
+        manager.close()
+    
+    return {'remove_member': measure(run, max(1, ctx.repeat // 2), warmup=0, setup=setup)}
+
+@scenario('search')
+def search(ctx):
+    manager = FamilyTaskManager(lazy=True, db_name=ctx.source)
+    results = {query: measure(lambda: manager.search_tasks(query), ctx.repeat * 10)
+               for query in SEARCH_QUERIES}
+    results['completed_only'] = measure(lambda: manager.search_tasks('посуду', status='completed'),
+                                        ctx.repeat * 10)
+    manager.close()
+    return results
+
+class PlainTask:
+    # Прежнее представление задачи с __dict__ для сравнения памяти
+    def __init__(self, task_id, title, description, points):
+        self.task_id = task_id
+        self.title = title
+        self.description = description
+        self.points = points
+        self.assigned_to = None
+        self.deadline = None
+        self.completed = False
+
+def plain_from_row(cursor, row):
+    task = PlainTask(*row[:4])
+    task.assigned_to, task.deadline, task.completed = row[4] or None, row[5] or None, bool(row[6])
+    return task
+
+@scenario('models_memory')
+def models_memory(ctx):
+    db = Database(ctx.source)
+    results = {}
+    for name, row_factory in (('slots', Task.from_row), ('dict', plain_from_row)):
+        cursor = db.conn.cursor()
+        cursor.row_factory = row_factory
+        tracemalloc.start()
+        started = time.perf_counter()
+        tasks = cursor.execute('SELECT task_id, title, description, points, assigned_to, deadline, completed '
+                               'FROM tasks').fetchall()
+        elapsed = time.perf_counter() - started
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[name] = {'items': len(tasks), 'bytes_per_item': size / max(1, len(tasks)),
+                         'load_ms': elapsed * 1000}
+        del tasks
+    db.close()
+    return results
+
+@scenario('transfer')
+def transfer(ctx):
+    source = FamilyTaskManager(lazy=True, db_name=ctx.source)
+    path = os.path.join(ctx.workdir, 'export.jsonl')
+    started = time.perf_counter()
+    with open(path, 'w', encoding='utf-8') as stream:
+        count = source.export(stream)
+    results = {'export_jsonl': throughput(count, time.perf_counter() - started)}
+    source.close()
+    target = FamilyTaskManager(lazy=True, db_name=ctx.empty())
+    started = time.perf_counter()
+    with open(path, encoding='utf-8') as stream:
+        stats = target.import_(stream, batch_size=5000)
+    results['import_jsonl'] = throughput(sum(stats.values()), time.perf_counter() - started)
+    target.close()
+    os.remove(path)
+    return results
+
+@scenario('asgi')
+def asgi_load(ctx):
+    from asgi import TaskService
+    
+    async def request(app, method, path, query=b'', body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+        status = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+        
+        await app({'type': 'http', 'method': method, 'path': path, 'query_string': query}, receive, send)
+        return status[0]
+    
+    async def client(app, task_ids, requests):
+        statuses = []
+        for number in range(requests):
+            if number % 4 == 3 and task_ids:
+                statuses.append(await request(app, 'POST', f'/api/tasks/{task_ids.pop()}/complete'))
+            elif number % 2:
+                query = SEARCH_QUERIES[number % len(SEARCH_QUERIES)]
+                statuses.append(await request(app, 'GET', '/api/search', f'q={query}'.encode()))
+            else:
+                statuses.append(await request(app, 'GET', '/api/members'))
+        return statuses
+    
+    async def run(clients, requests):
+        app = TaskService(db_name=ctx.copy(), readers=4)
+        app.start()
+        task_ids = ctx.sample((task.task_id for task in app.manager.get_assigned_tasks()), clients * requests)
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*[client(app, task_ids, requests) for number in range(clients)])
+        elapsed = time.perf_counter() - started
+        app.stop()
+        flat = [status for statuses in statuses for status in statuses]
+        result = throughput(len(flat), elapsed)
+        result['errors'] = sum(status >= 500 for status in flat)
+        return result
+    
+    return {f'clients_{clients}': asyncio.run(run(clients, 50)) for clients in (1, 4, 16, 64)}
+
+@scenario('ui_update')
+def ui_update(ctx):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from ui import MainWindow
+    except ImportError as error:
+        raise Skipped(str(error))
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow(db_name=ctx.copy())
+    results = {}
+    for name in ('update_members_list', 'update_tasks_list', 'update_assign_lists',
+                 'update_assigned_tasks_list', 'update_rating', 'update_all_lists'):
+        method = getattr(window, name)
+        
+        def refresh():
+            method()
+            app.processEvents()
+        
+        results[name] = measure(refresh, ctx.repeat)
+    window.close()
+    app.processEvents()
+    return results
+
+@scenario('startup')
+def startup(ctx):
+    # Холодный старт отдельного процесса: импорты, первая отрисовка, загрузка данных
+    try:
+        import PyQt6
+    except ImportError as error:
+        raise Skipped(str(error))
+    main_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+    workdir = os.path.join(ctx.workdir, 'startup')
+    os.makedirs(workdir, exist_ok=True)
+    shutil.copyfile(ctx.source, os.path.join(workdir, 'family_task_manager.db'))
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    runs = {}
+    for run in range(ctx.repeat):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, main_path, '--startup-time'], cwd=workdir, env=env,
+                                   capture_output=True, text=True, timeout=300)
+        marks = json.loads(completed.stderr.strip().splitlines()[-1])
+        marks['process_ms'] = (time.perf_counter() - started) * 1000
+        for name, value in marks.items():
+            runs.setdefault(name, []).append(value / 1000)
+    return {name: summarize(samples) for name, samples in runs.items()}
\ No newline at end of file
@@ -0,0 +1,127 @@
+from collections import deque
+from contextlib import contextmanager
+
+class Command:
+    # Изменение менеджера и обратное ему: списки вызовов (имя метода, аргументы) с уже снятыми
+    # значениями, поэтому отмена не перечитывает данные и работает за время самого изменения
+    __slots__ = ('label', 'redo_calls', 'undo_calls')
+    
+    def __init__(self, label, redo_calls, undo_calls):
+        self.label = label
+        self.redo_calls = redo_calls
+        self.undo_calls = undo_calls
+    
+    def redo(self, manager):
+        for name, args in self.redo_calls:
+            getattr(manager, name)(*args)
+    
+    def undo(self, manager):
+        for name, args in self.undo_calls:
+            getattr(manager, name)(*args)
+    
+    def __repr__(self):
+        return f"Command('{self.label}')"
+
+class CompositeCommand:
+    # Изменения одной транзакции менеджера отменяются одним шагом
+    __slots__ = ('label', 'commands')
+    
+    def __init__(self, commands, label=None):
+        self.commands = commands
+        self.label = label or (commands[0].label if len(commands) == 1 else f'{len(commands)} изменений')
+    
+    def redo(self, manager):
+        for command in self.commands:
+            command.redo(manager)
+    
+    def undo(self, manager):
+        for command in reversed(self.commands):
+            command.undo(manager)
+    
+    def __repr__(self):
+        return f'CompositeCommand({self.commands!r})'
+
+class CommandLog:
+    def __init__(self, limit=100):
+        # Старые шаги вытесняются из deque сами
+        self._undo = deque(maxlen=limit)
+        self._redo = deque(maxlen=limit)
+        self._group = None
+        self.replaying = False
+    
+    def __len__(self):
+        return len(self._undo)
+    
+    def record(self, label, redo_calls, undo_calls):
+        if self.replaying:
+            return
+        command = Command(label, redo_calls, undo_calls)
+        if self._group is not None:
+            self._group.append(command)
+            return
+        self._undo.append(command)
+        self._redo.clear()
+    
+    def begin_group(self):
+        if self._group is None and not self.replaying:
+            self._group = []
+    
+    def end_group(self, commit=True):
+        group, self._group = self._group, None
+        if commit and group:
+            self._undo.append(CompositeCommand(group))
+            self._redo.clear()
+    
+    def can_undo(self):
+        return bool(self._undo)
+    
+    def can_redo(self):
+        return bool(self._redo)
+    
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else None
+    
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+    
+    def undo(self, manager):
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        self._replay(manager, command.undo)
+        self._redo.append(command)
+        return command
+    
+    def redo(self, manager):
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        self._replay(manager, command.redo)
+        self._undo.append(command)
+        return command
+    
+    def _replay(self, manager, action):
+        # Память и база меняются в одной транзакции менеджера; при ошибке история сбрасывается
+        self.replaying = True
+        try:
+            with manager.transaction():
+                action(manager)
+        except BaseException:
+            self.clear()
+            raise
+        finally:
+            self.replaying = False
+    
+    @contextmanager
+    def paused(self):
+        # Массовые операции (импорт) не попадают в историю
+        replaying, self.replaying = self.replaying, True
+        try:
+            yield
+        finally:
+            self.replaying = replaying
+    
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._group = None
\ No newline at end of file
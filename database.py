@@ -1,11 +1,359 @@
+import re
 import sqlite3
-from datetime import datetime
-from models import FamilyMember, Task
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import archive
+import hlc
+import recurrence
+from models import FamilyMember, Task, TaskTemplate
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA temp_store = MEMORY',
+)
+
+def create_task_search(cursor):
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content='tasks', content_rowid='task_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite собран без FTS5: search_tasks работает через LIKE
+        return
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (rowid, title, description)
+        VALUES (NEW.task_id, NEW.title, NEW.description);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.task_id, OLD.title, OLD.description);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.task_id, OLD.title, OLD.description);
+        INSERT INTO tasks_fts (rowid, title, description)
+        VALUES (NEW.task_id, NEW.title, NEW.description);
+    END
+    ''')
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+# Время выполнения берётся из журнала очков; выполненные без записи в журнале
+# (например, перенесённые импортом) считаются выполненными сейчас
+BACKFILL_COMPLETED_AT = '''
+UPDATE tasks SET completed_at = COALESCE(
+    (SELECT MAX(created_at) FROM points_ledger WHERE points_ledger.task_id = tasks.task_id),
+    datetime('now', 'localtime'))
+WHERE completed = 1 AND completed_at IS NULL
+'''
+
+# Журнал синхронизации: вид записи, таблица и её ключ
+SYNC_TABLES = (
+    ('member', 'members', 'member_id'),
+    ('task', 'tasks', 'task_id'),
+    ('points', 'points_ledger', 'entry_id'),
+)
+
+# Последнее изменение каждой записи: глобальный идентификатор, метка часов и номер в журнале.
+# Записи, созданные здесь, получают gid вида сеанс:вид:id, пришедшие - сохраняют свой.
+# origin - устройство, где сделано изменение, via - от кого оно пришло (пусто для своих)
+SYNC_UPSERT = '''
+INSERT INTO sync_rows (kind, local_id, gid, hlc, origin, via, seq, deleted)
+VALUES ('{kind}', NEW.{key}, sync_session() || ':{kind}:' || NEW.{key}, sync_hlc(), sync_origin(),
+        sync_via(), (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_rows), 0)
+ON CONFLICT (kind, local_id) DO UPDATE
+SET hlc = excluded.hlc, origin = excluded.origin, via = excluded.via, seq = excluded.seq, deleted = 0;
+'''
+
+SYNC_DELETE = '''
+UPDATE sync_rows
+SET hlc = sync_hlc(), origin = sync_origin(), via = sync_via(), seq = (SELECT MAX(seq) + 1 FROM sync_rows),
+    deleted = 1
+WHERE kind = '{kind}' AND local_id = OLD.{key};
+'''
+
+def create_sync_log(cursor):
+    # Данные, созданные до синхронизации, считаются общими для всех копий файла:
+    # gid без устройства и нулевая метка (устройство в неё добавляет device_id),
+    # любое новое изменение её перекрывает
+    for kind, table, key in SYNC_TABLES:
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_rows')
+        offset = cursor.fetchone()[0]
+        cursor.execute(f'''
+        INSERT OR IGNORE INTO sync_rows (kind, local_id, gid, hlc, origin, via, seq, deleted)
+        SELECT '{kind}', {key}, 'legacy:{kind}:' || {key}, ?, 'legacy', '',
+               ? + ROW_NUMBER() OVER (ORDER BY {key}), 0
+        FROM {table}
+        ''', (hlc.LEGACY, offset))
+        events = ('INSERT', 'UPDATE', 'DELETE') if kind != 'points' else ('INSERT',)
+        for event in events:
+            body = (SYNC_DELETE if event == 'DELETE' else SYNC_UPSERT).format(kind=kind, key=key)
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sync_{table}_{event.lower()} AFTER {event} ON {table}
+            WHEN sync_enabled()
+            BEGIN
+                {body}
+            END
+            ''')
+
+def recreate_sync_upserts(cursor):
+    # gid новых записей строится от сеанса, а не от устройства: копия файла до первой
+    # синхронизации носит тот же идентификатор устройства, что и оригинал
+    for kind, table, key in SYNC_TABLES:
+        events = ('insert', 'update') if kind != 'points' else ('insert',)
+        for event in events:
+            cursor.execute(f'DROP TRIGGER IF EXISTS sync_{table}_{event}')
+            cursor.execute(f'''
+            CREATE TRIGGER sync_{table}_{event} AFTER {event.upper()} ON {table}
+            WHEN sync_enabled()
+            BEGIN
+                {SYNC_UPSERT.format(kind=kind, key=key)}
+            END
+            ''')
+
+def create_template_sync(cursor):
+    # Шаблоны не передаются, но повторение на другом устройстве должно узнать свой шаблон:
+    # у шаблона есть gid, повторение передаёт его вместе с днём. Существующие шаблоны копий
+    # одного файла совпадают целиком, поэтому их gid строится из содержимого, а не только из id
+    cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_rows')
+    offset = cursor.fetchone()[0]
+    cursor.execute('''
+    INSERT OR IGNORE INTO sync_rows (kind, local_id, gid, hlc, origin, via, seq, deleted)
+    SELECT 'template', template_id,
+           'legacy:template:' || template_id || ':' || rule || ':' || start_day || ':' || title,
+           ?, 'legacy', '', ? + ROW_NUMBER() OVER (ORDER BY template_id), 0
+    FROM task_templates
+    ''', (hlc.LEGACY, offset))
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS sync_task_templates_insert AFTER INSERT ON task_templates
+    WHEN sync_enabled()
+    BEGIN
+        {SYNC_UPSERT.format(kind='template', key='template_id')}
+    END
+    ''')
+
+# Каждый элемент - одна версия схемы (PRAGMA user_version).
+# Новые миграции добавляются только в конец списка.
+MIGRATIONS = [
+    (
+        'CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (completed, assigned_to)',
+        'CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to ON tasks (assigned_to)',
+        'CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline)',
+    ),
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            member_id INTEGER NOT NULL,
+            task_id INTEGER,
+            points INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS points_daily (
+            day TEXT NOT NULL,
+            member_id INTEGER NOT NULL,
+            points INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, member_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS points_weekly (
+            week TEXT NOT NULL,
+            member_id INTEGER NOT NULL,
+            points INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (week, member_id)
+        ) WITHOUT ROWID
+        ''',
+        # Неделя начинается с понедельника
+        '''
+        CREATE TRIGGER IF NOT EXISTS points_ledger_rollup AFTER INSERT ON points_ledger
+        BEGIN
+            INSERT INTO points_daily (day, member_id, points)
+            VALUES (date(NEW.created_at), NEW.member_id, NEW.points)
+            ON CONFLICT (day, member_id) DO UPDATE SET points = points + excluded.points;
+            INSERT INTO points_weekly (week, member_id, points)
+            VALUES (date(NEW.created_at, 'weekday 0', '-6 days'), NEW.member_id, NEW.points)
+            ON CONFLICT (week, member_id) DO UPDATE SET points = points + excluded.points;
+        END
+        ''',
+    ),
+    (
+        'CREATE INDEX IF NOT EXISTS idx_tasks_completed_id ON tasks (completed, task_id)',
+    ),
+    (
+        create_task_search,
+    ),
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS journal_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL
+        )
+        ''',
+    ),
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS task_templates (
+            template_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            points INTEGER NOT NULL,
+            assigned_to INTEGER,
+            rule TEXT NOT NULL,
+            interval INTEGER NOT NULL DEFAULT 1,
+            weekdays TEXT,
+            start_day TEXT NOT NULL,
+            until_day TEXT,
+            generated_until TEXT
+        )
+        ''',
+        'ALTER TABLE tasks ADD COLUMN template_id INTEGER',
+        'ALTER TABLE tasks ADD COLUMN occurrence_day TEXT',
+        # Повторная генерация того же дня (догон после перезапуска) упирается в индекс и пропускается
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_occurrence ON tasks (template_id, occurrence_day)
+        WHERE template_id IS NOT NULL
+        ''',
+    ),
+    (
+        'ALTER TABLE tasks ADD COLUMN completed_at TEXT',
+        lambda cursor: cursor.execute(BACKFILL_COMPLETED_AT),
+        'CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks (completed, completed_at)',
+        # Архив: сжатые сегменты выполненных задач, только дописываются
+        '''
+        CREATE TABLE IF NOT EXISTS task_archive (
+            segment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_task_id INTEGER NOT NULL,
+            last_task_id INTEGER NOT NULL,
+            first_completed_at TEXT NOT NULL,
+            last_completed_at TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_task_archive_completed ON task_archive (last_completed_at)',
+        # Сегменты упорядочены по времени выполнения, поэтому поиск по task_id идёт через индекс
+        '''
+        CREATE TABLE IF NOT EXISTS task_archive_index (
+            task_id INTEGER PRIMARY KEY,
+            segment_id INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+    ),
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sync_rows (
+            kind TEXT NOT NULL,
+            local_id INTEGER NOT NULL,
+            gid TEXT NOT NULL UNIQUE,
+            hlc TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            via TEXT NOT NULL DEFAULT '',
+            seq INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, local_id)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_rows_seq ON sync_rows (seq)',
+        # received_seq: до какого номера журнала другого устройства изменения уже применены
+        '''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            device TEXT PRIMARY KEY,
+            received_seq INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_points_ledger_task ON points_ledger (task_id)',
+        create_sync_log,
+    ),
+    (
+        recreate_sync_upserts,
+    ),
+    (
+        create_template_sync,
+    ),
+]
+
+# Дополнительные аргументы sqlite3.connect; instrumentation подставляет сюда factory
+CONNECT_OPTIONS = {}
+
+TASK_COLUMNS = 'task_id, title, description, points, assigned_to, deadline, completed'
+
+TEMPLATE_COLUMNS = ('template_id, title, description, points, assigned_to, rule, interval, weekdays, '
+                    'start_day, until_day, generated_until')
+
+TASK_FILTERS = {
+    'available': 'assigned_to IS NULL AND completed = 0',
+    'assigned': 'assigned_to IS NOT NULL AND completed = 0',
+    'open': 'completed = 0',
+    'completed': 'completed = 1',
+}
+
+def as_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+def timestamp(moment=None):
+    # Готовая строка (время действия из журнала записи) остаётся как есть
+    if isinstance(moment, str):
+        return moment
+    return (moment or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
 
 class Database:
-    def __init__(self, db_name='family_task_manager.db'):
-        self.conn = sqlite3.connect(db_name)
-        self.create_tables()
+    def __init__(self, db_name='family_task_manager.db', readonly=False):
+        # readonly: соединение пула читателей, схему не трогает и передаётся между потоками
+        self.conn = sqlite3.connect(db_name, check_same_thread=not readonly, **CONNECT_OPTIONS)
+        self._transaction_depth = 0
+        self._rollback_only = False
+        self._journal_savepoints = 0
+        # Часы синхронизации нужны триггерам журнала изменений на каждом соединении
+        self.clock = hlc.HybridClock()
+        self.configure()
+        if readonly:
+            self.conn.execute('PRAGMA query_only = ON')
+        else:
+            self.create_tables()
+            self.migrate()
+            self.clock.device = self.device_id()
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT hlc FROM sync_rows ORDER BY seq DESC LIMIT 1')
+            row = cursor.fetchone()
+            if row:
+                self.clock.observe(row[0])
+    
+    def configure(self):
+        cursor = self.conn.cursor()
+        for pragma in PRAGMAS:
+            cursor.execute(pragma)
+        self.clock.register(self.conn)
     
     def create_tables(self):
         cursor = self.conn.cursor()
@@ -40,72 +388,461 @@ class Database:
         
         self.conn.commit()
     
-    def add_member(self, name):
+    def schema_version(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA user_version')
+        return cursor.fetchone()[0]
+    
+    def migrate(self):
         cursor = self.conn.cursor()
-        cursor.execute('INSERT INTO members (name) VALUES (?)', (name,))
+        version = self.schema_version()
+        for number, steps in enumerate(MIGRATIONS[version:], version + 1):
+            cursor.execute('BEGIN')
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(f'PRAGMA user_version = {number}')
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+    
+    @property
+    def in_transaction(self):
+        return self._transaction_depth > 0
+    
+    @contextmanager
+    def transaction(self):
+        self.begin_transaction()
+        try:
+            yield self
+        except BaseException:
+            self.end_transaction(commit=False)
+            raise
+        self.end_transaction()
+    
+    def begin_transaction(self):
+        self._transaction_depth += 1
+    
+    def end_transaction(self, commit=True):
+        self._transaction_depth -= 1
+        if not commit:
+            self._rollback_only = True
+        if self._transaction_depth:
+            return None
+        rollback, self._rollback_only = self._rollback_only, False
+        if rollback:
+            # Откат снимает и открытые точки сохранения журнала
+            self._journal_savepoints = 0
+            self.conn.rollback()
+            return False if commit else None
+        if self._journal_savepoints:
+            # Идёт транзакция менеджера из журнала: запись фиксируется вместе с ней
+            return None
+        self.conn.commit()
+        return True
+    
+    def commit(self):
+        if not self._transaction_depth and not self._journal_savepoints:
+            self.conn.commit()
+    
+    def next_id(self, table):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+        row = cursor.fetchone()
+        return (row[0] if row else 0) + 1
+    
+    def add_member(self, name, member_id=None):
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT INTO members (member_id, name) VALUES (?, ?)', (member_id, name))
         member_id = cursor.lastrowid
         cursor.execute('INSERT INTO rewards (member_id, points) VALUES (?, 0)', (member_id,))
-        self.conn.commit()
+        self.commit()
         return member_id
     
+    def add_members(self, names, first_id=None):
+        names = list(names)
+        if not names:
+            return []
+        with self.transaction():
+            if first_id is None:
+                first_id = self.next_id('members')
+            ids = list(range(first_id, first_id + len(names)))
+            cursor = self.conn.cursor()
+            cursor.executemany('INSERT INTO members (member_id, name) VALUES (?, ?)', zip(ids, names))
+            cursor.executemany('INSERT INTO rewards (member_id, points) VALUES (?, 0)',
+                               [(member_id,) for member_id in ids])
+        return ids
+    
+    def device_id(self):
+        # Идентификатор выдаётся один раз и хранится в самом файле: перенесённая база или база,
+        # открытая с другого компьютера (общая папка, FilePeer), остаётся тем же устройством.
+        # Копии файла различаются при первой встрече в sync.exchange
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM sync_state WHERE key = 'device'")
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        device = uuid.uuid4().hex[:12]
+        cursor.execute("INSERT INTO sync_state (key, value) VALUES ('device', ?)", (device,))
+        # Нулевая метка данных до синхронизации получает устройство, иначе разные версии
+        # одной записи на двух копиях никогда не перекрыли бы друг друга
+        cursor.execute('UPDATE sync_rows SET hlc = ? WHERE hlc = ?', (hlc.legacy_stamp(device), hlc.LEGACY))
+        self.conn.commit()
+        return device
+
+    def new_device_id(self):
+        # Копия встретила базу с тем же идентификатором: дальше она - отдельное устройство.
+        # Свои изменения копии переходят к новому устройству, чтобы уйти к оригиналу;
+        # gid не меняются, общие с оригиналом записи остаются теми же записями
+        device = uuid.uuid4().hex[:12]
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute("UPDATE sync_state SET value = ? WHERE key = 'device'", (device,))
+            cursor.execute('UPDATE sync_rows SET origin = ? WHERE origin = ?', (device, self.clock.device))
+        self.clock.device = device
+        return device
+
+    def journal_seq(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT seq FROM journal_state WHERE id = 1')
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def apply_journal(self, entries, recovering=False):
+        # Пачка операций журнала и номер последней из них фиксируются одной транзакцией,
+        # поэтому повторное проигрывание после сбоя пропускает уже применённое.
+        # Транзакции менеджера становятся точками сохранения; если пачка кончилась внутри
+        # транзакции менеджера, транзакция базы остаётся открытой до следующей пачки (None).
+        savepoints = self._journal_savepoints
+        self.begin_transaction()
+        try:
+            cursor = self.conn.cursor()
+            if not self.conn.in_transaction:
+                cursor.execute('BEGIN')
+            for seq, name, args in entries:
+                if name == 'begin_transaction':
+                    savepoints += 1
+                    cursor.execute(f'SAVEPOINT journal_{savepoints}')
+                elif name == 'end_transaction':
+                    if not savepoints:
+                        continue
+                    if args and not args[0]:
+                        cursor.execute(f'ROLLBACK TO journal_{savepoints}')
+                    cursor.execute(f'RELEASE journal_{savepoints}')
+                    savepoints -= 1
+                else:
+                    getattr(self, name)(*args)
+            # Незавершённая при сбое транзакция откатывается
+            while recovering and savepoints:
+                cursor.execute(f'ROLLBACK TO journal_{savepoints}')
+                cursor.execute(f'RELEASE journal_{savepoints}')
+                savepoints -= 1
+            cursor.execute('''
+            INSERT INTO journal_state (id, seq) VALUES (1, ?)
+            ON CONFLICT (id) DO UPDATE SET seq = excluded.seq
+            ''', (entries[-1][0],))
+        except BaseException:
+            self._transaction_depth -= 1
+            self._journal_savepoints = 0
+            self._rollback_only = False
+            self.conn.rollback()
+            raise
+        self._transaction_depth -= 1
+        self._journal_savepoints = savepoints
+        if savepoints:
+            return None
+        self._rollback_only = False
+        self.conn.commit()
+        return True
+    
     def get_members(self):
         cursor = self.conn.cursor()
+        cursor.row_factory = FamilyMember.from_row
         cursor.execute('SELECT member_id, name FROM members')
-        return [FamilyMember(row[0], row[1]) for row in cursor.fetchall()]
+        return cursor.fetchall()
     
     def remove_member(self, member_id):
         try:
             cursor = self.conn.cursor()
             cursor.execute('DELETE FROM rewards WHERE member_id = ?', (member_id,))
-            cursor.execute('UPDATE tasks SET assigned_to = NULL WHERE assigned_to = ?', (member_id,))
+            cursor.execute('UPDATE tasks SET assigned_to = NULL, deadline = NULL WHERE assigned_to = ?',
+                           (member_id,))
+            cursor.execute('UPDATE task_templates SET assigned_to = NULL WHERE assigned_to = ?', (member_id,))
             cursor.execute('DELETE FROM members WHERE member_id = ?', (member_id,))
-            self.conn.commit()
+            self.commit()
             return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
-    def add_task(self, title, description, points):
+    def restore_member(self, member_id, name, points, assignments):
+        # Возврат удалённого участника вместе с очками и задачами, с которых его сняли
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute('INSERT INTO members (member_id, name) VALUES (?, ?)', (member_id, name))
+            cursor.execute('INSERT INTO rewards (member_id, points) VALUES (?, ?)', (member_id, points))
+            cursor.executemany('''
+            UPDATE tasks 
+            SET assigned_to = ?, deadline = ?
+            WHERE task_id = ? AND assigned_to IS NULL
+            ''', [(member_id, deadline, task_id) for task_id, deadline in assignments])
+    
+    def get_member_assignments(self, member_id, completed=None):
+        condition = '' if completed is None else f'AND completed = {int(bool(completed))}'
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT task_id, deadline FROM tasks
+        WHERE assigned_to = ? {condition}
+        ORDER BY task_id
+        ''', (member_id,))
+        return cursor.fetchall()
+    
+    def add_task(self, title, description, points, task_id=None):
         cursor = self.conn.cursor()
         cursor.execute('''
-        INSERT INTO tasks (title, description, points) 
-        VALUES (?, ?, ?)
-        ''', (title, description, points))
-        self.conn.commit()
+        INSERT INTO tasks (task_id, title, description, points) 
+        VALUES (?, ?, ?, ?)
+        ''', (task_id, title, description, points))
+        self.commit()
         return cursor.lastrowid
     
+    def add_tasks(self, tasks, first_id=None):
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        with self.transaction():
+            if first_id is None:
+                first_id = self.next_id('tasks')
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+            INSERT INTO tasks (task_id, title, description, points) 
+            VALUES (?, ?, ?, ?)
+            ''', [(task_id, title, description, points)
+                  for task_id, (title, description, points) in enumerate(tasks, first_id)])
+        return list(range(first_id, first_id + len(tasks)))
+    
+    def insert_tasks(self, tasks):
+        # Полные строки (task_id, title, description, points, assigned_to, deadline, completed);
+        # очки за выполненные задачи сюда не входят, они переносятся записями журнала
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(f'INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               [(task_id, title, description, points, assigned_to, deadline, int(completed))
+                                for task_id, title, description, points, assigned_to, deadline, completed in tasks])
+    
     def get_tasks(self, filter_type='all'):
+        return list(self.iter_tasks(filter_type))
+    
+    def get_tasks_page(self, filter_type='all', after_id=None, limit=100):
+        return list(self.iter_tasks(filter_type, after_id, limit))
+    
+    def iter_tasks(self, filter_type='all', after_id=None, limit=None, chunk_size=1000):
+        # Keyset-пагинация по task_id: каждая порция - отдельный короткий запрос
+        condition = TASK_FILTERS.get(filter_type, '1')
+        last_id = after_id if after_id is not None else 0
+        remaining = limit
         cursor = self.conn.cursor()
-        
-        if filter_type == 'available':
-            query = 'SELECT * FROM tasks WHERE assigned_to IS NULL AND completed = 0'
-        elif filter_type == 'assigned':
-            query = 'SELECT * FROM tasks WHERE assigned_to IS NOT NULL AND completed = 0'
-        elif filter_type == 'completed':
-            query = 'SELECT * FROM tasks WHERE completed = 1'
-        else:
-            query = 'SELECT * FROM tasks'
-        
-        cursor.execute(query)
-        tasks = []
-        for row in cursor.fetchall():
-            task = Task(row[0], row[1], row[2], row[3])
-            if row[4]:
-                task.assigned_to = row[4]
-            if row[5]:
-                task.deadline = row[5]
-            task.completed = bool(row[6])
-            tasks.append(task)
-        return tasks
+        cursor.row_factory = Task.from_row
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            cursor.execute(f'''
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE {condition} AND task_id > ?
+            ORDER BY task_id
+            LIMIT ?
+            ''', (last_id, size))
+            tasks = cursor.fetchmany(size)
+            yield from tasks
+            if len(tasks) < size:
+                return
+            last_id = tasks[-1].task_id
+            if remaining is not None:
+                remaining -= len(tasks)
+    
+    def get_task(self, task_id):
+        cursor = self.conn.cursor()
+        cursor.row_factory = Task.from_row
+        cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE task_id = ?', (task_id,))
+        return cursor.fetchone()
     
     def remove_task(self, task_id):
         try:
             cursor = self.conn.cursor()
             cursor.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
-            self.conn.commit()
+            self.commit()
             return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
+    def remove_tasks(self, task_ids):
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany('DELETE FROM tasks WHERE task_id = ?', [(task_id,) for task_id in task_ids])
+    
+    def add_template(self, title, description, points, rule, interval, weekdays, start_day, until_day,
+                     assigned_to):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        INSERT INTO task_templates (title, description, points, assigned_to, rule, interval, weekdays,
+                                    start_day, until_day)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (title, description, points, assigned_to, rule, interval,
+              ','.join(str(day) for day in weekdays) if weekdays else None, str(start_day),
+              str(until_day) if until_day else None))
+        self.commit()
+        return cursor.lastrowid
+    
+    def get_templates(self):
+        cursor = self.conn.cursor()
+        cursor.row_factory = TaskTemplate.from_row
+        cursor.execute(f'SELECT {TEMPLATE_COLUMNS} FROM task_templates ORDER BY template_id')
+        return cursor.fetchall()
+    
+    def remove_template(self, template_id, after_day):
+        # Невыполненные и никому не назначенные будущие повторения удаляются вместе с шаблоном
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.execute('''
+            SELECT task_id FROM tasks
+            WHERE template_id = ? AND occurrence_day > ? AND completed = 0 AND assigned_to IS NULL
+            ''', (template_id, str(after_day)))
+            removed = [row[0] for row in cursor.fetchall()]
+            cursor.executemany('DELETE FROM tasks WHERE task_id = ?', [(task_id,) for task_id in removed])
+            cursor.execute('DELETE FROM task_templates WHERE template_id = ?', (template_id,))
+            found = cursor.rowcount > 0
+        return removed if found else None
+    
+    def plan_occurrences(self, today, window_days, catch_up):
+        # Только чтение: повторения по шаблонам в окне (без идентификаторов) и новые generated_until.
+        # Идентификаторы выдаёт менеджер, запись идёт через insert_occurrences
+        rows = []
+        watermarks = []
+        horizon = today + timedelta(days=window_days)
+        for template in self.get_templates():
+            if recurrence.parse_day(template.generated_until) == horizon:
+                continue
+            days, end = recurrence.due_days(template, today, window_days, catch_up)
+            for day in days:
+                rows.append((template.title, template.description, template.points, template.assigned_to,
+                             day.isoformat(), template.template_id, day.isoformat()))
+            watermarks.append((end.isoformat(), template.template_id))
+        return rows, watermarks
+    
+    def insert_occurrences(self, rows, watermarks):
+        # Задачи и сдвиг generated_until в одной транзакции. INSERT OR IGNORE по уникальному индексу
+        # не создаёт повторение дважды; False, если часть строк уже была в базе и память разошлась с ней
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+            INSERT OR IGNORE INTO tasks (task_id, title, description, points, assigned_to, deadline,
+                                         template_id, occurrence_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            inserted = cursor.rowcount
+            cursor.executemany('UPDATE task_templates SET generated_until = ? WHERE template_id = ?',
+                               watermarks)
+        return inserted == len(rows)
+    
+    def archive_completed(self, before, segment_size=archive.SEGMENT_SIZE):
+        # Архив - локальное обслуживание: удаление из tasks не передаётся другим устройствам
+        if self._transaction_depth or self._journal_savepoints:
+            raise RuntimeError('Архивация недоступна внутри транзакции')
+        with self.clock.paused():
+            return self._archive_completed(before, segment_size)
+    
+    def _archive_completed(self, before, segment_size):
+        # Каждый сегмент - отдельная транзакция: вставка в архив и удаление из tasks вместе.
+        # Возвращает task_id перенесённых задач
+        cursor = self.conn.cursor()
+        cursor.execute(BACKFILL_COMPLETED_AT)
+        self.commit()
+        archived = []
+        while True:
+            cursor.execute(f'''
+            SELECT {TASK_COLUMNS}, completed_at FROM tasks
+            WHERE completed = 1 AND completed_at < ?
+            ORDER BY completed_at, task_id
+            LIMIT ?
+            ''', (str(before), segment_size))
+            rows = [(task_id, title, description, points, assigned_to, deadline, completed_at)
+                    for task_id, title, description, points, assigned_to, deadline, completed, completed_at
+                    in cursor.fetchall()]
+            if not rows:
+                return archived
+            task_ids = [row[0] for row in rows]
+            with self.transaction():
+                cursor.execute('''
+                INSERT INTO task_archive (first_task_id, last_task_id, first_completed_at,
+                                          last_completed_at, count, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', (min(task_ids), max(task_ids), rows[0][6], rows[-1][6], len(rows),
+                      archive.encode_segment(rows)))
+                segment_id = cursor.lastrowid
+                cursor.executemany('INSERT INTO task_archive_index (task_id, segment_id) VALUES (?, ?)',
+                                   [(task_id, segment_id) for task_id in task_ids])
+                cursor.executemany('DELETE FROM tasks WHERE task_id = ?', [(task_id,) for task_id in task_ids])
+            archived.extend(task_ids)
+            if len(rows) < segment_size:
+                return archived
+    
+    def get_archive_page(self, after_segment_id=None, since=None, until=None, member_id=None):
+        # Следующий сегмент архива, пересекающийся с окном [since, until) по времени выполнения:
+        # (segment_id, задачи) или (None, []). Сегменты вне окна не распаковываются
+        conditions = ['segment_id > ?']
+        params = [after_segment_id or 0]
+        if since is not None:
+            conditions.append('last_completed_at >= ?')
+            params.append(str(since))
+        if until is not None:
+            conditions.append('first_completed_at < ?')
+            params.append(str(until))
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT segment_id, data FROM task_archive
+        WHERE {' AND '.join(conditions)}
+        ORDER BY segment_id
+        LIMIT 1
+        ''', params)
+        row = cursor.fetchone()
+        if row is None:
+            return None, []
+        return row[0], [archive.row_to_task(task) for task in archive.decode_segment(row[1])
+                        if archive.matches(task, since, until, member_id)]
+    
+    def get_archived_tasks(self, since=None, until=None, member_id=None, limit=None):
+        tasks = []
+        segment_id = None
+        while limit is None or len(tasks) < limit:
+            segment_id, page = self.get_archive_page(segment_id, since, until, member_id)
+            if segment_id is None:
+                break
+            tasks.extend(page)
+        return tasks if limit is None else tasks[:limit]
+    
+    def get_archived_task(self, task_id):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT a.data FROM task_archive_index i
+        JOIN task_archive a ON a.segment_id = i.segment_id
+        WHERE i.task_id = ?
+        ''', (task_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        for task in archive.decode_segment(row[0]):
+            if task[0] == task_id:
+                return archive.row_to_task(task)
+        return None
+    
+    def archive_stats(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(count), 0), COALESCE(SUM(LENGTH(data)), 0) FROM task_archive')
+        segments, tasks, size = cursor.fetchone()
+        return {'segments': segments, 'tasks': tasks, 'bytes': size}
+    
     def assign_task(self, task_id, member_id, deadline):
         cursor = self.conn.cursor()
         cursor.execute('''
@@ -113,9 +850,19 @@ class Database:
         SET assigned_to = ?, deadline = ?
         WHERE task_id = ?
         ''', (member_id, deadline, task_id))
-        self.conn.commit()
+        self.commit()
+    
+    def assign_tasks(self, assignments):
+        rows = [(member_id, deadline, task_id) for task_id, member_id, deadline in assignments]
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+            UPDATE tasks 
+            SET assigned_to = ?, deadline = ?
+            WHERE task_id = ?
+            ''', rows)
     
-    def complete_task(self, task_id):
+    def complete_task(self, task_id, completed_at=None):
         cursor = self.conn.cursor()
         
         cursor.execute('SELECT assigned_to, points FROM tasks WHERE task_id = ?', (task_id,))
@@ -126,7 +873,9 @@ class Database:
         
         member_id, points = task_data
         
-        cursor.execute('UPDATE tasks SET completed = 1 WHERE task_id = ?', (task_id,))
+        created_at = timestamp(completed_at)
+        cursor.execute('UPDATE tasks SET completed = 1, completed_at = ? WHERE task_id = ?',
+                       (created_at, task_id))
         
         cursor.execute('''
         UPDATE rewards 
@@ -134,9 +883,110 @@ class Database:
         WHERE member_id = ?
         ''', (points, member_id))
         
-        self.conn.commit()
+        cursor.execute('''
+        INSERT INTO points_ledger (member_id, task_id, points, created_at)
+        VALUES (?, ?, ?, ?)
+        ''', (member_id, task_id, points, created_at))
+        
+        self.commit()
         return True
     
+    def complete_tasks(self, task_ids, completed_at=None, chunk_size=500):
+        task_ids = list(dict.fromkeys(task_ids))
+        created_at = timestamp(completed_at)
+        completed = []
+        ledger = []
+        points_by_member = {}
+        with self.transaction():
+            cursor = self.conn.cursor()
+            for start in range(0, len(task_ids), chunk_size):
+                chunk = task_ids[start:start + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(f'''
+                SELECT task_id, assigned_to, points FROM tasks
+                WHERE task_id IN ({placeholders})
+                AND completed = 0 AND assigned_to IS NOT NULL
+                ''', chunk)
+                for task_id, member_id, points in cursor.fetchall():
+                    completed.append(task_id)
+                    ledger.append((member_id, task_id, points, created_at))
+                    points_by_member[member_id] = points_by_member.get(member_id, 0) + points
+            cursor.executemany('UPDATE tasks SET completed = 1, completed_at = ? WHERE task_id = ?',
+                               [(created_at, task_id) for task_id in completed])
+            cursor.executemany('''
+            UPDATE rewards 
+            SET points = points + ? 
+            WHERE member_id = ?
+            ''', [(points, member_id) for member_id, points in points_by_member.items()])
+            cursor.executemany('''
+            INSERT INTO points_ledger (member_id, task_id, points, created_at)
+            VALUES (?, ?, ?, ?)
+            ''', ledger)
+        return completed
+    
+    def uncomplete_tasks(self, task_ids, created_at=None, chunk_size=500):
+        # Обратное complete_tasks: очки снимаются отрицательной записью журнала,
+        # история начислений не переписывается
+        task_ids = list(dict.fromkeys(task_ids))
+        created_at = timestamp(created_at)
+        reverted = []
+        ledger = []
+        points_by_member = {}
+        with self.transaction():
+            cursor = self.conn.cursor()
+            for start in range(0, len(task_ids), chunk_size):
+                chunk = task_ids[start:start + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(f'''
+                SELECT task_id, assigned_to, points FROM tasks
+                WHERE task_id IN ({placeholders})
+                AND completed = 1 AND assigned_to IS NOT NULL
+                ''', chunk)
+                for task_id, member_id, points in cursor.fetchall():
+                    reverted.append(task_id)
+                    ledger.append((member_id, task_id, -points, created_at))
+                    points_by_member[member_id] = points_by_member.get(member_id, 0) - points
+            cursor.executemany('UPDATE tasks SET completed = 0, completed_at = NULL WHERE task_id = ?',
+                               [(task_id,) for task_id in reverted])
+            cursor.executemany('''
+            UPDATE rewards 
+            SET points = points + ? 
+            WHERE member_id = ?
+            ''', [(points, member_id) for member_id, points in points_by_member.items()])
+            cursor.executemany('''
+            INSERT INTO points_ledger (member_id, task_id, points, created_at)
+            VALUES (?, ?, ?, ?)
+            ''', ledger)
+        return reverted
+    
+    def get_ledger_page(self, after_id=None, limit=1000):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT entry_id, member_id, task_id, points, created_at FROM points_ledger
+        WHERE entry_id > ?
+        ORDER BY entry_id
+        LIMIT ?
+        ''', (after_id or 0, limit))
+        return cursor.fetchall()
+    
+    def add_points(self, entries):
+        # entries: (member_id, task_id, points, created_at)
+        entries = list(entries)
+        totals = {}
+        for member_id, task_id, points, created_at in entries:
+            totals[member_id] = totals.get(member_id, 0) + points
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+            INSERT INTO points_ledger (member_id, task_id, points, created_at)
+            VALUES (?, ?, ?, ?)
+            ''', entries)
+            cursor.executemany('''
+            UPDATE rewards 
+            SET points = points + ? 
+            WHERE member_id = ?
+            ''', [(points, member_id) for member_id, points in totals.items()])
+    
     def get_rewards(self):
         cursor = self.conn.cursor()
         cursor.execute('''
@@ -147,5 +997,96 @@ class Database:
         ''')
         return cursor.fetchall()
     
+    def get_points_window(self, since=None, until=None, bucket=None):
+        # Окно полуоткрытое: [since, until)
+        since, until = as_date(since), as_date(until)
+        cursor = self.conn.cursor()
+        if bucket in ('day', 'week'):
+            table, column = ('points_daily', 'day') if bucket == 'day' else ('points_weekly', 'week')
+            if bucket == 'week' and since is not None:
+                since = week_start(since)
+            where, params = self._range_condition(column, since, until)
+            cursor.execute(f'''
+            SELECT p.{column}, m.member_id, m.name, p.points
+            FROM {table} p
+            JOIN members m ON m.member_id = p.member_id
+            WHERE {where}
+            ORDER BY p.{column}, p.points DESC
+            ''', params)
+            return cursor.fetchall()
+        if bucket is not None:
+            raise ValueError(f'Unknown bucket: {bucket}')
+        
+        # Целые недели берем из недельных сумм, края окна - из дневных
+        first_week = None
+        if since is not None:
+            first_week = since if since.weekday() == 0 else week_start(since) + timedelta(days=7)
+        last_week = week_start(until) if until is not None else None
+        if first_week is not None and last_week is not None and first_week >= last_week:
+            parts = [('points_daily', 'day', since, until)]
+        else:
+            parts = [('points_weekly', 'week', first_week, last_week)]
+            if since is not None and since < first_week:
+                parts.append(('points_daily', 'day', since, first_week))
+            if until is not None and last_week < until:
+                parts.append(('points_daily', 'day', last_week, until))
+        selects, params = [], []
+        for table, column, start, end in parts:
+            where, part_params = self._range_condition(column, start, end)
+            selects.append(f'SELECT member_id, points FROM {table} WHERE {where}')
+            params.extend(part_params)
+        cursor.execute(f'''
+        SELECT m.member_id, m.name, SUM(p.points) AS total
+        FROM ({' UNION ALL '.join(selects)}) p
+        JOIN members m ON m.member_id = p.member_id
+        GROUP BY m.member_id
+        ORDER BY total DESC
+        ''', params)
+        return cursor.fetchall()
+    
+    def has_search_index(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+        return cursor.fetchone() is not None
+    
+    def search_tasks(self, query, status=None, limit=50):
+        words = re.findall(r'\w+', query or '')
+        if not words:
+            return []
+        columns = ', '.join('t.' + column for column in TASK_COLUMNS.split(', '))
+        status_condition = TASK_FILTERS.get(status, '1')
+        cursor = self.conn.cursor()
+        cursor.row_factory = Task.from_row
+        if self.has_search_index():
+            # Каждое слово - префиксный поиск, слова объединяются через AND
+            match = ' '.join(f'"{word}"*' for word in words)
+            cursor.execute(f'''
+            SELECT {columns} FROM tasks_fts f
+            JOIN tasks t ON t.task_id = f.rowid
+            WHERE tasks_fts MATCH ? AND {status_condition}
+            ORDER BY f.rank
+            LIMIT ?
+            ''', (match, limit))
+        else:
+            conditions = ' AND '.join('(t.title LIKE ? OR t.description LIKE ?)' for word in words)
+            params = [f'%{word}%' for word in words for column in range(2)]
+            cursor.execute(f'''
+            SELECT {columns} FROM tasks t
+            WHERE {conditions} AND {status_condition}
+            ORDER BY t.task_id DESC
+            LIMIT ?
+            ''', params + [limit])
+        return cursor.fetchall()
+    
+    def _range_condition(self, column, start, end):
+        conditions, params = ['1'], []
+        if start is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(start.isoformat())
+        if end is not None:
+            conditions.append(f'{column} < ?')
+            params.append(end.isoformat())
+        return ' AND '.join(conditions), params
+    
     def close(self):
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+class DatabaseExecutor:
+    def __init__(self, factory, max_pending=0, name='db-worker'):
+        self.db = None
+        self._queue = queue.Queue(max_pending)
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(target=self._run, args=(factory,), name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+    
+    def _run(self, factory):
+        try:
+            self.db = factory()
+        except BaseException as error:
+            self._startup_error = error
+            self._ready.set()
+            return
+        self._ready.set()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        self.db.close()
+    
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+    
+    def call(self, name, *args, **kwargs):
+        return self.submit(lambda: getattr(self.db, name)(*args, **kwargs))
+    
+    def pending(self):
+        return self._queue.qsize()
+    
+    def shutdown(self, wait=True):
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
\ No newline at end of file
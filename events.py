@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+MemberAdded = namedtuple('MemberAdded', 'member_id')
+MemberRemoved = namedtuple('MemberRemoved', 'member_id')
+TaskAdded = namedtuple('TaskAdded', 'task_id')
+# member_id равен None, если задача осталась без исполнителя
+TaskAssigned = namedtuple('TaskAssigned', 'task_id member_id')
+TaskCompleted = namedtuple('TaskCompleted', 'task_id member_id')
+TaskRemoved = namedtuple('TaskRemoved', 'task_id')
+PointsChanged = namedtuple('PointsChanged', 'member_id')
+TaskOverdue = namedtuple('TaskOverdue', 'task_id')
+DataReloaded = namedtuple('DataReloaded', '')
+# Отложенная запись в базу не удалась, данные в памяти перечитаны из базы
+WriteFailed = namedtuple('WriteFailed', 'operation error')
+
+CHANGE_EVENTS = (MemberAdded, MemberRemoved, TaskAdded, TaskAssigned, TaskCompleted,
+                 TaskRemoved, PointsChanged, TaskOverdue, DataReloaded)
+
+class EventBus:
+    def __init__(self, schedule=None):
+        self._handlers = {}
+        self._schedule = schedule
+        self._pending = None
+    
+    def set_scheduler(self, schedule):
+        self.flush()
+        self._schedule = schedule
+    
+    def subscribe(self, event_type, handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+    
+    def unsubscribe(self, event_type, handler):
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+    
+    def publish(self, event):
+        if self._schedule is None:
+            self._deliver(event)
+            return
+        if self._pending is None:
+            self._pending = {}
+            self._schedule(self.flush)
+        # Одинаковые события за один тик схлопываются в последнее
+        self._pending.pop(event, None)
+        self._pending[event] = None
+    
+    def flush(self):
+        pending, self._pending = self._pending, None
+        for event in pending or ():
+            self._deliver(event)
+    
+    def _deliver(self, event):
+        for handler in list(self._handlers.get(type(event), ())):
+            handler(event)
\ No newline at end of file
@@ -0,0 +1,78 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+# Гибридные логические часы: миллисекунды, счётчик и устройство.
+# Строковое сравнение меток совпадает с порядком событий, устройство разрешает ничьи
+LEGACY = '0000000000000.00000.legacy'
+
+def format_stamp(millis, counter, device):
+    return f'{millis:013d}.{counter:05d}.{device}'
+
+def legacy_stamp(device):
+    # Копии, разошедшиеся до обновления, сходятся к версии устройства с большим идентификатором
+    return format_stamp(0, 0, f'legacy-{device}')
+
+def parse_stamp(stamp):
+    millis, counter, device = stamp.split('.', 2)
+    return int(millis), int(counter), device
+
+class HybridClock:
+    def __init__(self, device='', now=time.time):
+        self.device = device
+        # Префикс gid новых записей: свой у каждого открытия базы, поэтому записи, созданные
+        # на двух копиях одного файла до их первой встречи, не совпадают по gid
+        self.session = uuid.uuid4().hex[:12]
+        self._now = now
+        self._last = (0, 0)
+        self._remote = None
+        self._paused = 0
+    
+    def stamp(self):
+        # Изменения, пришедшие с другого устройства, сохраняют его метку и происхождение
+        if self._remote is not None:
+            return self._remote[0]
+        millis, counter = self._last
+        physical = int(self._now() * 1000)
+        self._last = (physical, 0) if physical > millis else (millis, counter + 1)
+        return format_stamp(*self._last, self.device)
+    
+    def origin(self):
+        return self._remote[1] if self._remote is not None else self.device
+    
+    def via(self):
+        return self._remote[2] if self._remote is not None else ''
+    
+    def observe(self, stamp):
+        millis, counter, device = parse_stamp(stamp)
+        if (millis, counter) > self._last:
+            self._last = (millis, counter)
+    
+    def enabled(self):
+        return 0 if self._paused else 1
+    
+    @contextmanager
+    def remote(self, stamp, origin, via):
+        self.observe(stamp)
+        self._remote = (stamp, origin, via)
+        try:
+            yield
+        finally:
+            self._remote = None
+    
+    @contextmanager
+    def paused(self):
+        # Локальное обслуживание (архив) не попадает в журнал изменений
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+    
+    def register(self, conn):
+        conn.create_function('sync_hlc', 0, self.stamp)
+        conn.create_function('sync_origin', 0, self.origin)
+        conn.create_function('sync_via', 0, self.via)
+        conn.create_function('sync_device', 0, lambda: self.device)
+        conn.create_function('sync_session', 0, lambda: self.session)
+        conn.create_function('sync_enabled', 0, self.enabled)
\ No newline at end of file
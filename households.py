@@ -0,0 +1,165 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from manager import FamilyTaskManager
+
+HOUSEHOLD_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+class HouseholdRegistry:
+    # Каждая семья - отдельный файл базы: запись в одной не блокирует другие.
+    # Открытые менеджеры живут в LRU-кэше, число открытых файлов ограничено max_open.
+    def __init__(self, root_dir='households', max_open=16, idle_timeout=300,
+                 threaded=True, lazy=False, clock=time.monotonic):
+        self.root_dir = root_dir
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self.threaded = threaded
+        self.lazy = lazy
+        self._clock = clock
+        self._open = OrderedDict()
+        self._last_used = {}
+        self._leases = {}
+        # Базы, которые сейчас открываются: остальные запросы к этой семье ждут тот же Future
+        self._opening = {}
+        # Вытесненные базы, которые ещё закрываются: повторное открытие ждёт конца закрытия,
+        # иначе два менеджера писали бы в один файл
+        self._closing = {}
+        self._close_callbacks = []
+        self._lock = threading.RLock()
+        os.makedirs(root_dir, exist_ok=True)
+    
+    def path(self, household_id):
+        if not HOUSEHOLD_ID.fullmatch(household_id or ''):
+            raise ValueError(f'Некорректный идентификатор семьи: {household_id!r}')
+        return os.path.join(self.root_dir, f'{household_id}.db')
+    
+    def households(self):
+        return sorted(name[:-3] for name in os.listdir(self.root_dir)
+                      if name.endswith('.db') and HOUSEHOLD_ID.fullmatch(name[:-3]))
+    
+    def exists(self, household_id):
+        return household_id in self._open or os.path.exists(self.path(household_id))
+    
+    def on_close(self, callback):
+        # callback(household_id, manager) после закрытия вытесненного менеджера
+        self._close_callbacks.append(callback)
+    
+    def get(self, household_id):
+        return self._acquire(household_id, lease=False)
+    
+    @contextmanager
+    def lease(self, household_id):
+        # Пока менеджер арендован, вытеснение его не закрывает
+        manager = self._acquire(household_id, lease=True)
+        try:
+            yield manager
+        finally:
+            with self._lock:
+                self._leases[household_id] -= 1
+                if not self._leases[household_id]:
+                    del self._leases[household_id]
+                if household_id in self._open:
+                    self._touch(household_id)
+                evicted = self._collect_evicted(self._clock())
+            self._close_managers(evicted)
+    
+    def _acquire(self, household_id, lease):
+        # Под общей блокировкой только словари; открытие базы (миграции, загрузка) и закрытие
+        # вытесненных идут вне её, чтобы медленная семья не задерживала запросы остальных
+        path = self.path(household_id)
+        while True:
+            with self._lock:
+                manager = self._open.get(household_id)
+                opening = self._opening.get(household_id) or self._closing.get(household_id)
+                if manager is None and opening is None:
+                    future = self._opening[household_id] = Future()
+                elif manager is not None:
+                    evicted = self._checkout(household_id, lease)
+                    break
+            if opening is not None:
+                # Ошибка открытия передаётся всем ожидающим
+                opening.result()
+                continue
+            try:
+                manager = FamilyTaskManager(threaded=self.threaded, lazy=self.lazy, db_name=path)
+            except BaseException as error:
+                with self._lock:
+                    del self._opening[household_id]
+                future.set_exception(error)
+                raise
+            with self._lock:
+                del self._opening[household_id]
+                self._open[household_id] = manager
+                evicted = self._checkout(household_id, lease)
+            future.set_result(manager)
+            break
+        self._close_managers(evicted)
+        return manager
+    
+    def _checkout(self, household_id, lease):
+        if lease:
+            self._leases[household_id] = self._leases.get(household_id, 0) + 1
+        self._touch(household_id)
+        return self._collect_evicted(self._clock())
+    
+    def _touch(self, household_id):
+        self._open.move_to_end(household_id)
+        self._last_used[household_id] = self._clock()
+    
+    def _collect_evicted(self, now):
+        # _open упорядочен по последнему обращению: сначала самые давние
+        evicted = []
+        overflow = len(self._open) - self.max_open
+        for household_id in list(self._open):
+            if household_id in self._leases:
+                continue
+            idle = (self.idle_timeout is not None
+                    and now - self._last_used[household_id] >= self.idle_timeout)
+            if overflow <= 0 and not idle:
+                break
+            evicted.append(self._detach(household_id))
+            overflow -= 1
+        return evicted
+    
+    def _detach(self, household_id):
+        self._last_used.pop(household_id, None)
+        self._closing[household_id] = Future()
+        return household_id, self._open.pop(household_id)
+    
+    def _close_managers(self, evicted):
+        # Закрытие дожидается уже поставленных записей, поэтому идёт вне блокировки
+        for household_id, manager in evicted:
+            try:
+                manager.close()
+                for callback in self._close_callbacks:
+                    callback(household_id, manager)
+            finally:
+                with self._lock:
+                    closing = self._closing.pop(household_id)
+                closing.set_result(None)
+    
+    def evict_idle(self, now=None):
+        with self._lock:
+            evicted = self._collect_evicted(self._clock() if now is None else now)
+        self._close_managers(evicted)
+        return len(evicted)
+    
+    def close(self, household_id):
+        with self._lock:
+            evicted = [self._detach(household_id)] if household_id in self._open else []
+        self._close_managers(evicted)
+    
+    def close_all(self):
+        with self._lock:
+            evicted = [self._detach(household_id) for household_id in list(self._open)]
+        self._close_managers(evicted)
+    
+    def __contains__(self, household_id):
+        return household_id in self._open
+    
+    def __len__(self):
+        return len(self._open)
\ No newline at end of file
@@ -0,0 +1,252 @@
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# FAMILYTASKS_PROFILE=1 - сводка в stderr при выходе, =path.json - сводка в файл.
+# FAMILYTASKS_SLOW_MS - порог медленного запроса, FAMILYTASKS_CPROFILE=path - профиль всего запуска.
+ENV_VAR = 'FAMILYTASKS_PROFILE'
+
+SLOW_MS = float(os.environ.get('FAMILYTASKS_SLOW_MS', 50))
+
+log = logging.getLogger('familytasks.profile')
+
+class Histogram:
+    # Логарифмические корзины по микросекундам: [0, 1), [1, 2), [2, 4), ...
+    __slots__ = ('buckets', 'count', 'total', 'max', 'rows')
+    
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+    
+    def add(self, seconds, rows=0):
+        self.buckets[min(int(seconds * 1000000).bit_length(), 39)] += 1
+        self.count += 1
+        self.total += seconds
+        self.rows += rows
+        if seconds > self.max:
+            self.max = seconds
+    
+    def percentile(self, fraction):
+        # Верхняя граница корзины, в которую попадает нужная доля измерений, в мс
+        threshold = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= threshold and count:
+                return min(2 ** index / 1000, self.max * 1000)
+        return self.max * 1000
+    
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total * 1000 / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max * 1000,
+            'rows': self.rows,
+        }
+
+class Stats:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def record(self, category, name, seconds, rows=0):
+        with self._lock:
+            histogram = self._histograms.get((category, name))
+            if histogram is None:
+                histogram = self._histograms[category, name] = Histogram()
+            histogram.add(seconds, rows)
+    
+    def summary(self):
+        with self._lock:
+            result = {}
+            for (category, name), histogram in self._histograms.items():
+                result.setdefault(category, {})[name] = histogram.as_dict()
+            return result
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+STATS = Stats()
+
+_installed = False
+_explained = set()
+
+def normalize_sql(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def explain(connection, sql, parameters):
+    key = normalize_sql(sql)
+    if key in _explained:
+        return None
+    _explained.add(key)
+    try:
+        # Обычный курсор: сам EXPLAIN не должен попадать в статистику
+        rows = sqlite3.Cursor(connection).execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    return '; '.join(row[-1] for row in rows)
+
+class TracedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, parameters, perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, None, perf_counter() - started)
+    
+    def _record(self, sql, parameters, elapsed):
+        self._traced_sql = sql
+        self._traced_parameters = parameters
+        STATS.record('sql', normalize_sql(sql), elapsed, max(self.rowcount, 0))
+        if elapsed * 1000 >= SLOW_MS:
+            self._log_slow(elapsed)
+    
+    def _record_fetch(self, started, rows):
+        # SELECT выполняется по мере чтения строк, поэтому fetch* учитываются отдельно
+        elapsed = perf_counter() - started
+        sql = getattr(self, '_traced_sql', None)
+        STATS.record('fetch', normalize_sql(sql) if sql else '?', elapsed, rows)
+        if sql and elapsed * 1000 >= SLOW_MS:
+            self._log_slow(elapsed)
+    
+    def _log_slow(self, elapsed):
+        sql, parameters = self._traced_sql, self._traced_parameters
+        plan = explain(self.connection, sql, parameters) if parameters is not None else None
+        log.warning('Медленный запрос %.1f мс: %s%s', elapsed * 1000, normalize_sql(sql)[:200],
+                    f' | план: {plan}' if plan else '')
+    
+    def fetchone(self):
+        started = perf_counter()
+        row = super().fetchone()
+        self._record_fetch(started, row is not None)
+        return row
+    
+    def fetchmany(self, size=None):
+        started = perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record_fetch(started, len(rows))
+        return rows
+    
+    def fetchall(self):
+        started = perf_counter()
+        rows = super().fetchall()
+        self._record_fetch(started, len(rows))
+        return rows
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracedCursor)
+    
+    # Connection.execute из C не вызывает переопределённый Cursor.execute
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def commit(self):
+        started = perf_counter()
+        try:
+            return super().commit()
+        finally:
+            STATS.record('commit', 'commit', perf_counter() - started)
+
+def traced(fn, category, name):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - started
+        STATS.record(category, name, elapsed, len(result) if isinstance(result, (list, tuple, dict)) else 0)
+        return result
+    wrapper.traced = True
+    return wrapper
+
+def instrument_class(cls, category, predicate):
+    for name, attr in list(vars(cls).items()):
+        if not predicate(name) or not inspect.isfunction(attr) or getattr(attr, 'traced', False):
+            continue
+        # Генераторы и контекстные менеджеры отдают управление раньше, чем закончится работа
+        if inspect.isgeneratorfunction(inspect.unwrap(attr)):
+            continue
+        setattr(cls, name, traced(attr, category, f'{cls.__name__}.{name}'))
+
+def enabled(flag=False):
+    return flag or os.environ.get(ENV_VAR, '') not in ('', '0')
+
+def install(window_class=None):
+    # Подменяет классы только при включённом профилировании: в обычном запуске накладных расходов нет
+    global _installed
+    if window_class is not None:
+        instrument_class(window_class, 'ui', lambda name: name.startswith('update_'))
+    if _installed:
+        return
+    _installed = True
+    import database
+    from manager import FamilyTaskManager
+    database.CONNECT_OPTIONS['factory'] = TracedConnection
+    instrument_class(FamilyTaskManager, 'manager',
+                     lambda name: not name.startswith('_') or name in ('_read', '_write'))
+    profile_path = os.environ.get('FAMILYTASKS_CPROFILE')
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(lambda: (profiler.disable(), profiler.dump_stats(profile_path)))
+    atexit.register(report, os.environ.get(ENV_VAR, ''))
+
+@contextmanager
+def profile(path=None, limit=25):
+    # Выборочное профилирование участка кода: with instrumentation.profile(): ...
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(limit)
+
+def report(target='', limit=20):
+    summary = STATS.summary()
+    if target.endswith('.json'):
+        with open(target, 'w', encoding='utf-8') as stream:
+            json.dump(summary, stream, ensure_ascii=False, indent=2)
+        return
+    for category, entries in summary.items():
+        print(f'\n[{category}]', file=sys.stderr)
+        print(f"{'всего мс':>10} {'вызовов':>8} {'p50':>8} {'p95':>8} {'макс':>8} {'строк':>8}  имя",
+              file=sys.stderr)
+        ordered = sorted(entries.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for name, entry in ordered[:limit]:
+            print(f"{entry['total_ms']:10.1f} {entry['count']:8d} {entry['p50_ms']:8.2f} "
+                  f"{entry['p95_ms']:8.2f} {entry['max_ms']:8.2f} {entry['rows']:8d}  {name[:100]}",
+                  file=sys.stderr)
\ No newline at end of file
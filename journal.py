@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+
+class WriteJournal:
+    # Журнал записи: операции дописываются в текущий сегмент и применяются к базе пачкой.
+    # После фиксации пачки её сегмент удаляется; оставшиеся сегменты проигрываются при запуске.
+    def __init__(self, directory, max_batch=500, max_delay=1.0, clock=time.monotonic):
+        self.directory = directory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.seq = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment = None
+        self._entries = []
+        self._opened_at = None
+        os.makedirs(directory, exist_ok=True)
+    
+    def segments(self):
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.startswith('segment-') and name.endswith('.jsonl'))
+    
+    def recover(self):
+        for path in self.segments():
+            with open(path, encoding='utf-8') as stream:
+                for line in stream:
+                    try:
+                        seq, name, args = json.loads(line)
+                    except ValueError:
+                        # Оборванная при сбое последняя строка
+                        break
+                    yield seq, name, args
+    
+    def reset(self, seq):
+        with self._lock:
+            for path in self.segments():
+                os.remove(path)
+            self.seq = seq
+    
+    def append(self, name, args):
+        with self._lock:
+            if self._file is None:
+                self._segment = os.path.join(self.directory, f'segment-{self.seq + 1:012d}.jsonl')
+                self._file = open(self._segment, 'a', encoding='utf-8')
+                self._opened_at = self._clock()
+            self.seq += 1
+            entry = (self.seq, name, list(args))
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str))
+            self._file.write('\n')
+            # Запись в ОС переживает падение процесса; fsync - при фиксации пачки
+            self._file.flush()
+            self._entries.append(entry)
+            return self.seq
+    
+    def pending(self):
+        return len(self._entries)
+    
+    def due(self):
+        return bool(self._entries) and (len(self._entries) >= self.max_batch
+                                        or self._clock() - self._opened_at >= self.max_delay)
+    
+    def take(self):
+        with self._lock:
+            if not self._entries:
+                return None
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            taken = self._segment, self._entries
+            self._file = self._segment = self._opened_at = None
+            self._entries = []
+            return taken
+    
+    def discard(self, segment):
+        if os.path.exists(segment):
+            os.remove(segment)
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
\ No newline at end of file
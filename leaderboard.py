@@ -0,0 +1,173 @@
+import random
+
+class SkipNode:
+    __slots__ = ('key', 'next', 'width')
+    
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # width[level]: сколько позиций перескакивает ссылка next[level]
+        self.width = [1] * levels
+
+class SkipList:
+    # Индексируемый список с пропусками: вставка, удаление и номер позиции за O(log n) в среднем
+    MAX_LEVELS = 24
+    
+    def __init__(self, sorted_keys=()):
+        self._tail = SkipNode((float('inf'),), 0)
+        self._head = SkipNode(None, self.MAX_LEVELS)
+        self._head.next = [self._tail] * self.MAX_LEVELS
+        self._random = random.Random(0)
+        self._size = 0
+        # Уровни выше занятых не обходятся: у маленького списка поиск короткий
+        self._levels = 1
+        self._build(sorted_keys)
+    
+    def __len__(self):
+        return self._size
+    
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+    
+    def _random_levels(self):
+        levels = 1
+        while levels < self.MAX_LEVELS and self._random.random() < 0.5:
+            levels += 1
+        return levels
+    
+    def _build(self, sorted_keys):
+        # Начальная загрузка из уже отсортированных ключей за один проход
+        last = [self._head] * self.MAX_LEVELS
+        last_position = [0] * self.MAX_LEVELS
+        position = 0
+        for key in sorted_keys:
+            position += 1
+            levels = self._random_levels()
+            node = SkipNode(key, levels)
+            for level in range(levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+            self._levels = max(self._levels, levels)
+        for level in range(self._levels):
+            last[level].next[level] = self._tail
+            last[level].width[level] = position + 1 - last_position[level]
+        self._size = position
+    
+    def insert(self, key):
+        levels = self._random_levels()
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                self._head.width[level] = self._size + 1
+            self._levels = levels
+        chain = [None] * self._levels
+        steps_at_level = [0] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        new = SkipNode(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+        self._size += 1
+    
+    def remove(self, key):
+        chain = [None] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        found = chain[0].next[0]
+        if found.key != key:
+            raise KeyError(key)
+        for level in range(len(found.next)):
+            previous = chain[level]
+            previous.width[level] += found.width[level] - 1
+            previous.next[level] = found.next[level]
+        for level in range(len(found.next), self._levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+    
+    def position(self, key):
+        # Число ключей меньше key
+        position = 0
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+    
+    def first(self, count=None):
+        keys = []
+        node = self._head.next[0]
+        while node is not self._tail and (count is None or len(keys) < count):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+class Leaderboard:
+    def __init__(self, rows=()):
+        self._names = {}
+        self._points = {}
+        for member_id, name, points in rows:
+            self._names[member_id] = name
+            self._points[member_id] = points
+        # Ключи (-баллы, member_id): первое место в начале списка
+        self._order = SkipList(sorted((-points, member_id) for member_id, points in self._points.items()))
+    
+    def __len__(self):
+        return len(self._order)
+    
+    def __contains__(self, member_id):
+        return member_id in self._points
+    
+    def add(self, member_id, name, points=0):
+        if member_id in self._points:
+            self.remove(member_id)
+        self._names[member_id] = name
+        self._points[member_id] = points
+        self._order.insert((-points, member_id))
+    
+    def remove(self, member_id):
+        points = self._points.pop(member_id, None)
+        if points is None:
+            return False
+        del self._names[member_id]
+        self._order.remove((-points, member_id))
+        return True
+    
+    def add_points(self, member_id, delta):
+        points = self._points.get(member_id)
+        if points is None or not delta:
+            return
+        self._order.remove((-points, member_id))
+        self._points[member_id] = points + delta
+        self._order.insert((-(points + delta), member_id))
+    
+    def points_of(self, member_id):
+        return self._points.get(member_id)
+    
+    def rank_of(self, member_id):
+        points = self._points.get(member_id)
+        if points is None:
+            return None
+        return self._order.position((-points, member_id)) + 1
+    
+    def top_k(self, k=None):
+        return [(member_id, self._names[member_id], -points) for points, member_id in self._order.first(k)]
\ No newline at end of file
@@ -0,0 +1,311 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+from events import (MemberAdded, MemberRemoved, TaskAdded, TaskAssigned, TaskCompleted,
+                    TaskRemoved, PointsChanged, TaskOverdue, DataReloaded)
+from leaderboard import Leaderboard
+
+class IdListModel(QAbstractListModel):
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._ids = []
+        # id -> строка: поиск строки по событию без прохода по списку
+        self._rows = {}
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._ids)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+        item_id = self._ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display(item_id)
+        if role == Qt.ItemDataRole.UserRole:
+            return item_id
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.foreground(item_id)
+        return None
+    
+    def display(self, item_id):
+        raise NotImplementedError
+    
+    def foreground(self, item_id):
+        return None
+    
+    def accepts(self, item_id):
+        raise NotImplementedError
+    
+    def source_ids(self):
+        raise NotImplementedError
+    
+    def connect_events(self, events):
+        events.subscribe(DataReloaded, lambda event: self.reload())
+    
+    def id_at(self, row):
+        if 0 <= row < len(self._ids):
+            return self._ids[row]
+        return None
+    
+    def row_of(self, item_id):
+        return self._rows.get(item_id, -1)
+    
+    def reload(self):
+        self.reset(self.source_ids())
+    
+    def reset(self, ids):
+        self.beginResetModel()
+        self._ids = list(ids)
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self.endResetModel()
+    
+    def sync_id(self, item_id):
+        if self.accepts(item_id):
+            self.insert_id(item_id)
+        else:
+            self.remove_id(item_id)
+    
+    def insert_id(self, item_id):
+        if item_id in self._rows:
+            self.update_id(item_id)
+            return
+        row = len(self._ids)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._ids.append(item_id)
+        self._rows[item_id] = row
+        self.endInsertRows()
+    
+    def remove_id(self, item_id):
+        row = self.row_of(item_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._ids[row]
+        del self._rows[item_id]
+        # Строки ниже удалённой сдвигаются на одну вверх
+        for shifted in range(row, len(self._ids)):
+            self._rows[self._ids[shifted]] = shifted
+        self.endRemoveRows()
+    
+    def update_id(self, item_id):
+        row = self.row_of(item_id)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+class MembersModel(IdListModel):
+    def __init__(self, manager, show_id=True, parent=None):
+        super().__init__(manager, parent)
+        self.show_id = show_id
+    
+    def accepts(self, member_id):
+        return self.manager.get_member(member_id) is not None
+    
+    def source_ids(self):
+        return (member.member_id for member in self.manager.members)
+    
+    def connect_events(self, events):
+        super().connect_events(events)
+        for event_type in (MemberAdded, MemberRemoved):
+            events.subscribe(event_type, lambda event: self.sync_id(event.member_id))
+    
+    def display(self, member_id):
+        member = self.manager.get_member(member_id)
+        if member is None:
+            return None
+        if self.show_id:
+            return f"👤 {member.name} (ID: {member.member_id})"
+        return f"👤 {member.name}"
+
+class TaskListModel(IdListModel):
+    def accepts(self, task_id):
+        task = self.manager.get_task(task_id)
+        return task is not None and self.accepts_task(task)
+    
+    def accepts_task(self, task):
+        raise NotImplementedError
+    
+    def connect_events(self, events):
+        super().connect_events(events)
+        for event_type in (TaskAdded, TaskAssigned, TaskCompleted, TaskRemoved):
+            events.subscribe(event_type, lambda event: self.sync_id(event.task_id))
+
+class OpenTasksModel(TaskListModel):
+    def accepts_task(self, task):
+        return not task.completed
+    
+    def source_ids(self):
+        return (task.task_id for task in self.manager.tasks if not task.completed)
+    
+    def display(self, task_id):
+        task = self.manager.get_task(task_id)
+        if task is None:
+            return None
+        status = "🔴" if task.assigned_to else "🟢"
+        text = f"{status} {task.title} ({task.points} баллов)"
+        member = self.manager.get_member(task.assigned_to) if task.assigned_to else None
+        if member:
+            text += f" → {member.name}"
+        return text
+
+class AvailableTasksModel(TaskListModel):
+    def accepts_task(self, task):
+        return not task.completed and not task.assigned_to
+    
+    def source_ids(self):
+        return (task.task_id for task in self.manager.get_available_tasks())
+    
+    def display(self, task_id):
+        task = self.manager.get_task(task_id)
+        if task is None:
+            return None
+        return f"{task.title} ({task.points} баллов)"
+
+class AssignedTasksModel(TaskListModel):
+    def accepts_task(self, task):
+        return not task.completed and bool(task.assigned_to)
+    
+    def source_ids(self):
+        return (task.task_id for task in self.manager.get_assigned_tasks())
+    
+    def display(self, task_id):
+        task = self.manager.get_task(task_id)
+        if task is None:
+            return None
+        member = self.manager.get_member(task.assigned_to)
+        name = member.name if member else "?"
+        return f"📌 {task.title} (на {name}, до {task.deadline}) - {task.points} баллов"
+    
+    def connect_events(self, events):
+        super().connect_events(events)
+        events.subscribe(TaskOverdue, lambda event: self.update_id(event.task_id))
+    
+    def foreground(self, task_id):
+        if self.manager.is_overdue(task_id):
+            return QColor("red")
+        return None
+
+class SearchResultsModel(IdListModel):
+    def __init__(self, manager, parent=None):
+        super().__init__(manager, parent)
+        self._found = {}
+    
+    def set_results(self, tasks):
+        self._found = {task.task_id: task for task in tasks}
+        self.reset(self._found)
+    
+    def accepts(self, task_id):
+        return task_id in self._found
+    
+    def source_ids(self):
+        return list(self._found)
+    
+    def connect_events(self, events):
+        for event_type in (TaskAssigned, TaskCompleted):
+            events.subscribe(event_type, lambda event: self.refresh_task(event.task_id))
+        events.subscribe(TaskRemoved, lambda event: self.drop_task(event.task_id))
+    
+    def refresh_task(self, task_id):
+        if task_id in self._found:
+            task = self.manager.get_task(task_id)
+            if task is None:
+                self.drop_task(task_id)
+                return
+            self._found[task_id] = task
+            self.update_id(task_id)
+    
+    def drop_task(self, task_id):
+        self._found.pop(task_id, None)
+        self.remove_id(task_id)
+    
+    def display(self, task_id):
+        task = self._found.get(task_id)
+        if task is None:
+            return None
+        if task.completed:
+            status = "✅"
+        else:
+            status = "🔴" if task.assigned_to else "🟢"
+        return f"{status} {task.title} ({task.points} баллов)"
+
+class RatingModel(QAbstractListModel):
+    MEDALS = ["🥇", "🥈", "🥉"]
+    
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._ids = []
+        self._shown = Leaderboard()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._ids)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+        member_id = self._ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            member = self.manager.get_member(member_id)
+            if member is None:
+                return None
+            place = index.row() + 1
+            medal = self.MEDALS[place - 1] if place <= 3 else f"{place}."
+            return f"{medal} {member.name}: {self.manager.get_points(member_id)} баллов"
+        if role == Qt.ItemDataRole.UserRole:
+            return member_id
+        return None
+    
+    def connect_events(self, events):
+        events.subscribe(DataReloaded, lambda event: self.reload())
+        for event_type in (MemberAdded, MemberRemoved, PointsChanged):
+            events.subscribe(event_type, lambda event: self.sync_member(event.member_id))
+    
+    def reload(self):
+        self.beginResetModel()
+        rewards = self.manager.get_rewards()
+        self._ids = [member_id for member_id, name, points in rewards]
+        self._shown = Leaderboard(rewards)
+        self.endResetModel()
+    
+    def sync_member(self, member_id):
+        # Строки следуют за своей таблицей лидеров с показанными баллами: общая уже содержит
+        # итог всех изменений тика, и по ней строки ещё не обработанных участников стояли бы не там.
+        # Место до и после изменения - rank_of, одна вставка, удаление или перемещение строки
+        old_rank = self._shown.rank_of(member_id)
+        member = self.manager.get_member(member_id)
+        points = self.manager.get_points(member_id) if member is not None else None
+        if points is None:
+            if old_rank is not None:
+                row = old_rank - 1
+                self.beginRemoveRows(QModelIndex(), row, row)
+                self._shown.remove(member_id)
+                del self._ids[row]
+                self.endRemoveRows()
+                # Места (медали) ниже удалённой строки сдвигаются
+                self._changed(row, len(self._ids) - 1)
+            return
+        if old_rank is not None and self._shown.points_of(member_id) == points:
+            self._changed(old_rank - 1, old_rank - 1)
+            return
+        self._shown.add(member_id, member.name, points)
+        row = self._shown.rank_of(member_id) - 1
+        if old_rank is None:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._ids.insert(row, member_id)
+            self.endInsertRows()
+            self._changed(row, len(self._ids) - 1)
+            return
+        old_row = old_rank - 1
+        if old_row != row:
+            self.beginMoveRows(QModelIndex(), old_row, old_row, QModelIndex(), row + 1 if row > old_row else row)
+            self._ids.insert(row, self._ids.pop(old_row))
+            self.endMoveRows()
+        # Места строк между старой и новой позицией тоже меняются
+        self._changed(min(old_row, row), max(old_row, row))
+    def _changed(self, first, last):
+        if first <= last:
+            self.dataChanged.emit(self.index(first), self.index(last))
\ No newline at end of file
@@ -1,14 +1,44 @@
+import time
+STARTED = time.perf_counter()
+import json
+import os
 import sys
-from ui import MainWindow
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
 
 def main():
+    # Тяжёлые модули (PyQt6, ui, база) импортируются внутри main, после разбора флагов
+    profile = '--profile' in sys.argv
+    startup_time = '--startup-time' in sys.argv
+    # --write-behind: изменения копятся в журнале и пишутся в базу пачками
+    write_behind = '--write-behind' in sys.argv
+    for flag in ('--profile', '--startup-time', '--write-behind'):
+        if flag in sys.argv:
+            sys.argv.remove(flag)
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QIcon
     app = QApplication(sys.argv)
+    from ui import MainWindow, StartupTimer
+    if profile or os.environ.get('FAMILYTASKS_PROFILE', '') not in ('', '0'):
+        import instrumentation
+        instrumentation.install(MainWindow)
+    else:
+        instrumentation = None
     app.setWindowIcon(QIcon('icon.ico'))
-    window = MainWindow()
+    imported = (time.perf_counter() - STARTED) * 1000
+    window = MainWindow(write_behind=write_behind)
+    if startup_time or instrumentation:
+        timer = StartupTimer(STARTED, window)
+        timer.marks['imports_ms'] = imported
+        timer.finished.connect(lambda marks: report_startup(marks, startup_time, instrumentation, app))
     window.show()
     sys.exit(app.exec())
 
+def report_startup(marks, startup_time, instrumentation, app):
+    if instrumentation:
+        for name, value in marks.items():
+            instrumentation.STATS.record('startup', name, value / 1000)
+    if startup_time:
+        print(json.dumps(marks), file=sys.stderr)
+        app.quit()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -10,25 +10,30 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Модули, которые настольное приложение не использует: меньше архив и быстрее распаковка
+    excludes=[
+        'tkinter', 'unittest', 'pydoc', 'doctest', 'asyncio',
+        'flask', 'werkzeug', 'jinja2', 'uvicorn',
+        'PyQt6.QtNetwork', 'PyQt6.QtQml', 'PyQt6.QtQuick', 'PyQt6.QtSql',
+        'PyQt6.QtMultimedia', 'PyQt6.QtPdf', 'PyQt6.QtWebEngineCore',
+    ],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
+# Сборка в каталог (onedir): onefile распаковывает все библиотеки Qt во временный
+# каталог при каждом запуске. UPX отключён - распаковка сжатых DLL тоже замедляет старт.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +41,11 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='main',
+)
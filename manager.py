@@ -1,80 +1,900 @@
-from database import Database
-from models import FamilyMember, Task
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import partial
+import archive
+from commands import CommandLog
+from database import Database, timestamp
+from db_worker import DatabaseExecutor
+from journal import WriteJournal
+from leaderboard import Leaderboard
+import recurrence
+from scheduler import DeadlineScheduler, today_epoch_day
+from events import (EventBus, MemberAdded, MemberRemoved, TaskAdded, TaskAssigned,
+                    TaskCompleted, TaskRemoved, PointsChanged, TaskOverdue, DataReloaded,
+                    WriteFailed)
+from models import FamilyMember, Task, TaskTemplate
+
+def task_row(task):
+    return (task.task_id, task.title, task.description, task.points, task.assigned_to, task.deadline,
+            task.completed)
 
 class FamilyTaskManager:
-    def __init__(self):
-        self.db = Database()
-        self.load_data()
+    def __init__(self, threaded=False, dispatch=None, lazy=False, db_name='family_task_manager.db',
+                 load=True, write_behind=False, journal_batch=500, journal_delay=1.0, history_limit=100):
+        # lazy: в памяти держатся только открытые задачи, история читается по страницам
+        # load=False: данные загружаются позже, например через load_data_async
+        # write_behind: записи идут в журнал и фиксируются в базе пачками не реже journal_delay секунд
+        self.lazy = lazy
+        self.db_name = db_name
+        self.events = EventBus()
+        self.deadlines = DeadlineScheduler()
+        self._dispatch = dispatch or self._defer
+        self._deferred = queue.SimpleQueue()
+        self._transaction_depth = 0
+        self.history = CommandLog(history_limit)
+        self.loaded = False
+        if threaded:
+            self.db = None
+            self._executor = DatabaseExecutor(partial(Database, db_name))
+        else:
+            self.db = Database(db_name)
+            self._executor = None
+        self.journal = None
+        self._journal_timer = None
+        # Сегменты, уже применённые к базе, но ещё не зафиксированные
+        self._journal_segments = []
+        self._occurrences_future = None
+        if write_behind:
+            self.journal = WriteJournal(f'{db_name}.writes', journal_batch, journal_delay)
+            self.journal.reset(self._run_db(self._replay_journal))
+        self._clear()
+        if load:
+            self.load_data()
+    
+    def _clear(self):
+        self._members = {}
+        self._tasks = {}
+        self._available = {}
+        self._assigned = {}
+        self._completed = {}
+        self._by_assignee = {}
+        self.deadlines.clear()
+        self.leaderboard = Leaderboard()
+        self._next_member_id = self._next_task_id = 1
+    
+    def _run_db(self, fn):
+        if self._executor is None:
+            return fn(self.db)
+        return self._executor.submit(lambda: fn(self._executor.db)).result()
     
     def load_data(self):
-        self.members = self.db.get_members()
-        self.tasks = self.db.get_tasks()
+        # Перечитывание (и load_data_async) сбрасывает историю отмены: после синхронизации
+        # или ошибки записи база могла разойтись с состоянием, с которого сняты её шаги
+        self.process_pending()
+        self._flush_before_read()
+        self._apply_snapshot(self._run_db(self._fetch_snapshot))
+    
+    def load_data_async(self):
+        # Чтение идёт в потоке базы, индексы строятся в потоке менеджера через dispatch
+        if self._executor is None:
+            self.load_data()
+            return None
+        # Снимок должен видеть записи, ещё лежащие в журнале
+        self._flush_before_read()
+        future = self._executor.submit(lambda: self._fetch_snapshot(self._executor.db))
+        future.add_done_callback(lambda done: self._dispatch(self._snapshot_done, done))
+        return future
+    
+    def _snapshot_done(self, future):
+        error = future.exception()
+        if error is not None:
+            self.events.publish(WriteFailed('load_data', error))
+            return
+        self._apply_snapshot(future.result())
+    
+    def _fetch_snapshot(self, db):
+        return (db.get_rewards(), db.get_members(), db.get_tasks('open' if self.lazy else 'all'),
+                db.next_id('members'), db.next_id('tasks'))
+    
+    def _apply_snapshot(self, snapshot):
+        rewards, members, tasks, next_member_id, next_task_id = snapshot
+        self._clear()
+        self.leaderboard = Leaderboard(rewards)
+        for member in members:
+            self._members[member.member_id] = member
+        for task in tasks:
+            self._tasks[task.task_id] = task
+            self._index_task(task)
+        self._next_member_id = next_member_id
+        self._next_task_id = next_task_id
+        # Шаги истории ссылаются на прежнее состояние памяти
+        self.history.clear()
+        self.loaded = True
+        self.events.publish(DataReloaded())
+    
+    def _defer(self, fn, *args):
+        self._deferred.put((fn, args))
+    
+    def process_pending(self):
+        # Колбэки рабочего потока без dispatch выполняются в потоке менеджера
+        while True:
+            try:
+                fn, args = self._deferred.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args)
+    
+    def _read(self, name, *args):
+        self.process_pending()
+        self._flush_before_read()
+        if self._executor is None:
+            return getattr(self.db, name)(*args)
+        return self._executor.call(name, *args).result()
+    
+    def _run_db_async(self, fn, done):
+        # fn выполняется в потоке базы, done(результат, ошибка) - в потоке менеджера через dispatch;
+        # без потока базы всё выполняется сразу
+        self.process_pending()
+        self._flush_before_read()
+        if self._executor is None:
+            try:
+                result = fn(self.db)
+            except Exception as error:
+                done(None, error)
+            else:
+                done(result, None)
+            return None
+        future = self._executor.submit(lambda: fn(self._executor.db))
+        future.add_done_callback(lambda finished: self._dispatch(self._run_db_done, finished, done))
+        return future
+    
+    def _run_db_done(self, future, done):
+        error = future.exception()
+        done(None if error is not None else future.result(), error)
+    
+    def _write(self, name, *args):
+        # Память уже обновлена; при ошибке записи состояние перечитывается из базы
+        self.process_pending()
+        if self.journal is not None:
+            self.journal.append(name, args)
+            self._schedule_journal_flush()
+            return None
+        if self._executor is None:
+            try:
+                result = getattr(self.db, name)(*args)
+            except Exception as error:
+                self._write_failed(name, error)
+                raise
+            if result is False:
+                self._write_failed(name, None)
+            return result
+        future = self._executor.call(name, *args)
+        future.add_done_callback(lambda done: self._dispatch(self._write_done, name, done))
+        return future
+    
+    def _write_done(self, name, future):
+        error = future.exception()
+        if error is not None or future.result() is False:
+            self._write_failed(name, error)
+    
+    def _replay_journal(self, db):
+        applied = db.journal_seq()
+        entries = [entry for entry in self.journal.recover() if entry[0] > applied]
+        if entries:
+            db.apply_journal(entries, recovering=True)
+            applied = entries[-1][0]
+        return applied
+    
+    def _schedule_journal_flush(self):
+        # Пачка не разрывает транзакцию менеджера; по времени сброс идёт через dispatch
+        if self._transaction_depth:
+            return
+        if self.journal.due():
+            self.flush_journal()
+        elif self._journal_timer is None and self.journal.pending():
+            self._journal_timer = threading.Timer(self.journal.max_delay,
+                                                  lambda: self._dispatch(self._journal_timer_fired))
+            self._journal_timer.daemon = True
+            self._journal_timer.start()
+    
+    def _journal_timer_fired(self):
+        self._journal_timer = None
+        if self.journal is not None and not self._transaction_depth:
+            self.flush_journal()
+    
+    def _flush_before_read(self):
+        # Чтение из базы должно видеть записи, ещё лежащие в журнале
+        if self.journal is not None and self.journal.pending():
+            self.flush_journal()
+    
+    def flush_journal(self):
+        if self.journal is None:
+            return None
+        taken = self.journal.take()
+        if taken is None:
+            return None
+        segment, entries = taken
+        if self._executor is None:
+            try:
+                committed = self.db.apply_journal(entries)
+            except Exception as error:
+                self._journal_done(segment, True)
+                self._write_failed('apply_journal', error)
+                raise
+            self._journal_done(segment, committed)
+            return True
+        future = self._executor.call('apply_journal', entries)
+        future.add_done_callback(lambda done: self._journal_applied(segment, done))
+        return future
+    
+    def _journal_done(self, segment, committed):
+        # Пока транзакция базы открыта, сегменты нужны для проигрывания после сбоя
+        self._journal_segments.append(segment)
+        if committed is None:
+            return
+        for path in self._journal_segments:
+            self.journal.discard(path)
+        self._journal_segments = []
+    
+    def _journal_applied(self, segment, future):
+        # Выполняется в потоке базы: сегменты удаляются сразу после фиксации пачки
+        error = future.exception()
+        self._journal_done(segment, True if error is not None else future.result())
+        if error is not None:
+            self._dispatch(self._write_failed, 'apply_journal', error)
+    
+    def _write_failed(self, name, error):
+        self.load_data()
+        self.events.publish(WriteFailed(name, error))
+    
+    def pending_writes(self):
+        return self._executor.pending() if self._executor is not None else 0
+    
+    def barrier(self):
+        # Future завершается, когда все поставленные до него записи применены к базе
+        self._flush_before_read()
+        if self._executor is None:
+            future = Future()
+            future.set_result(None)
+            return future
+        return self._executor.submit(lambda: None)
+    
+    @property
+    def members(self):
+        return list(self._members.values())
+    
+    @property
+    def tasks(self):
+        return list(self._tasks.values())
+    
+    def _status_index(self, task):
+        if task.completed:
+            return self._completed
+        if task.assigned_to:
+            return self._assigned
+        return self._available
+    
+    def _index_task(self, task):
+        self._status_index(task)[task.task_id] = task
+        if task.assigned_to:
+            self._by_assignee.setdefault(task.assigned_to, {})[task.task_id] = task
+            if not task.completed:
+                self.deadlines.track(task.task_id, task.deadline)
+    
+    def _unindex_task(self, task):
+        self.deadlines.untrack(task.task_id)
+        self._status_index(task).pop(task.task_id, None)
+        if task.assigned_to:
+            member_tasks = self._by_assignee.get(task.assigned_to)
+            if member_tasks is not None:
+                member_tasks.pop(task.task_id, None)
+                if not member_tasks:
+                    del self._by_assignee[task.assigned_to]
+    
+    @contextmanager
+    def transaction(self):
+        # Изменения внешней транзакции отменяются одним шагом истории
+        if not self._transaction_depth:
+            self.history.begin_group()
+        self._transaction_depth += 1
+        self._write('begin_transaction')
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            self._write('end_transaction', False)
+            if not self._transaction_depth:
+                self.history.end_group(commit=False)
+                self.load_data()
+            raise
+        self._transaction_depth -= 1
+        self._write('end_transaction')
+        if not self._transaction_depth:
+            self.history.end_group()
+    
+    def undo(self):
+        return self.history.undo(self)
+    
+    def redo(self):
+        return self.history.redo(self)
     
     def add_member(self, name):
-        member_id = self.db.add_member(name)
+        member_id = self._next_member_id
+        self._next_member_id += 1
         member = FamilyMember(member_id, name)
-        self.members.append(member)
+        self._members[member_id] = member
+        self.leaderboard.add(member_id, name)
+        self.events.publish(MemberAdded(member_id))
+        self._write('add_member', name, member_id)
+        self.history.record('Добавление участника', [('restore_member', (member_id, name))],
+                            [('remove_member', (member_id,))])
         return member
     
+    def add_members(self, names):
+        names = list(names)
+        first_id = self._next_member_id
+        self._next_member_id += len(names)
+        created = []
+        for member_id, name in enumerate(names, first_id):
+            member = FamilyMember(member_id, name)
+            self._members[member_id] = member
+            self.leaderboard.add(member_id, name)
+            self.events.publish(MemberAdded(member_id))
+            created.append(member)
+        if names:
+            self._write('add_members', names, first_id)
+            self.history.record('Добавление участников',
+                                [('restore_member', (member.member_id, member.name)) for member in created],
+                                [('remove_member', (member.member_id,)) for member in reversed(created)])
+        return created
+    
+    def restore_member(self, member_id, name, points=0, assignments=()):
+        # Возврат участника с прежним id, очками и задачами (task_id, дедлайн), с которых его сняли
+        if member_id in self._members:
+            return False
+        assignments = [tuple(assignment) for assignment in assignments]
+        self._next_member_id = max(self._next_member_id, member_id + 1)
+        self._members[member_id] = FamilyMember(member_id, name)
+        self.leaderboard.add(member_id, name, points)
+        self.events.publish(MemberAdded(member_id))
+        for task_id, deadline in assignments:
+            task = self._tasks.get(task_id)
+            if task is not None and not task.assigned_to:
+                self._apply_assign(task_id, member_id, deadline)
+        self._write('restore_member', member_id, name, points, assignments)
+        self.history.record('Возврат участника', [('restore_member', (member_id, name, points, assignments))],
+                            [('remove_member', (member_id,))])
+        return True
+    
     def add_task(self, title, description, points):
-        task_id = self.db.add_task(title, description, points)
-        task = Task(task_id, title, description, points)
-        self.tasks.append(task)
+        task_id = self._next_task_id
+        self._next_task_id += 1
+        task = self._store_task(Task(task_id, title, description, points))
+        self._write('add_task', title, description, points, task_id)
+        self.history.record('Добавление задачи', [('restore_tasks', ([task_row(task)],))],
+                            [('remove_tasks', ([task_id],))])
+        return task
+    
+    def add_tasks(self, tasks):
+        tasks = [tuple(task) for task in tasks]
+        first_id = self._next_task_id
+        self._next_task_id += len(tasks)
+        created = [self._store_task(Task(task_id, title, description, points))
+                   for task_id, (title, description, points) in enumerate(tasks, first_id)]
+        if tasks:
+            self._write('add_tasks', tasks, first_id)
+            self._record_added(created)
+        return created
+    
+    def insert_tasks(self, rows):
+        # rows: (title, description, points, assigned_to, deadline, completed); очки не начисляются
+        rows = [tuple(row) for row in rows]
+        first_id = self._next_task_id
+        self._next_task_id += len(rows)
+        created = []
+        for task_id, (title, description, points, assigned_to, deadline, completed) in enumerate(rows, first_id):
+            task = Task(task_id, title, description, points)
+            if assigned_to:
+                task.assign(assigned_to, deadline)
+            task.completed = bool(completed)
+            if not (self.lazy and task.completed):
+                self._store_task(task)
+            created.append(task)
+        if rows:
+            self._write('insert_tasks', [task_row(task) for task in created])
+            self._record_added(created)
+        return created
+    
+    def _record_added(self, tasks):
+        self.history.record('Добавление задач', [('restore_tasks', ([task_row(task) for task in tasks],))],
+                            [('remove_tasks', ([task.task_id for task in tasks],))])
+    
+    def restore_tasks(self, rows):
+        # Полные строки задач с прежними id; очки за выполненные не начисляются повторно
+        rows = [tuple(row) for row in rows]
+        restored = []
+        for task_id, title, description, points, assigned_to, deadline, completed in rows:
+            if task_id in self._tasks:
+                continue
+            task = Task(task_id, title, description, points)
+            if assigned_to:
+                task.assign(assigned_to, deadline)
+            task.completed = bool(completed)
+            self._next_task_id = max(self._next_task_id, task_id + 1)
+            if not (self.lazy and task.completed):
+                self._store_task(task)
+            restored.append(task)
+        if restored:
+            self._write('insert_tasks', [task_row(task) for task in restored])
+            self._record_added(restored)
+        return restored
+    
+    def remove_tasks(self, task_ids):
+        removed = []
+        for task_id in dict.fromkeys(task_ids):
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self._unindex_task(task)
+            elif self.lazy:
+                task = self._read('get_task', task_id)
+            if task is not None:
+                self.events.publish(TaskRemoved(task_id))
+                removed.append(task)
+        if removed:
+            self._write('remove_tasks', [task.task_id for task in removed])
+            self._record_removed(removed)
+        return [task.task_id for task in removed]
+    
+    def _record_removed(self, tasks):
+        self.history.record('Удаление задач', [('remove_tasks', ([task.task_id for task in tasks],))],
+                            [('restore_tasks', ([task_row(task) for task in tasks],))])
+    
+    def _store_task(self, task):
+        self._tasks[task.task_id] = task
+        self._index_task(task)
+        self.events.publish(TaskAdded(task.task_id))
         return task
     
     def assign_task(self, task_id, member_id, deadline):
-        self.db.assign_task(task_id, member_id, deadline)
+        previous = self._assignments([task_id])
+        self._apply_assign(task_id, member_id, deadline)
+        self._write('assign_task', task_id, member_id, deadline)
+        self.history.record('Назначение задачи', [('assign_tasks', ([(task_id, member_id, deadline)],))],
+                            [('assign_tasks', (previous,))])
+    
+    def assign_tasks(self, assignments):
+        assignments = [tuple(assignment) for assignment in assignments]
+        previous = self._assignments(task_id for task_id, member_id, deadline in assignments)
+        for task_id, member_id, deadline in assignments:
+            self._apply_assign(task_id, member_id, deadline)
+        self._write('assign_tasks', assignments)
+        self.history.record('Назначение задач', [('assign_tasks', (assignments,))],
+                            [('assign_tasks', (previous,))])
+    
+    def _assignments(self, task_ids):
+        # Прежние исполнители в обратном порядке: так повторные назначения одной задачи
+        # откатываются к самому первому состоянию
+        previous = []
+        for task_id in task_ids:
+            task = self.get_task(task_id)
+            if task is not None:
+                previous.append((task_id, task.assigned_to, task.deadline))
+        previous.reverse()
+        return previous
+    
+    def auto_assign(self, deadline, strategy='balanced', tasks=None, member_ids=None):
+        # Распределяет свободные задачи между участниками одной пакетной записью
+        import assignment
+        loads = assignment.member_loads(self)
+        if member_ids is not None:
+            loads = {member_id: loads[member_id] for member_id in member_ids if member_id in loads}
+        tasks = self.get_available_tasks() if tasks is None else [
+            task for task in tasks if not task.assigned_to and not task.completed]
+        assignments = assignment.plan(tasks, loads, deadline, strategy)
+        if assignments:
+            self.assign_tasks(assignments)
+        return assignments
+    
+    def add_template(self, title, description, points, rule, interval=1, weekdays=None, start_day=None,
+                     until_day=None, assigned_to=None):
+        # Шаблон сразу пишется в базу: по нему тут же создаются задачи окна
+        if rule not in recurrence.RULES:
+            raise ValueError(f'Неизвестное правило повторения: {rule}')
+        template = TaskTemplate(None, title, description, points, rule, interval, weekdays,
+                                start_day or date.today().isoformat(), until_day, assigned_to)
+        template.template_id = self._read('add_template', title, description, points, rule, interval,
+                                          weekdays, template.start_day, until_day, assigned_to)
+        self.generate_occurrences()
+        return template
+    
+    def add_template_async(self, done, title, description, points, rule, interval=1, weekdays=None,
+                           start_day=None, until_day=None, assigned_to=None):
+        # done(шаблон, ошибка); задачи окна затем создаются generate_occurrences_async
+        if rule not in recurrence.RULES:
+            raise ValueError(f'Неизвестное правило повторения: {rule}')
+        template = TaskTemplate(None, title, description, points, rule, interval, weekdays,
+                                start_day or date.today().isoformat(), until_day, assigned_to)
+        
+        def write(db):
+            return db.add_template(title, description, points, rule, interval, weekdays, template.start_day,
+                                   until_day, assigned_to)
+        
+        def added(template_id, error):
+            if error is None:
+                template.template_id = template_id
+                self.generate_occurrences_async()
+            done(template if error is None else None, error)
+        
+        return self._run_db_async(write, added)
+    
+    def get_templates(self):
+        return self._read('get_templates')
+    
+    def remove_template(self, template_id, today=None):
+        removed = self._read('remove_template', template_id, today or date.today())
+        if removed is None:
+            return False
+        for task_id in removed:
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self._unindex_task(task)
+                self.events.publish(TaskRemoved(task_id))
+        return True
+    
+    def generate_occurrences(self, today=None, window_days=recurrence.WINDOW_DAYS,
+                             catch_up=recurrence.CATCH_UP):
+        # Вызывается при запуске и раз в сутки; повторный вызов в тот же день ничего не создаёт
+        return self._store_occurrences(self._read('plan_occurrences', today or date.today(), window_days,
+                                                  catch_up))
+    
+    def generate_occurrences_async(self, today=None, window_days=recurrence.WINDOW_DAYS,
+                                   catch_up=recurrence.CATCH_UP):
+        # План строится в потоке базы, задачи создаются в потоке менеджера через dispatch
+        if self._executor is None:
+            self.generate_occurrences(today, window_days, catch_up)
+            return None
+        # Второй план до записи первого повторил бы те же дни
+        if self._occurrences_future is not None:
+            return self._occurrences_future
+        self.process_pending()
+        self._flush_before_read()
+        future = self._executor.call('plan_occurrences', today or date.today(), window_days, catch_up)
+        self._occurrences_future = future
+        future.add_done_callback(lambda done: self._dispatch(self._occurrences_planned, done))
+        return future
+    
+    def _occurrences_planned(self, future):
+        self._occurrences_future = None
+        error = future.exception()
+        if error is not None:
+            self.events.publish(WriteFailed('generate_occurrences', error))
+            return
+        self._store_occurrences(future.result())
+    
+    def _store_occurrences(self, plan):
+        # Идентификаторы выдаёт счётчик менеджера, запись идёт обычным путём: журнал или поток базы
+        rows, watermarks = plan
+        if not watermarks:
+            return []
+        first_id = self._next_task_id
+        self._next_task_id += len(rows)
+        created = []
+        stored = []
+        for task_id, row in enumerate(rows, first_id):
+            title, description, points, assigned_to, deadline, template_id, day = row
+            # Участника могли удалить, пока строился план
+            if assigned_to not in self._members:
+                assigned_to = None
+            task = Task(task_id, title, description, points)
+            task.assign(assigned_to, deadline)
+            created.append(self._store_task(task))
+            stored.append((task_id, title, description, points, assigned_to, deadline, template_id, day))
+        self._write('insert_occurrences', stored, watermarks)
+        return created
+    
+    def _apply_assign(self, task_id, member_id, deadline):
         task = self.get_task(task_id)
         if task:
+            self._unindex_task(task)
             task.assign(member_id, deadline)
+            self._index_task(task)
+            self.events.publish(TaskAssigned(task_id, member_id))
 
     def remove_member(self, member_id):
-        success = self.db.remove_member(member_id)
-        if success:
-            self.members = [m for m in self.members if m.member_id != member_id]
-            for task in self.tasks:
-                if task.assigned_to == member_id:
-                    task.assigned_to = None
-                    task.deadline = None
-        return success
+        if member_id not in self._members:
+            return False
+        member = self._members.pop(member_id)
+        points = self.leaderboard.points_of(member_id) or 0
+        self.leaderboard.remove(member_id)
+        tasks = list(self._by_assignee.get(member_id, {}).values())
+        # Снятые с участника задачи запоминаются, чтобы отмена вернула их одной пачкой
+        assignments = [(task.task_id, task.deadline) for task in tasks]
+        if self.lazy:
+            assignments += self._read('get_member_assignments', member_id, True)
+        for task in tasks:
+            self._unindex_task(task)
+            task.assigned_to = None
+            task.deadline = None
+            self._index_task(task)
+            self.events.publish(TaskAssigned(task.task_id, None))
+        self.events.publish(MemberRemoved(member_id))
+        self.history.record('Удаление участника', [('remove_member', (member_id,))],
+                            [('restore_member', (member_id, member.name, points, assignments))])
+        return self._write('remove_member', member_id) is not False
     
     def remove_task(self, task_id):
-        success = self.db.remove_task(task_id)
-        if success:
-            self.tasks = [t for t in self.tasks if t.task_id != task_id]
-        return success
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._unindex_task(task)
+        elif not self.lazy:
+            return False
+        else:
+            task = self._read('get_task', task_id)
+            if task is None:
+                return False
+        self.events.publish(TaskRemoved(task_id))
+        self._record_removed([task])
+        return self._write('remove_task', task_id) is not False
     
     def complete_task(self, task_id):
-        success = self.db.complete_task(task_id)
-        if success:
+        task = self.get_task(task_id)
+        if task is None or not task.assigned_to or task.completed:
+            return False
+        # Время выполнения - момент действия, а не момент записи пачки журнала в базу
+        completed_at = timestamp()
+        self._apply_complete(task)
+        self._record_completed([task_id])
+        return self._write('complete_task', task_id, completed_at) is not False
+    
+    def complete_tasks(self, task_ids):
+        completed = []
+        for task_id in dict.fromkeys(task_ids):
             task = self.get_task(task_id)
-            if task:
-                task.mark_completed()
-        return success
+            if task is not None and task.assigned_to and not task.completed:
+                self._apply_complete(task)
+                completed.append(task_id)
+        if completed:
+            self._write('complete_tasks', completed, timestamp())
+            self._record_completed(completed)
+        return completed
+    
+    def _record_completed(self, task_ids):
+        self.history.record('Выполнение задач', [('complete_tasks', (task_ids,))],
+                            [('uncomplete_tasks', (task_ids,))])
+    
+    def uncomplete_tasks(self, task_ids):
+        # Очки снимаются отрицательной записью в журнале очков
+        reverted = []
+        for task_id in dict.fromkeys(task_ids):
+            task = self.get_task(task_id)
+            if task is not None and task.assigned_to and task.completed:
+                self._apply_uncomplete(task)
+                reverted.append(task_id)
+        if reverted:
+            self._write('uncomplete_tasks', reverted, timestamp())
+            self.history.record('Отмена выполнения', [('uncomplete_tasks', (reverted,))],
+                                [('complete_tasks', (reverted,))])
+        return reverted
+    
+    def _apply_uncomplete(self, task):
+        if task.task_id in self._tasks:
+            self._unindex_task(task)
+        task.completed = False
+        self._tasks[task.task_id] = task
+        self._index_task(task)
+        self.leaderboard.add_points(task.assigned_to, -task.points)
+        self.events.publish(TaskAssigned(task.task_id, task.assigned_to))
+        self.events.publish(PointsChanged(task.assigned_to))
+    
+    def _apply_complete(self, task):
+        self._unindex_task(task)
+        task.mark_completed()
+        self._index_task(task)
+        self.leaderboard.add_points(task.assigned_to, task.points)
+        self.events.publish(TaskCompleted(task.task_id, task.assigned_to))
+        self.events.publish(PointsChanged(task.assigned_to))
+        if self.lazy:
+            self._unindex_task(task)
+            del self._tasks[task.task_id]
+    
+    def add_points(self, entries):
+        # entries: (member_id, task_id, points, created_at), например перенесённая история
+        entries = [tuple(entry) for entry in entries]
+        changed = {}
+        for member_id, task_id, points, created_at in entries:
+            changed[member_id] = changed.get(member_id, 0) + points
+        for member_id, points in changed.items():
+            self.leaderboard.add_points(member_id, points)
+            self.events.publish(PointsChanged(member_id))
+        if entries:
+            self._write('add_points', entries)
+            self.history.record('Начисление очков', [('add_points', (entries,))],
+                                [('add_points', ([(member_id, task_id, -points, created_at)
+                                                  for member_id, task_id, points, created_at in entries],))])
     
     def get_member(self, member_id):
-        for member in self.members:
-            if member.member_id == member_id:
-                return member
-        return None
+        return self._members.get(member_id)
     
     def get_task(self, task_id):
-        for task in self.tasks:
-            if task.task_id == task_id:
-                return task
-        return None
+        task = self._tasks.get(task_id)
+        if task is None and self.lazy:
+            task = self._read('get_task', task_id)
+        return task
+    
+    def get_member_tasks(self, member_id):
+        return list(self._by_assignee.get(member_id, {}).values())
     
     def get_available_tasks(self):
-        return [task for task in self.tasks if not task.assigned_to and not task.completed]
+        return list(self._available.values())
     
     def get_assigned_tasks(self):
-        return [task for task in self.tasks if task.assigned_to and not task.completed]
+        return list(self._assigned.values())
+    
+    def get_completed_tasks(self, include_archived=False):
+        tasks = list(self.iter_tasks('completed')) if self.lazy else list(self._completed.values())
+        if include_archived:
+            tasks = self.get_archived_tasks() + tasks
+        return tasks
+    
+    def iter_tasks(self, filter_type='all', after_id=None, page_size=500):
+        while True:
+            page = self._read('get_tasks_page', filter_type, after_id, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1].task_id
+    
+    def archive_completed(self, older_than_days=archive.ARCHIVE_AFTER_DAYS, now=None):
+        # Переносит старые выполненные задачи в сжатый архив; рейтинг и журнал очков не меняются
+        if self._transaction_depth:
+            # Сегменты фиксируются сразу и история сбрасывается: откатить архивацию нельзя
+            raise RuntimeError('Архивация недоступна внутри транзакции')
+        cutoff = timestamp((now or datetime.now()) - timedelta(days=older_than_days))
+        return self._drop_archived(self._read('archive_completed', cutoff))
+    
+    def archive_completed_async(self, older_than_days=archive.ARCHIVE_AFTER_DAYS, now=None):
+        # Сегменты пишутся в потоке базы, задачи убираются из памяти в потоке менеджера через dispatch
+        if self._executor is None:
+            self.archive_completed(older_than_days, now)
+            return None
+        if self._transaction_depth:
+            raise RuntimeError('Архивация недоступна внутри транзакции')
+        cutoff = timestamp((now or datetime.now()) - timedelta(days=older_than_days))
+        self.process_pending()
+        self._flush_before_read()
+        future = self._executor.call('archive_completed', cutoff)
+        future.add_done_callback(lambda done: self._dispatch(self._archive_done, done))
+        return future
+    
+    def _archive_done(self, future):
+        error = future.exception()
+        if error is not None:
+            self.events.publish(WriteFailed('archive_completed', error))
+            return
+        self._drop_archived(future.result())
+    
+    def _drop_archived(self, archived):
+        if archived:
+            self.history.clear()
+        for task_id in archived:
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self._unindex_task(task)
+                self.events.publish(TaskRemoved(task_id))
+        return archived
+    
+    def iter_archived_tasks(self, since=None, until=None, member_id=None):
+        segment_id = None
+        while True:
+            segment_id, page = self._read('get_archive_page', segment_id, since, until, member_id)
+            if segment_id is None:
+                return
+            yield from page
+    
+    def get_archived_tasks(self, since=None, until=None, member_id=None, limit=None):
+        return self._read('get_archived_tasks', since, until, member_id, limit)
+    
+    def get_archived_task(self, task_id):
+        return self._read('get_archived_task', task_id)
+    
+    def archive_stats(self):
+        return self._read('archive_stats')
+    
+    def iter_points(self, page_size=1000):
+        after_id = None
+        while True:
+            page = self._read('get_ledger_page', after_id, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1][0]
+    
+    def export(self, stream, format='jsonl', kinds=None, progress=None):
+        # transfer импортируется по требованию, чтобы не замедлять запуск приложения
+        import transfer
+        return transfer.export_records(self, stream, format, kinds, progress)
+    
+    def import_(self, stream, format='jsonl', batch_size=1000, progress=None):
+        import transfer
+        return transfer.import_records(self, stream, format, batch_size, progress)
+    
+    def sync(self, peer):
+        # peer: путь к базе другого устройства или (host, port); после обмена данные перечитываются
+        import sync
+        self.process_pending()
+        self._flush_before_read()
+        stats = self._run_db(lambda db: sync.sync_with(db, peer))
+        self.load_data()
+        return stats
+    
+    def sync_async(self, peer, done):
+        # done(статистика, ошибка); данные перечитываются в фоне и приходят событием DataReloaded
+        import sync
+        
+        def synced(stats, error):
+            if error is None:
+                self.load_data_async()
+            done(stats, error)
+        
+        return self._run_db_async(lambda db: sync.sync_with(db, peer), synced)
+    
+    def search_tasks(self, query, status=None, limit=50):
+        found = self._read('search_tasks', query, status, limit)
+        return [self._tasks.get(task.task_id, task) for task in found]
+    
+    def search_tasks_async(self, query, done, status=None, limit=50):
+        # done(задачи, ошибка) в потоке менеджера; задачи из памяти подменяют прочитанные копии
+        def found(tasks, error):
+            done([self._tasks.get(task.task_id, task) for task in tasks or ()], error)
+        
+        return self._run_db_async(lambda db: db.search_tasks(query, status, limit), found)
+    
+    def is_overdue(self, task_id):
+        return self.deadlines.is_overdue(task_id)
+    
+    def overdue(self):
+        return [self._tasks[task_id] for task_id in self.deadlines.overdue() if task_id in self._tasks]
+    
+    def due_within(self, delta):
+        return [self._tasks[task_id] for task_id, day in self.deadlines.due_within(delta)]
+    
+    def next_due(self):
+        next_due = self.deadlines.next_due()
+        return self._tasks[next_due[0]] if next_due else None
+    
+    def seconds_until_next_deadline(self):
+        return self.deadlines.seconds_until_boundary()
+    
+    def check_deadlines(self, today=None):
+        crossed = self.deadlines.advance(today if today is not None else today_epoch_day())
+        for task_id in crossed:
+            self.events.publish(TaskOverdue(task_id))
+        return crossed
+    
+    def get_rewards(self, since=None, until=None, bucket=None):
+        if since is None and until is None and bucket is None:
+            return self.leaderboard.top_k()
+        return self._read('get_points_window', since, until, bucket)
+    
+    def get_points(self, member_id):
+        return self.leaderboard.points_of(member_id)
     
-    def get_completed_tasks(self):
-        return [task for task in self.tasks if task.completed]
+    def top_k(self, k):
+        return self.leaderboard.top_k(k)
     
-    def get_rewards(self):
-        return self.db.get_rewards()
+    def rank_of(self, member_id):
+        return self.leaderboard.rank_of(member_id)
     
     def close(self):
-        self.db.close()
\ No newline at end of file
+        if self.journal is not None:
+            if self._journal_timer is not None:
+                self._journal_timer.cancel()
+            self.flush_journal()
+            self.journal.close()
+        if self._executor is None:
+            self.db.close()
+        else:
+            self._executor.shutdown()
\ No newline at end of file
@@ -1,10 +1,22 @@
 from datetime import datetime
 
 class FamilyMember:
+    __slots__ = ('member_id', 'name')
+    
     def __init__(self, member_id, name):
         self.member_id = member_id
         self.name = name
     
+    @classmethod
+    def from_row(cls, cursor, row):
+        # Подходит как sqlite3 row_factory для (member_id, name)
+        member = cls.__new__(cls)
+        member.member_id, member.name = row
+        return member
+    
+    def as_dict(self):
+        return {'member_id': self.member_id, 'name': self.name}
+    
     def __str__(self):
         return f"{self.name} (ID: {self.member_id})"
     
@@ -12,6 +24,8 @@ class FamilyMember:
         return f"FamilyMember({self.member_id}, '{self.name}')"
 
 class Task:
+    __slots__ = ('task_id', 'title', 'description', 'points', 'assigned_to', 'deadline', 'completed')
+    
     def __init__(self, task_id, title, description, points):
         self.task_id = task_id
         self.title = title
@@ -21,6 +35,16 @@ class Task:
         self.deadline = None
         self.completed = False
     
+    @classmethod
+    def from_row(cls, cursor, row):
+        # Подходит как sqlite3 row_factory для database.TASK_COLUMNS
+        task = cls.__new__(cls)
+        task.task_id, task.title, task.description, task.points, assigned_to, deadline, completed = row
+        task.assigned_to = assigned_to or None
+        task.deadline = deadline or None
+        task.completed = bool(completed)
+        return task
+    
     def assign(self, member_id, deadline):
         self.assigned_to = member_id
         self.deadline = deadline
@@ -28,6 +52,9 @@ class Task:
     def mark_completed(self):
         self.completed = True
     
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+    
     def __str__(self):
         status = "✓" if self.completed else "✗"
         assigned = f", назначена: {self.assigned_to}" if self.assigned_to else ""
@@ -35,4 +62,44 @@ class Task:
         return f"{self.task_id}: {self.title} ({self.points} баллов){assigned}{deadline} [{status}]"
     
     def __repr__(self):
-        return f"Task({self.task_id}, '{self.title}', '{self.description}', {self.points})"
\ No newline at end of file
+        return f"Task({self.task_id}, '{self.title}', '{self.description}', {self.points})"
+
+class TaskTemplate:
+    # Правило повторения задачи; сами задачи создаются по нему в пределах окна
+    __slots__ = ('template_id', 'title', 'description', 'points', 'assigned_to', 'rule', 'interval',
+                 'weekdays', 'start_day', 'until_day', 'generated_until')
+    
+    def __init__(self, template_id, title, description, points, rule, interval=1, weekdays=None,
+                 start_day=None, until_day=None, assigned_to=None):
+        self.template_id = template_id
+        self.title = title
+        self.description = description
+        self.points = points
+        self.assigned_to = assigned_to
+        self.rule = rule
+        self.interval = interval
+        self.weekdays = weekdays
+        self.start_day = start_day
+        self.until_day = until_day
+        self.generated_until = None
+    
+    @classmethod
+    def from_row(cls, cursor, row):
+        # Подходит как sqlite3 row_factory для database.TEMPLATE_COLUMNS
+        template = cls.__new__(cls)
+        (template.template_id, template.title, template.description, template.points, assigned_to,
+         template.rule, template.interval, weekdays, template.start_day, template.until_day,
+         template.generated_until) = row
+        template.assigned_to = assigned_to or None
+        template.weekdays = [int(day) for day in weekdays.split(',')] if weekdays else None
+        return template
+    
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+    
+    def __str__(self):
+        every = f" каждые {self.interval}" if self.interval > 1 else ""
+        return f"{self.template_id}: {self.title} ({self.points} баллов, {self.rule}{every}, с {self.start_day})"
+    
+    def __repr__(self):
+        return f"TaskTemplate({self.template_id}, '{self.title}', '{self.rule}', {self.interval})"
\ No newline at end of file
@@ -0,0 +1,96 @@
+import calendar
+from datetime import date, timedelta
+
+# Окно вперёд, на которое создаются задачи по шаблонам, и сколько пропущенных
+# (пока приложение было закрыто) повторений догоняется: остальные пропускаются
+WINDOW_DAYS = 7
+CATCH_UP = 1
+
+LOOKBACK_DAYS = 400
+
+RULES = {}
+
+def rule(name):
+    # Правило - генератор дат повторений начиная с since (не раньше start)
+    def register(fn):
+        RULES[name] = fn
+        return fn
+    return register
+
+def parse_day(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def skip_periods(start, since, period):
+    # Номер первого периода, который начинается не раньше since: без перебора всей истории
+    if since <= start:
+        return 0
+    return -(-(since - start).days // period)
+
+@rule('daily')
+def daily(start, since, interval=1, weekdays=None):
+    day = start + timedelta(days=skip_periods(start, since, interval) * interval)
+    while True:
+        yield day
+        day += timedelta(days=interval)
+
+@rule('weekly')
+def weekly(start, since, interval=1, weekdays=None):
+    # weekdays: 0 - понедельник; по умолчанию день недели начала
+    weekdays = sorted(set(weekdays or [start.weekday()]))
+    first_week = start - timedelta(days=start.weekday())
+    week = first_week + timedelta(weeks=max(skip_periods(first_week, since, 7 * interval) - 1, 0) * interval)
+    while True:
+        for weekday in weekdays:
+            day = week + timedelta(days=weekday)
+            if day >= start and day >= since:
+                yield day
+        week += timedelta(weeks=interval)
+
+@rule('monthly')
+def monthly(start, since, interval=1, weekdays=None):
+    # День месяца начала; в коротких месяцах - последний день месяца
+    months = max((since.year - start.year) * 12 + since.month - start.month, 0)
+    index = months // interval * interval
+    while True:
+        year, month = divmod(start.month - 1 + index, 12)
+        year += start.year
+        day = date(year, month + 1, min(start.day, calendar.monthrange(year, month + 1)[1]))
+        if day >= since:
+            yield day
+        index += interval
+
+@rule('custom')
+def custom(start, since, interval=1, weekdays=None):
+    # Каждые interval дней, только по выбранным дням недели
+    for day in daily(start, since, interval):
+        if not weekdays or day.weekday() in weekdays:
+            yield day
+
+def occurrences(template, since, end):
+    generator = RULES.get(template.rule)
+    if generator is None:
+        raise ValueError(f'Неизвестное правило повторения: {template.rule}')
+    start = parse_day(template.start_day)
+    until = parse_day(template.until_day)
+    end = min(end, until) if until else end
+    for day in generator(start, max(since, start), template.interval, template.weekdays):
+        if day > end:
+            return
+        yield day
+
+def due_days(template, today, window_days=WINDOW_DAYS, catch_up=CATCH_UP):
+    # Даты, которые ещё не создавались: пропущенные до today (не больше catch_up) и окно вперёд
+    generated = parse_day(template.generated_until)
+    since = generated + timedelta(days=1) if generated else parse_day(template.start_day)
+    # Старше этой границы повторения всё равно не догоняются: работа не зависит от возраста правила
+    since = max(since, today - timedelta(days=LOOKBACK_DAYS * template.interval))
+    end = today + timedelta(days=window_days)
+    missed = []
+    upcoming = []
+    for day in occurrences(template, since, end):
+        (missed if day < today else upcoming).append(day)
+    return (missed[-catch_up:] if catch_up else []) + upcoming, end
\ No newline at end of file
@@ -0,0 +1,119 @@
+import heapq
+from datetime import date, datetime, time, timedelta
+
+EPOCH = date(1970, 1, 1)
+
+def to_epoch_day(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return (value - EPOCH).days
+
+def from_epoch_day(day):
+    return EPOCH + timedelta(days=day)
+
+def today_epoch_day():
+    return to_epoch_day(date.today())
+
+class DeadlineScheduler:
+    def __init__(self):
+        # Куча (день дедлайна, task_id) только для еще не просроченных задач;
+        # устаревшие записи отбрасываются лениво
+        self._heap = []
+        self._deadlines = {}
+        self._overdue = set()
+    
+    def __len__(self):
+        return len(self._deadlines)
+    
+    def track(self, task_id, deadline, today=None):
+        day = to_epoch_day(deadline)
+        self.untrack(task_id)
+        if day is None:
+            return
+        self._deadlines[task_id] = day
+        if day < (today if today is not None else today_epoch_day()):
+            self._overdue.add(task_id)
+        else:
+            heapq.heappush(self._heap, (day, task_id))
+    
+    def untrack(self, task_id):
+        if self._deadlines.pop(task_id, None) is not None:
+            self._overdue.discard(task_id)
+    
+    def clear(self):
+        self._heap = []
+        self._deadlines = {}
+        self._overdue = set()
+    
+    def _is_pending(self, day, task_id):
+        return self._deadlines.get(task_id) == day and task_id not in self._overdue
+    
+    def _prune(self):
+        heap = self._heap
+        while heap and not self._is_pending(*heap[0]):
+            heapq.heappop(heap)
+    
+    def deadline_of(self, task_id):
+        return self._deadlines.get(task_id)
+    
+    def is_overdue(self, task_id):
+        return task_id in self._overdue
+    
+    def overdue(self):
+        return set(self._overdue)
+    
+    def next_due(self):
+        self._prune()
+        if not self._heap:
+            return None
+        day, task_id = self._heap[0]
+        return task_id, day
+    
+    def due_within(self, delta, today=None):
+        # Обход кучи от вершины: O(k log k) для k найденных задач
+        if isinstance(delta, timedelta):
+            delta = delta.days
+        limit = (today if today is not None else today_epoch_day()) + delta
+        heap = self._heap
+        result = []
+        candidates = [(heap[0], 0)] if heap else []
+        while candidates:
+            (day, task_id), position = heapq.heappop(candidates)
+            if day > limit:
+                break
+            if self._is_pending(day, task_id):
+                result.append((task_id, day))
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child], child))
+        return result
+    
+    def next_boundary(self):
+        # Задача становится просроченной в начале дня, следующего за дедлайном
+        next_due = self.next_due()
+        return next_due[1] + 1 if next_due else None
+    
+    def seconds_until_boundary(self, now=None):
+        boundary = self.next_boundary()
+        if boundary is None:
+            return None
+        now = now or datetime.now()
+        moment = datetime.combine(from_epoch_day(boundary), time())
+        return max((moment - now).total_seconds(), 0.0)
+    
+    def advance(self, today=None):
+        today = today if today is not None else today_epoch_day()
+        crossed = []
+        heap = self._heap
+        while heap and heap[0][0] < today:
+            day, task_id = heapq.heappop(heap)
+            if self._is_pending(day, task_id):
+                self._overdue.add(task_id)
+                crossed.append(task_id)
+        return crossed
\ No newline at end of file
@@ -0,0 +1,466 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import time
+import zlib
+from database import Database
+
+PORT = 47110
+
+CHUNK_SIZE = 500
+
+# Отзыв лишнего начисления: gid производный от отозванной записи, поэтому обе копии,
+# обнаружив двойное выполнение, создают одну и ту же запись
+REVOKED = '~revoke'
+
+# Каждое изменение - [gid, метка часов, устройство, удалено, данные...]; у удалённых данных нет.
+# +s.kind: выборка идёт по индексу seq, время зависит от объёма изменений, а не базы
+CHANGE_QUERIES = {
+    'members': '''
+    SELECT s.gid, s.hlc, s.origin, s.deleted, m.name
+    FROM sync_rows s LEFT JOIN members m ON m.member_id = s.local_id
+    WHERE +s.kind = 'member' AND s.seq > ? AND s.seq <= ? AND s.origin != ? AND s.via != ?
+      AND (s.deleted OR m.member_id IS NOT NULL)
+    ORDER BY s.seq
+    ''',
+    'tasks': '''
+    SELECT s.gid, s.hlc, s.origin, s.deleted, t.title, t.description, t.points, a.gid,
+           t.deadline, t.completed, t.completed_at, p.gid, t.occurrence_day
+    FROM sync_rows s
+    LEFT JOIN tasks t ON t.task_id = s.local_id
+    LEFT JOIN sync_rows a ON a.kind = 'member' AND a.local_id = t.assigned_to
+    LEFT JOIN sync_rows p ON p.kind = 'template' AND p.local_id = t.template_id
+    WHERE +s.kind = 'task' AND s.seq > ? AND s.seq <= ? AND s.origin != ? AND s.via != ?
+      AND (s.deleted OR t.task_id IS NOT NULL)
+    ORDER BY s.seq
+    ''',
+    'points': '''
+    SELECT s.gid, s.hlc, s.origin, s.deleted, m.gid, t.gid, l.points, l.created_at
+    FROM sync_rows s
+    JOIN points_ledger l ON l.entry_id = s.local_id
+    JOIN sync_rows m ON m.kind = 'member' AND m.local_id = l.member_id
+    LEFT JOIN sync_rows t ON t.kind = 'task' AND t.local_id = l.task_id
+    WHERE +s.kind = 'points' AND s.seq > ? AND s.seq <= ? AND s.origin != ? AND s.via != ?
+    ORDER BY s.seq
+    ''',
+}
+
+def encode(message):
+    return zlib.compress(json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def decode(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+def send_message(sock, message):
+    data = encode(message)
+    sock.sendall(struct.pack('>I', len(data)) + data)
+    return len(data) + 4
+
+def receive_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Соединение закрыто до конца сообщения')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def receive_message(sock):
+    size = struct.unpack('>I', receive_exact(sock, 4))[0]
+    return decode(receive_exact(sock, size)), size + 4
+
+def received_seq(db, device):
+    cursor = db.conn.cursor()
+    cursor.execute('SELECT received_seq FROM sync_peers WHERE device = ?', (device,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def changes_since(db, since=0, exclude=''):
+    # Последнее состояние каждой записи, изменённой после since; изменения, сделанные
+    # получателем или пришедшие от него, ему не возвращаются
+    cursor = db.conn.cursor()
+    cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_rows')
+    until = cursor.fetchone()[0]
+    changes = {'device': db.clock.device, 'seq': until}
+    for name, query in CHANGE_QUERIES.items():
+        cursor.execute(query, (since, until, exclude, exclude))
+        changes[name] = [list(row[:4]) if row[3] else list(row) for row in cursor.fetchall()]
+    return changes
+
+def change_count(changes):
+    return sum(len(changes[name]) for name in CHANGE_QUERIES)
+
+def lookup(cursor, gids):
+    # gid -> [local_id, метка, удалено]
+    known = {}
+    gids = list(gids)
+    for start in range(0, len(gids), CHUNK_SIZE):
+        chunk = gids[start:start + CHUNK_SIZE]
+        cursor.execute(f'''
+        SELECT gid, local_id, hlc, deleted FROM sync_rows WHERE gid IN ({','.join('?' * len(chunk))})
+        ''', chunk)
+        for gid, local_id, stamp, deleted in cursor.fetchall():
+            known[gid] = [local_id, stamp, deleted]
+    return known
+
+def referenced_gids(changes):
+    gids = set()
+    for name in CHANGE_QUERIES:
+        for change in changes[name]:
+            gids.add(change[0])
+    for change in changes['tasks']:
+        if not change[3]:
+            gids.update(gid for gid in change[7:8] + change[11:12] if gid)
+    for change in changes['points']:
+        gids.update(gid for gid in change[4:6] if gid)
+    return gids
+
+def register(cursor, kind, local_id, gid, stamp, origin, via):
+    # Запись о версии создаётся до вставки строки, чтобы триггер сохранил чужой gid
+    cursor.execute('''
+    INSERT INTO sync_rows (kind, local_id, gid, hlc, origin, via, seq, deleted)
+    VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_rows), 0)
+    ''', (kind, local_id, gid, stamp, origin, via))
+
+def is_newer(local, stamp, stats):
+    # Последний писатель выигрывает: метки сравниваются вместе с устройством, ничьих нет
+    if local is not None and local[1] >= stamp:
+        stats['skipped'] += 1
+        return False
+    return True
+
+def apply_member(db, cursor, known, change, via, stats):
+    gid, stamp, origin, deleted = change[:4]
+    local = known.get(gid)
+    if (local is None and deleted) or not is_newer(local, stamp, stats):
+        return
+    with db.clock.remote(stamp, origin, via):
+        if local is None:
+            member_id = db.next_id('members')
+            register(cursor, 'member', member_id, gid, stamp, origin, via)
+            cursor.execute('INSERT INTO members (member_id, name) VALUES (?, ?)', (member_id, change[4]))
+            cursor.execute('INSERT INTO rewards (member_id, points) VALUES (?, 0)', (member_id,))
+            local = known[gid] = [member_id, stamp, 0]
+        elif deleted:
+            db.remove_member(local[0])
+        elif local[2]:
+            # Удаление здесь старше переименования там: участник возвращается с очками из журнала
+            cursor.execute('INSERT INTO members (member_id, name) VALUES (?, ?)', (local[0], change[4]))
+            cursor.execute('''
+            INSERT INTO rewards (member_id, points)
+            SELECT ?, COALESCE(SUM(points), 0) FROM points_ledger WHERE member_id = ?
+            ''', (local[0], local[0]))
+        else:
+            cursor.execute('UPDATE members SET name = ? WHERE member_id = ?', (change[4], local[0]))
+    local[1:] = [stamp, deleted]
+    stats['applied'] += 1
+
+def find_occurrence(cursor, template_id, day):
+    cursor.execute('''
+    SELECT s.local_id, s.gid, s.hlc
+    FROM tasks t JOIN sync_rows s ON s.kind = 'task' AND s.local_id = t.task_id
+    WHERE t.template_id = ? AND t.occurrence_day = ?
+    ''', (template_id, day))
+    return cursor.fetchone()
+
+def adopt_occurrence(cursor, known, gid, occurrence):
+    # Одно и то же повторение, созданное по шаблону на двух устройствах, - одна запись.
+    # Обе стороны оставляют меньший из двух gid, дальше изменения и удаление идут по нему
+    local_id, local_gid, stamp = occurrence
+    if gid < local_gid:
+        cursor.execute("UPDATE sync_rows SET gid = ? WHERE kind = 'task' AND local_id = ?", (gid, local_id))
+        known.pop(local_gid, None)
+    local = known[gid] = [local_id, stamp, 0]
+    return local
+
+def apply_task(db, cursor, known, change, via, stats):
+    gid, stamp, origin, deleted = change[:4]
+    local = known.get(gid)
+    if local is None and deleted:
+        return
+    template_id = occurrence_day = None
+    if not deleted:
+        title, description, points, assigned_gid, deadline, completed, completed_at = change[4:11]
+        # Устройства предыдущей версии не передают шаблон и день повторения
+        template_gid, occurrence_day = change[11:13] if len(change) > 11 else (None, None)
+        template = known.get(template_gid) if template_gid else None
+        template_id = template[0] if template is not None else None
+        occurrence = find_occurrence(cursor, template_id, occurrence_day) if template_id else None
+        if local is None and occurrence is not None:
+            local = adopt_occurrence(cursor, known, gid, occurrence)
+        elif occurrence is not None:
+            # Повторение за этот день уже есть под другим gid: строка возвращается без шаблона
+            template_id = occurrence_day = None
+    if not is_newer(local, stamp, stats):
+        return
+    with db.clock.remote(stamp, origin, via):
+        if deleted:
+            cursor.execute('DELETE FROM tasks WHERE task_id = ?', (local[0],))
+        else:
+            member = known.get(assigned_gid) if assigned_gid else None
+            assigned_to = member[0] if member is not None and not member[2] else None
+            # Срок передаётся как есть, даже если исполнитель здесь ещё неизвестен
+            values = (title, description, points, assigned_to, deadline, completed, completed_at)
+            if local is None or local[2]:
+                if local is None:
+                    local = known[gid] = [db.next_id('tasks'), stamp, 0]
+                    register(cursor, 'task', local[0], gid, stamp, origin, via)
+                cursor.execute('''
+                INSERT INTO tasks (title, description, points, assigned_to, deadline, completed,
+                                   completed_at, template_id, occurrence_day, task_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values + (template_id, occurrence_day, local[0]))
+            else:
+                cursor.execute('''
+                UPDATE tasks
+                SET title = ?, description = ?, points = ?, assigned_to = ?, deadline = ?, completed = ?,
+                    completed_at = ?
+                WHERE task_id = ?
+                ''', values + (local[0],))
+    local[1:] = [stamp, deleted]
+    stats['applied'] += 1
+    return local[0] if not deleted and change[9] else None
+
+def insert_entry(db, cursor, gid, stamp, origin, via, member_id, task_id, points, created_at):
+    entry_id = db.next_id('points_ledger')
+    with db.clock.remote(stamp, origin, via):
+        register(cursor, 'points', entry_id, gid, stamp, origin, via)
+        cursor.execute('''
+        INSERT INTO points_ledger (entry_id, member_id, task_id, points, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (entry_id, member_id, task_id, points, created_at))
+        cursor.execute('UPDATE rewards SET points = points + ? WHERE member_id = ?', (points, member_id))
+    return entry_id
+
+def apply_points(db, cursor, known, change, via, stats):
+    # Журнал очков только дописывается: запись с известным gid уже есть
+    gid, stamp, origin, deleted, member_gid, task_gid, points, created_at = change
+    member = known.get(member_gid)
+    if gid in known or member is None:
+        stats['skipped'] += 1
+        return None
+    task = known.get(task_gid) if task_gid else None
+    task_id = task[0] if task is not None else None
+    entry_id = insert_entry(db, cursor, gid, stamp, origin, via, member[0], task_id, points, created_at)
+    known[gid] = [entry_id, stamp, 0]
+    stats['applied'] += 1
+    return task_id
+
+def task_entries(cursor, task_id):
+    # Записи журнала очков задачи и множество gid отозванных наград
+    cursor.execute('''
+    SELECT s.gid, s.hlc, s.origin, l.member_id, l.points, l.created_at
+    FROM points_ledger l CROSS JOIN sync_rows s ON s.kind = 'points' AND s.local_id = l.entry_id
+    WHERE l.task_id = ?
+    ''', (task_id,))
+    entries = cursor.fetchall()
+    return entries, {entry[0][:-len(REVOKED)] for entry in entries if entry[0].endswith(REVOKED)}
+
+def revoke_duplicates(db, cursor, task_id, via):
+    # Задача, выполненная на двух устройствах до синхронизации, даёт две награды.
+    # Остаётся самая ранняя по метке, лишние отзываются; отмены выполнения (отрицательные
+    # записи) учитываются, поэтому повторное выполнение после отмены не считается двойным
+    entries, revoked = task_entries(cursor, task_id)
+    awards = [entry for entry in entries if entry[4] > 0]
+    excess = len(awards) - sum(1 for entry in entries if entry[4] < 0) - 1
+    if excess <= 0:
+        return 0
+    awards = sorted((entry for entry in awards if entry[0] not in revoked),
+                    key=lambda entry: (entry[1], entry[0]), reverse=True)[:excess]
+    for gid, stamp, origin, member_id, points, created_at in awards:
+        insert_entry(db, cursor, gid + REVOKED, stamp, origin, via, member_id, task_id, -points, created_at)
+    return len(awards)
+
+def settle_assignee(db, cursor, task_id, via):
+    # Строка задачи выбирается по последнему писателю, а награда - по журналу очков: после двойного
+    # выполнения исполнителем становится владелец последней неотозванной награды. Выбор зависит
+    # только от журнала, строка сохраняет метку своей версии, поэтому все копии исправляют её
+    # одинаково и новых изменений не возникает
+    entries, revoked = task_entries(cursor, task_id)
+    awards = [entry for entry in entries if entry[4] > 0 and entry[0] not in revoked]
+    if not revoked or not awards:
+        return
+    member_id = max(awards, key=lambda entry: (entry[1], entry[0]))[3]
+    cursor.execute('''
+    SELECT t.assigned_to, s.hlc, s.origin
+    FROM tasks t JOIN sync_rows s ON s.kind = 'task' AND s.local_id = t.task_id
+    WHERE t.task_id = ? AND t.completed = 1 AND EXISTS (SELECT 1 FROM members WHERE member_id = ?)
+    ''', (task_id, member_id))
+    row = cursor.fetchone()
+    if row is None or row[0] == member_id:
+        return
+    with db.clock.remote(row[1], row[2], via):
+        cursor.execute('UPDATE tasks SET assigned_to = ? WHERE task_id = ?', (member_id, task_id))
+
+def apply_changes(db, changes):
+    if changes['device'] == db.clock.device:
+        raise ValueError('У копий базы одинаковый идентификатор устройства')
+    via = changes['device']
+    stats = {'applied': 0, 'skipped': 0, 'revoked': 0}
+    cursor = db.conn.cursor()
+    with db.transaction():
+        known = lookup(cursor, referenced_gids(changes))
+        # Участники раньше задач и очков: на них ссылаются остальные записи
+        for change in changes['members']:
+            apply_member(db, cursor, known, change, via, stats)
+        touched = set()
+        for change in changes['tasks']:
+            task_id = apply_task(db, cursor, known, change, via, stats)
+            if task_id is not None:
+                touched.add(task_id)
+        awarded = set()
+        for change in changes['points']:
+            task_id = apply_points(db, cursor, known, change, via, stats)
+            if task_id is not None:
+                touched.add(task_id)
+                if change[6] > 0:
+                    awarded.add(task_id)
+        for task_id in sorted(awarded):
+            stats['revoked'] += revoke_duplicates(db, cursor, task_id, via)
+        # Исполнитель сверяется и когда пришла только строка задачи: она могла перекрыть исправленную
+        for task_id in sorted(touched):
+            settle_assignee(db, cursor, task_id, via)
+        cursor.execute('''
+        INSERT INTO sync_peers (device, received_seq) VALUES (?, ?)
+        ON CONFLICT (device) DO UPDATE SET received_seq = MAX(received_seq, excluded.received_seq)
+        ''', (via, changes['seq']))
+    return stats
+
+def handle(db, message):
+    # Сторона, к которой подключаются: представиться, отдать изменения, принять изменения
+    command = message.get('command')
+    if command == 'hello':
+        return {'device': db.clock.device, 'since': received_seq(db, message['device'])}
+    if command == 'pull':
+        return changes_since(db, message['since'], message['exclude'])
+    if command == 'push':
+        return apply_changes(db, message['changes'])
+    raise ValueError(f'Неизвестная команда синхронизации: {command}')
+
+class FilePeer:
+    # Вторая копия базы, доступная как файл (флешка, общая папка); сообщения кодируются
+    # так же, как по сети, чтобы объём передачи был сопоставим
+    def __init__(self, path):
+        self.db = Database(path)
+        self.sent = self.received = 0
+    
+    def request(self, message):
+        data = encode(message)
+        self.sent += len(data)
+        reply = encode(handle(self.db, decode(data)))
+        self.received += len(reply)
+        return decode(reply)
+    
+    def close(self):
+        self.db.close()
+
+class SocketPeer:
+    def __init__(self, address, timeout=60):
+        self.sock = socket.create_connection(address, timeout)
+        self.sent = self.received = 0
+    
+    def request(self, message):
+        self.sent += send_message(self.sock, message)
+        reply, size = receive_message(self.sock)
+        self.received += size
+        if isinstance(reply, dict) and 'error' in reply:
+            raise ConnectionError(f"Ошибка синхронизации на другом устройстве: {reply['error']}")
+        return reply
+    
+    def close(self):
+        self.sock.close()
+
+def exchange(db, peer):
+    # Сначала забираем чужие изменения, затем отдаём свои, включая только что полученные
+    # от третьих устройств; обе стороны помнят, до какого номера журнала дошли
+    started = time.perf_counter()
+    reply = peer.request({'command': 'hello', 'device': db.clock.device})
+    device = reply['device']
+    if device == db.clock.device:
+        # Файл был скопирован: копия, начавшая обмен, становится новым устройством
+        db.new_device_id()
+        reply = peer.request({'command': 'hello', 'device': db.clock.device})
+    changes = peer.request({'command': 'pull', 'since': received_seq(db, device), 'exclude': db.clock.device})
+    stats = {'peer': device, 'received': change_count(changes)}
+    stats.update(apply_changes(db, changes))
+    changes = changes_since(db, reply['since'], device)
+    stats['sent'] = change_count(changes)
+    remote = peer.request({'command': 'push', 'changes': changes})
+    stats.update({f'peer_{key}': value for key, value in remote.items()})
+    stats.update({'bytes_sent': peer.sent, 'bytes_received': peer.received,
+                  'seconds': time.perf_counter() - started})
+    return stats
+
+def sync_with(db, peer):
+    # peer: путь к базе другого устройства или адрес (host, port) запущенного sync.py --serve
+    peer = SocketPeer(tuple(peer)) if isinstance(peer, (tuple, list)) else FilePeer(peer)
+    try:
+        return exchange(db, peer)
+    finally:
+        peer.close()
+
+class SyncHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        db = Database(self.server.db_name)
+        try:
+            while True:
+                try:
+                    message, size = receive_message(self.request)
+                except ConnectionError:
+                    return
+                try:
+                    reply = handle(db, message)
+                except (ValueError, KeyError) as error:
+                    reply = {'error': str(error)}
+                send_message(self.request, reply)
+        finally:
+            db.close()
+
+class SyncServer(socketserver.TCPServer):
+    # Соединения обслуживаются по очереди: в базу пишет одно соединение
+    allow_reuse_address = True
+    
+    def __init__(self, db_name, host='127.0.0.1', port=PORT):
+        self.db_name = db_name
+        super().__init__((host, port), SyncHandler)
+
+def parse_peer(value):
+    # host:port или путь к файлу; C:\... считается путём
+    host, separator, port = value.rpartition(':')
+    if separator and port.isdigit() and not os.path.exists(value):
+        return host or '127.0.0.1', int(port)
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description='Синхронизация копий базы на разных компьютерах')
+    parser.add_argument('peer', nargs='?', help='файл базы другого устройства или host:port')
+    parser.add_argument('--db', default='family_task_manager.db')
+    parser.add_argument('--serve', action='store_true', help='принимать синхронизацию по сети')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    if args.serve:
+        with SyncServer(args.db, args.host, args.port) as server:
+            print(f'Ожидание синхронизации на {args.host}:{args.port}', file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return
+    if not args.peer:
+        parser.error('нужен файл базы или адрес другого устройства')
+    db = Database(args.db)
+    try:
+        stats = sync_with(db, parse_peer(args.peer))
+    finally:
+        db.close()
+    print(', '.join(f'{key}: {value:.3f}' if isinstance(value, float) else f'{key}: {value}'
+                    for key, value in stats.items()), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
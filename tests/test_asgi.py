@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from asgi import TaskService
+
+
+class MalformedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = TaskService(db_name=os.path.join(self.directory.name, 'tasks.db'), readers=1)
+        self.loop = asyncio.new_event_loop()
+        self.call('POST', '/api/members', '{"name": "Аня"}')
+        self.call('POST', '/api/tasks', '{"title": "Посуда", "points": 5}')
+    
+    def tearDown(self):
+        self.app.stop()
+        self.loop.close()
+        self.directory.cleanup()
+    
+    def call(self, method, path, body='', query=b''):
+        messages = [{'type': 'http.request', 'body': body.encode(), 'more_body': False}]
+        sent = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query}
+        self.loop.run_until_complete(self.app(scope, receive, send))
+        return sent[0]['status'], json.loads(sent[1]['body'])
+    
+    def assertBadRequest(self, method, path, body='', query=b''):
+        status, data = self.call(method, path, body, query)
+        self.assertEqual(status, 400)
+        self.assertTrue(data['error'])
+    
+    def test_body_must_be_object(self):
+        for body in ('[1, 2]', '"Посуда"', '5', 'null', '{'):
+            self.assertBadRequest('POST', '/api/tasks', body)
+            self.assertBadRequest('POST', '/api/members', body)
+            self.assertBadRequest('POST', '/api/tasks/1/assign', body)
+    
+    def test_add_task_fields(self):
+        self.assertBadRequest('POST', '/api/tasks', '{"title": "Окна", "points": "много"}')
+        self.assertBadRequest('POST', '/api/tasks', '{"title": "Окна", "points": [1]}')
+        self.assertBadRequest('POST', '/api/tasks', '{"title": "Окна", "points": null}')
+        self.assertBadRequest('POST', '/api/tasks', '{"title": ["Окна"]}')
+        self.assertBadRequest('POST', '/api/tasks', '{"title": "Окна", "description": 5}')
+        self.assertBadRequest('POST', '/api/members', '{"name": {"first": "Аня"}}')
+        status, data = self.call('POST', '/api/tasks', '{"title": "Окна", "points": "3"}')
+        self.assertEqual((status, data['points']), (201, 3))
+    
+    def test_assign_fields(self):
+        self.assertBadRequest('POST', '/api/tasks/1/assign', '{"member_id": [1]}')
+        self.assertBadRequest('POST', '/api/tasks/1/assign', '{"member_id": 1, "deadline": "завтра"}')
+        self.assertBadRequest('POST', '/api/tasks/1/assign', '{"member_id": 1, "deadline": 20261020}')
+        status, data = self.call('POST', '/api/tasks/1/assign', '{"member_id": 99}')
+        self.assertEqual(status, 404)
+        self.assertIsNone(self.app.manager.get_task(1).assigned_to)
+        status, data = self.call('POST', '/api/tasks/1/assign', '{"member_id": 1, "deadline": "2026-10-20"}')
+        self.assertEqual((status, data['deadline']), (200, '2026-10-20'))
+    
+    def test_rewards_window(self):
+        self.assertBadRequest('GET', '/api/rewards', query=b'bucket=month')
+        self.assertBadRequest('GET', '/api/rewards', query=b'since=2026-13-01')
+        self.assertBadRequest('GET', '/api/rewards', query=b'until=yesterday&bucket=day')
+        status, data = self.call('GET', '/api/rewards', query=b'since=2026-01-01&bucket=week')
+        self.assertEqual((status, data), (200, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
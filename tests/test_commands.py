@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from manager import FamilyTaskManager
+
+
+class UndoRedoTest(unittest.TestCase):
+    options = {}
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.directory.name, 'tasks.db')
+        self.manager = FamilyTaskManager(db_name=self.db_name, **self.options)
+        self.anya = self.manager.add_member('Аня')
+        self.borya = self.manager.add_member('Боря')
+        self.tasks = self.manager.add_tasks([('Посуда', '', 5), ('Окна', '', 3), ('Пылесос', '', 2)])
+        self.manager.assign_tasks([(task.task_id, self.anya.member_id, '2026-10-20') for task in self.tasks[:2]])
+        self.manager.complete_task(self.tasks[0].task_id)
+        self.initial = self.state(self.manager)
+    
+    def tearDown(self):
+        self.manager.close()
+        self.directory.cleanup()
+    
+    def state(self, manager):
+        tasks = manager.tasks + (manager.get_completed_tasks() if manager.lazy else [])
+        return (sorted((member.member_id, member.name) for member in manager.members),
+                sorted((task.task_id, task.title, task.assigned_to, task.deadline, task.completed)
+                       for task in tasks),
+                sorted(manager.get_rewards()))
+    
+    def assertStored(self):
+        # Память совпадает с тем, что записано в базу
+        self.manager.barrier().result()
+        stored = FamilyTaskManager(db_name=self.db_name)
+        try:
+            self.assertEqual(self.state(stored), self.state(self.manager))
+        finally:
+            stored.close()
+    
+    def test_undo_redo_remove_member(self):
+        self.manager.remove_member(self.anya.member_id)
+        removed = self.state(self.manager)
+        self.assertEqual(self.manager.undo().label, 'Удаление участника')
+        self.assertEqual(self.state(self.manager), self.initial)
+        self.assertStored()
+        self.manager.redo()
+        self.assertEqual(self.state(self.manager), removed)
+        self.assertStored()
+    
+    def test_undo_completion_takes_points_back(self):
+        self.manager.complete_task(self.tasks[1].task_id)
+        self.assertEqual(self.manager.get_points(self.anya.member_id), 8)
+        self.manager.undo()
+        self.assertEqual(self.state(self.manager), self.initial)
+        self.assertStored()
+        self.assertEqual([entry[3] for entry in self.manager.iter_points()], [5, 3, -3])
+    
+    def test_transaction_is_one_step(self):
+        with self.manager.transaction():
+            self.manager.assign_task(self.tasks[2].task_id, self.borya.member_id, None)
+            self.manager.complete_task(self.tasks[2].task_id)
+            self.manager.add_member('Вера')
+        changed = self.state(self.manager)
+        self.manager.undo()
+        self.assertEqual(self.state(self.manager), self.initial)
+        self.assertStored()
+        self.manager.redo()
+        self.assertEqual(self.state(self.manager), changed)
+        self.assertStored()
+    
+    def test_new_change_clears_redo(self):
+        self.manager.remove_task(self.tasks[2].task_id)
+        self.manager.undo()
+        self.assertTrue(self.manager.history.can_redo())
+        self.manager.add_task('Цветы', '', 1)
+        self.assertFalse(self.manager.history.can_redo())
+        self.assertIsNone(self.manager.redo())
+    
+    def test_reload_clears_history(self):
+        self.assertTrue(self.manager.history.can_undo())
+        self.manager.load_data()
+        self.assertFalse(self.manager.history.can_undo())
+        self.assertIsNone(self.manager.undo())
+        self.assertEqual(self.state(self.manager), self.initial)
+        self.assertStored()
+
+
+class ThreadedUndoRedoTest(UndoRedoTest):
+    options = {'threaded': True}
+
+
+class WriteBehindUndoRedoTest(UndoRedoTest):
+    options = {'write_behind': True}
+
+
+class LazyUndoRedoTest(UndoRedoTest):
+    options = {'lazy': True}
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from households import HouseholdRegistry
+
+
+class ReopenDuringEvictionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.registry = HouseholdRegistry(os.path.join(self.directory.name, 'households'), max_open=1)
+    
+    def tearDown(self):
+        self.registry.close_all()
+        self.directory.cleanup()
+    
+    def test_reopen_waits_for_close(self):
+        manager = self.registry.get('smith')
+        manager.add_member('Аня')
+        manager.add_task('Посуда', '', 5)
+        closing, release = threading.Event(), threading.Event()
+        close = manager.close
+        
+        def slow_close():
+            # Закрытие застревает, пока тест не отпустит его
+            closing.set()
+            release.wait(5)
+            close()
+        
+        manager.close = slow_close
+        evictor = threading.Thread(target=self.registry.get, args=('jones',))
+        evictor.start()
+        self.assertTrue(closing.wait(5))
+        reopened = []
+        reader = threading.Thread(target=lambda: reopened.append(self.registry.get('smith')))
+        reader.start()
+        reader.join(0.3)
+        self.assertTrue(reader.is_alive())
+        self.assertEqual(reopened, [])
+        release.set()
+        evictor.join(5)
+        reader.join(5)
+        self.assertIsNot(reopened[0], manager)
+        self.assertEqual([member.name for member in reopened[0].members], ['Аня'])
+        self.assertEqual([task.title for task in reopened[0].tasks], ['Посуда'])
+        reopened[0].add_task('Окна', '', 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
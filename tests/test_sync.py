@@ -0,0 +1,180 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+
+from manager import FamilyTaskManager
+
+# Схема до появления журнала синхронизации: копии такого файла получают нулевые метки
+OLD_SCHEMA = '''
+CREATE TABLE members (member_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL);
+CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT,
+                    points INTEGER NOT NULL, assigned_to INTEGER, deadline TEXT, completed INTEGER DEFAULT 0);
+CREATE TABLE rewards (member_id INTEGER PRIMARY KEY, points INTEGER DEFAULT 0);
+INSERT INTO members (member_id, name) VALUES (1, 'Аня');
+INSERT INTO rewards (member_id, points) VALUES (1, 0);
+INSERT INTO tasks (task_id, title, description, points) VALUES (1, 'Посуда', '', 5);
+'''
+
+
+class SyncConvergenceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.managers = []
+    
+    def tearDown(self):
+        for manager in self.managers:
+            manager.close()
+        self.directory.cleanup()
+    
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+    
+    def open(self, name):
+        manager = FamilyTaskManager(db_name=self.path(name))
+        self.managers.append(manager)
+        return manager
+    
+    def copies(self, source, *names):
+        for name in names:
+            shutil.copy(self.path(source), self.path(name))
+        return [self.open(name) for name in names]
+    
+    def state(self, manager):
+        return (sorted((task.title, task.completed, manager.get_member(task.assigned_to).name
+                        if task.assigned_to else None) for task in manager.tasks),
+                sorted((member.name, manager.leaderboard.points_of(member.member_id))
+                       for member in manager.members))
+    
+    def test_double_completion_keeps_award_owner_as_assignee(self):
+        base = FamilyTaskManager(db_name=self.path('base.db'))
+        anna = base.add_member('Аня')
+        boris = base.add_member('Боря')
+        task = base.add_task('Посуда', '', 5)
+        base.close()
+        a, b, c = self.copies('base.db', 'a.db', 'b.db', 'c.db')
+        a.assign_task(task.task_id, anna.member_id, None)
+        a.complete_task(task.task_id)
+        b.assign_task(task.task_id, boris.member_id, None)
+        b.complete_task(task.task_id)
+        # c видит только выполнение на b, затем a и b обмениваются, затем c узнаёт итог через a
+        c.sync(self.path('b.db'))
+        a.sync(self.path('b.db'))
+        c.sync(self.path('a.db'))
+        b.load_data()
+        for manager in (a, b, c):
+            assigned_to = manager.get_task(task.task_id).assigned_to
+            self.assertEqual(manager.leaderboard.points_of(assigned_to), 5)
+            self.assertEqual(sum(manager.leaderboard.points_of(member_id)
+                                 for member_id in (anna.member_id, boris.member_id)), 5)
+        self.assertEqual(self.state(a), self.state(b))
+        self.assertEqual(self.state(a), self.state(c))
+        # Исправление не порождает новых версий: повторный обмен ничего не применяет
+        stats = a.sync(self.path('b.db'))
+        self.assertEqual((stats['applied'], stats['peer_applied']), (0, 0))
+    
+    def test_rows_diverged_before_upgrade_converge(self):
+        conn = sqlite3.connect(self.path('old.db'))
+        conn.executescript(OLD_SCHEMA)
+        conn.close()
+        for name, title, member in (('a.db', 'Посуда', 'Аня'), ('b.db', 'Окна', 'Анна')):
+            shutil.copy(self.path('old.db'), self.path(name))
+            conn = sqlite3.connect(self.path(name))
+            conn.execute('UPDATE tasks SET title = ?', (title,))
+            conn.execute('UPDATE members SET name = ?', (member,))
+            conn.commit()
+            conn.close()
+        a, b = self.open('a.db'), self.open('b.db')
+        self.assertNotEqual(self.state(a), self.state(b))
+        a.sync(self.path('b.db'))
+        b.load_data()
+        self.assertEqual(self.state(a), self.state(b))
+        # Побеждает версия устройства с большим идентификатором
+        expected = 'Окна' if b.db.clock.device > a.db.clock.device else 'Посуда'
+        self.assertEqual(a.get_task(1).title, expected)
+        stats = b.sync(self.path('a.db'))
+        self.assertEqual((stats['applied'], stats['peer_applied']), (0, 0))
+        a.load_data()
+        self.assertEqual(self.state(a), self.state(b))
+
+    
+    def test_moved_file_and_file_peer_keep_device(self):
+        a, b = self.open('a.db'), self.open('b.db')
+        a.add_task('Посуда', '', 5)
+        devices = (a.db.clock.device, b.db.clock.device)
+        b.close()
+        self.managers.remove(b)
+        os.replace(self.path('b.db'), self.path('moved.db'))
+        a.sync(self.path('moved.db'))
+        b = self.open('moved.db')
+        self.assertEqual((a.db.clock.device, b.db.clock.device), devices)
+        # Повторный обмен не пересылает весь журнал заново
+        stats = a.sync(self.path('moved.db'))
+        self.assertEqual((stats['received'], stats['sent']), (0, 0))
+    
+    def test_copies_split_on_first_exchange(self):
+        base = FamilyTaskManager(db_name=self.path('base.db'))
+        anna = base.add_member('Аня')
+        base.add_task('Посуда', '', 5)
+        base.close()
+        a, b = self.copies('base.db', 'a.db', 'b.db')
+        self.assertEqual(a.db.clock.device, b.db.clock.device)
+        # Обе копии выдают новой задаче один и тот же task_id
+        for manager, title in ((a, 'Окна'), (b, 'Пылесос')):
+            task = manager.add_task(title, '', 3)
+            manager.assign_task(task.task_id, anna.member_id, None)
+            manager.complete_task(task.task_id)
+        a.sync(self.path('b.db'))
+        b.load_data()
+        self.assertNotEqual(a.db.clock.device, b.db.clock.device)
+        self.assertEqual(self.state(a), self.state(b))
+        self.assertEqual(sorted(task.title for task in a.tasks), ['Окна', 'Посуда', 'Пылесос'])
+        self.assertEqual(a.leaderboard.points_of(anna.member_id), 6)
+        stats = b.sync(self.path('a.db'))
+        self.assertEqual((stats['received'], stats['sent']), (0, 0))
+    
+    def occurrences(self, name):
+        conn = sqlite3.connect(self.path(name))
+        try:
+            return conn.execute('''
+            SELECT title, template_id, occurrence_day, deadline FROM tasks
+            WHERE template_id IS NOT NULL ORDER BY occurrence_day
+            ''').fetchall()
+        finally:
+            conn.close()
+    
+    def test_occurrences_merge_by_template_and_day(self):
+        base = FamilyTaskManager(db_name=self.path('base.db'))
+        base.add_template('Цветы', '', 1, 'daily', start_day='2026-10-01')
+        base.generate_occurrences(today=date(2026, 10, 1), window_days=2)
+        base.close()
+        a, b = self.copies('base.db', 'a.db', 'b.db')
+        # Обе копии независимо создают повторения за одни и те же дни
+        for manager in (a, b):
+            manager.generate_occurrences(today=date(2026, 10, 5), window_days=2)
+        task = a.add_task('Окна', '', 3)
+        a.assign_task(task.task_id, None, '2026-10-20')
+        a.barrier().result()
+        b.barrier().result()
+        expected = self.occurrences('a.db')
+        self.assertEqual(expected, self.occurrences('b.db'))
+        self.assertIn(('Цветы', 1, '2026-10-06', '2026-10-06'), expected)
+        a.sync(self.path('b.db'))
+        b.load_data()
+        a.close()
+        b.close()
+        self.managers.clear()
+        self.assertEqual(self.occurrences('a.db'), expected)
+        self.assertEqual(self.occurrences('b.db'), expected)
+        b = self.open('b.db')
+        # Копии повторений не появляются и без шаблона
+        self.assertEqual(len([task for task in b.tasks if task.title == 'Цветы']), len(expected))
+        self.assertEqual([task.deadline for task in b.tasks if task.title == 'Окна'], ['2026-10-20'])
+        stats = b.sync(self.path('a.db'))
+        self.assertEqual((stats['applied'], stats['peer_applied']), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from manager import FamilyTaskManager
+
+
+class ExportImportRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source_name = os.path.join(self.directory.name, 'source.db')
+        source = FamilyTaskManager(db_name=self.source_name)
+        anya = source.add_member('Аня')
+        source.add_member('Боря')
+        task = source.add_task('Посуда', '', 5)
+        source.assign_task(task.task_id, anya.member_id, None)
+        source.complete_task(task.task_id)
+        source.close()
+        # Очки, начисленные до появления журнала, есть только в rewards
+        conn = sqlite3.connect(self.source_name)
+        conn.execute('UPDATE rewards SET points = points + 40')
+        conn.commit()
+        conn.close()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def balances(self, manager):
+        return sorted((name, points) for member_id, name, points in manager.get_rewards())
+    
+    def test_round_trip_keeps_balances(self):
+        for format in ('jsonl', 'csv'):
+            source = FamilyTaskManager(db_name=self.source_name, lazy=True)
+            stream = io.StringIO()
+            source.export(stream, format)
+            expected = self.balances(source)
+            source.close()
+            self.assertEqual(expected, [('Аня', 45), ('Боря', 40)])
+            target = FamilyTaskManager(db_name=os.path.join(self.directory.name, f'target.{format}.db'))
+            stream.seek(0)
+            target.import_(stream, format)
+            self.assertEqual(self.balances(target), expected)
+            target.close()
+            target = FamilyTaskManager(db_name=os.path.join(self.directory.name, f'target.{format}.db'))
+            self.assertEqual(self.balances(target), expected)
+            self.assertEqual(sum(points for member_id, name, points in target.get_rewards(since='2000-01-01')),
+                             sum(points for name, points in expected))
+            target.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from manager import FamilyTaskManager
+
+
+class WriteBehindTransactionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.directory.name, 'tasks.db')
+        self.today = date(2026, 10, 18)
+        self.manager = self.open()
+        self.manager.add_task('Посуда', '', 5)
+        self.template = self.manager.add_template('Мусор', '', 3, 'daily', start_day=self.today.isoformat())
+        self.manager.flush_journal()
+    
+    def tearDown(self):
+        self.manager.close()
+        self.directory.cleanup()
+    
+    def open(self):
+        return FamilyTaskManager(db_name=self.db_name, write_behind=True)
+    
+    def snapshot(self, manager):
+        return (sorted((task.task_id, task.title) for task in manager.tasks),
+                sorted(template.template_id for template in manager.get_templates()))
+    
+    def run_templates(self, manager):
+        # Первая запись открывает точку сохранения журнала, шаблоны пишутся в базу напрямую
+        manager.add_task('Пылесос', '', 2)
+        manager.add_template('Цветы', '', 1, 'daily', start_day=self.today.isoformat())
+        manager.remove_template(self.template.template_id, self.today)
+        manager.generate_occurrences(self.today + timedelta(days=3))
+    
+    def test_rollback_discards_template_writes(self):
+        before = self.snapshot(self.manager)
+        with self.assertRaises(KeyError):
+            with self.manager.transaction():
+                self.run_templates(self.manager)
+                raise KeyError('откат')
+        self.assertEqual(self.snapshot(self.manager), before)
+        self.manager.add_task('Окна', '', 4)
+        self.manager.close()
+        self.manager = self.open()
+        tasks, templates = self.snapshot(self.manager)
+        self.assertEqual((tasks[:-1], templates), before)
+        self.assertEqual(tasks[-1][1], 'Окна')
+    
+    def test_commit_keeps_template_writes(self):
+        with self.manager.transaction():
+            self.run_templates(self.manager)
+        after = self.snapshot(self.manager)
+        self.assertNotIn(self.template.template_id, after[1])
+        self.manager.close()
+        self.manager = self.open()
+        self.assertEqual(self.snapshot(self.manager), after)
+    
+    
+    def test_archive_refused_inside_transaction(self):
+        member = self.manager.add_member('Аня')
+        task = self.manager.add_task('Окна', '', 4)
+        self.manager.assign_task(task.task_id, member.member_id, None)
+        self.manager.complete_task(task.task_id)
+        later = datetime.now() + timedelta(days=1)
+        before = self.snapshot(self.manager)
+        with self.assertRaises(RuntimeError):
+            with self.manager.transaction():
+                self.manager.add_task('Пылесос', '', 2)
+                self.manager.archive_completed(0, later)
+        self.assertEqual(self.snapshot(self.manager), before)
+        self.assertEqual(self.manager.archive_completed(0, later), [task.task_id])
+        self.manager.close()
+        self.manager = self.open()
+        self.assertIsNone(self.manager.get_task(task.task_id))
+        self.assertEqual(self.manager.get_archived_task(task.task_id).title, 'Окна')
+        self.assertEqual(self.manager.leaderboard.points_of(member.member_id), 4)
+    
+    def test_replay_keeps_completion_time(self):
+        member = self.manager.add_member('Аня')
+        task = self.manager.add_task('Окна', '', 4)
+        self.manager.assign_task(task.task_id, member.member_id, None)
+        self.manager.flush_journal()
+        with mock.patch('manager.timestamp', return_value='2026-10-18 09:30:00'):
+            self.manager.complete_task(task.task_id)
+        # Падение до сброса пачки: выполнение осталось только в файле журнала
+        self.manager._journal_timer.cancel()
+        self.manager.journal.close()
+        self.manager.db.close()
+        self.manager = self.open()
+        self.assertTrue(self.manager.get_task(task.task_id).completed)
+        self.assertEqual(self.manager.leaderboard.points_of(member.member_id), 4)
+        self.assertEqual(self.manager.db.conn.execute('SELECT completed_at FROM tasks WHERE task_id = ?',
+                                                      (task.task_id,)).fetchone(),
+                         ('2026-10-18 09:30:00',))
+        self.assertEqual(list(self.manager.iter_points())[-1][4], '2026-10-18 09:30:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
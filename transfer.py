@@ -0,0 +1,191 @@
+import argparse
+import csv
+import itertools
+import json
+import sys
+from database import timestamp
+import instrumentation
+
+KINDS = ('member', 'task', 'points')
+
+# Одна плоская схема на все виды записей: в CSV лишние для вида колонки пустые
+FIELDS = ('kind', 'member_id', 'task_id', 'name', 'title', 'description', 'points',
+          'assigned_to', 'deadline', 'completed', 'created_at')
+
+INTEGER_FIELDS = ('member_id', 'task_id', 'points', 'assigned_to')
+
+def iter_records(manager, kinds=None):
+    kinds = kinds or KINDS
+    if 'member' in kinds:
+        for member in manager.members:
+            yield {'kind': 'member', 'member_id': member.member_id, 'name': member.name}
+    if 'task' in kinds:
+        # Архивные задачи идут первыми: при импорте они становятся обычными выполненными
+        for task in itertools.chain(manager.iter_archived_tasks(), manager.iter_tasks('all')):
+            record = task.as_dict()
+            record['kind'] = 'task'
+            yield record
+    if 'points' in kinds:
+        totals = {}
+        first_at = None
+        for entry_id, member_id, task_id, points, created_at in manager.iter_points():
+            totals[member_id] = totals.get(member_id, 0) + points
+            first_at = first_at or created_at
+            yield {'kind': 'points', 'member_id': member_id, 'task_id': task_id,
+                   'points': points, 'created_at': created_at}
+        # Очки, начисленные до появления журнала, есть только в rewards: без этой записи
+        # импорт обнулил бы их. Разница выгружается одной начальной записью на участника
+        for member in manager.members:
+            balance = (manager.get_points(member.member_id) or 0) - totals.get(member.member_id, 0)
+            if balance:
+                yield {'kind': 'points', 'member_id': member.member_id, 'task_id': None,
+                       'points': balance, 'created_at': first_at or timestamp()}
+
+def write_records(records, stream, format='jsonl'):
+    if format == 'jsonl':
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write('\n')
+            yield record
+    elif format == 'csv':
+        writer = csv.DictWriter(stream, FIELDS, lineterminator='\n')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            yield record
+    else:
+        raise ValueError(f'Неизвестный формат: {format}')
+
+def read_records(stream, format='jsonl'):
+    if format == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif format == 'csv':
+        for row in csv.DictReader(stream):
+            record = {}
+            for key, value in row.items():
+                if value == '':
+                    continue
+                if key in INTEGER_FIELDS:
+                    value = int(value)
+                elif key == 'completed':
+                    value = value.lower() in ('1', 'true')
+                record[key] = value
+            yield record
+    else:
+        raise ValueError(f'Неизвестный формат: {format}')
+
+def batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def export_records(manager, stream, format='jsonl', kinds=None, progress=None, progress_every=1000):
+    count = 0
+    for count, record in enumerate(write_records(iter_records(manager, kinds), stream, format), 1):
+        if progress and count % progress_every == 0:
+            progress(count)
+    if progress:
+        progress(count)
+    return count
+
+def import_records(manager, stream, format='jsonl', batch_size=1000, progress=None):
+    # Идентификаторы из файла переназначаются: member_id/task_id получают новые значения,
+    # assigned_to и ссылки журнала очков переводятся через таблицы соответствия
+    member_ids = {}
+    task_ids = {}
+    stats = dict.fromkeys(KINDS, 0)
+    stats['skipped'] = 0
+    with manager.history.paused():
+        for batch in batches(read_records(stream, format), batch_size):
+            with manager.transaction():
+                import_batch(manager, batch, member_ids, task_ids, stats)
+            if progress:
+                progress(sum(stats.values()))
+    return stats
+
+def import_batch(manager, batch, member_ids, task_ids, stats):
+    members = [record for record in batch if record.get('kind') == 'member']
+    tasks = [record for record in batch if record.get('kind') == 'task']
+    points = [record for record in batch if record.get('kind') == 'points']
+    stats['skipped'] += len(batch) - len(members) - len(tasks) - len(points)
+    if members:
+        created = manager.add_members(record['name'] for record in members)
+        for record, member in zip(members, created):
+            if record.get('member_id') is not None:
+                member_ids[record['member_id']] = member.member_id
+        stats['member'] += len(created)
+    if tasks:
+        rows = []
+        for record in tasks:
+            assigned_to = member_ids.get(record.get('assigned_to'))
+            rows.append((record['title'], record.get('description') or '', int(record.get('points') or 0),
+                         assigned_to, record.get('deadline') if assigned_to else None,
+                         bool(record.get('completed')) and assigned_to is not None))
+        created = manager.insert_tasks(rows)
+        for record, task in zip(tasks, created):
+            if record.get('task_id') is not None:
+                task_ids[record['task_id']] = task.task_id
+        stats['task'] += len(created)
+    if points:
+        entries = []
+        for record in points:
+            member_id = member_ids.get(record.get('member_id'))
+            if member_id is None:
+                stats['skipped'] += 1
+                continue
+            entries.append((member_id, task_ids.get(record.get('task_id')),
+                            int(record['points']), record['created_at']))
+        manager.add_points(entries)
+        stats['points'] += len(entries)
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def main():
+    from manager import FamilyTaskManager
+    parser = argparse.ArgumentParser(description='Экспорт и импорт задач, участников и очков')
+    parser.add_argument('command', choices=('export', 'import'))
+    parser.add_argument('path', help="файл CSV/JSONL или '-' для stdin/stdout")
+    parser.add_argument('--format', choices=('csv', 'jsonl'))
+    parser.add_argument('--db', default='family_task_manager.db')
+    parser.add_argument('--kinds', help='виды записей для экспорта через запятую: member,task,points')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--profile', action='store_true', help='собрать статистику времени работы')
+    args = parser.parse_args()
+    if instrumentation.enabled(args.profile):
+        instrumentation.install()
+    format = args.format or guess_format(args.path)
+    
+    def report(rows):
+        print(f'\r{rows} записей', end='', file=sys.stderr, flush=True)
+    
+    manager = FamilyTaskManager(db_name=args.db, lazy=True)
+    try:
+        if args.command == 'export':
+            kinds = args.kinds.split(',') if args.kinds else None
+            if args.path == '-':
+                manager.export(sys.stdout, format, kinds, report)
+            else:
+                with open(args.path, 'w', encoding='utf-8', newline='') as stream:
+                    manager.export(stream, format, kinds, report)
+            print(file=sys.stderr)
+        else:
+            if args.path == '-':
+                stats = manager.import_(sys.stdin, format, args.batch_size, report)
+            else:
+                with open(args.path, encoding='utf-8', newline='') as stream:
+                    stats = manager.import_(stream, format, args.batch_size, report)
+            print(file=sys.stderr)
+            print(', '.join(f'{kind}: {count}' for kind, count in stats.items()), file=sys.stderr)
+    finally:
+        manager.close()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,15 +1,92 @@
 import sys
+import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QLineEdit, QPushButton, QListWidget, QListWidgetItem,
-                             QDateEdit, QMessageBox, QTabWidget, QFormLayout, QFrame)
-from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QFont, QColor
+                             QLabel, QLineEdit, QPushButton, QListView, QAbstractItemView,
+                             QDateEdit, QMessageBox, QTabWidget, QFormLayout, QFrame,
+                             QStackedWidget, QComboBox, QFileDialog)
+from PyQt6.QtCore import Qt, QDate, QDateTime, QTime, QTimer, QObject, QEvent, pyqtSignal
+from PyQt6.QtGui import QFont, QKeySequence, QShortcut
 from manager import FamilyTaskManager
+from list_models import (MembersModel, OpenTasksModel, AvailableTasksModel,
+                         AssignedTasksModel, RatingModel, SearchResultsModel)
+from events import TaskAssigned, DataReloaded, WriteFailed
+
+# Варианты повтора в форме задачи: (подпись, правило, дни недели)
+REPEAT_OPTIONS = (
+    ("Не повторять", None, None),
+    ("Каждый день", 'daily', None),
+    ("По будням", 'custom', [0, 1, 2, 3, 4]),
+    ("Каждую неделю", 'weekly', None),
+    ("Каждый месяц", 'monthly', None),
+)
+
+class MainThreadDispatcher(QObject):
+    called = pyqtSignal(object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.called.connect(self._call)
+    
+    def dispatch(self, fn, *args):
+        self.called.emit(lambda: fn(*args))
+    
+    def _call(self, callback):
+        callback()
+
+class StartupTimer(QObject):
+    # Отметки времени от старта процесса: первая отрисовка окна и загрузка данных
+    finished = pyqtSignal(dict)
+    
+    def __init__(self, started, window):
+        super().__init__(window)
+        self.started = started
+        self.marks = {}
+        window.installEventFilter(self)
+        window.manager.events.subscribe(DataReloaded, self.on_data_loaded)
+    
+    def mark(self, name):
+        self.marks.setdefault(name, (time.perf_counter() - self.started) * 1000)
+        if 'first_paint_ms' in self.marks and 'data_loaded_ms' in self.marks:
+            self.finished.emit(dict(self.marks))
+    
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark('first_paint_ms')
+        return False
+    
+    def on_data_loaded(self, event):
+        self.mark('data_loaded_ms')
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, db_name='family_task_manager.db', write_behind=False):
         super().__init__()
-        self.manager = FamilyTaskManager()
+        self.dispatcher = MainThreadDispatcher(self)
+        # Данные читаются в фоне после показа окна, до этого виден экран загрузки
+        self.manager = FamilyTaskManager(threaded=True, dispatch=self.dispatcher.dispatch,
+                                         db_name=db_name, load=False, write_behind=write_behind)
+        self.sample_data_checked = False
+        self.search_query = None
+        self.members_model = MembersModel(self.manager, parent=self)
+        self.assign_members_model = MembersModel(self.manager, show_id=False, parent=self)
+        self.tasks_model = OpenTasksModel(self.manager, parent=self)
+        self.available_tasks_model = AvailableTasksModel(self.manager, parent=self)
+        self.assigned_tasks_model = AssignedTasksModel(self.manager, parent=self)
+        self.rating_model = RatingModel(self.manager, parent=self)
+        self.search_model = SearchResultsModel(self.manager, parent=self)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.deadline_timer = QTimer(self)
+        self.deadline_timer.setSingleShot(True)
+        self.deadline_timer.timeout.connect(self.on_deadline_timer)
+        self.daily_timer = QTimer(self)
+        self.daily_timer.setSingleShot(True)
+        self.daily_timer.timeout.connect(self.run_daily_jobs)
+        self.connect_events()
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self.redo)
         self.setWindowTitle("Family Task Manager")
         self.setGeometry(100, 100, 900, 700)
         
@@ -54,7 +131,7 @@ class MainWindow(QMainWindow):
                 border-radius: 4px;
                 padding: 6px;
             }
-            QListWidget {
+            QListView {
                 border: 1px solid #d3d3d3;
                 border-radius: 4px;
                 background: white;
@@ -82,7 +159,53 @@ class MainWindow(QMainWindow):
         """)
         
         self.setup_ui()
-        self.load_sample_data()
+        self.manager.load_data_async()
+    
+    def connect_events(self):
+        events = self.manager.events
+        events.set_scheduler(lambda flush: QTimer.singleShot(0, flush))
+        for model in (self.members_model, self.assign_members_model, self.tasks_model,
+                      self.available_tasks_model, self.assigned_tasks_model, self.rating_model,
+                      self.search_model):
+            model.connect_events(events)
+        events.subscribe(WriteFailed, self.on_write_failed)
+        events.subscribe(TaskAssigned, lambda event: self.arm_deadline_timer())
+        events.subscribe(DataReloaded, lambda event: self.arm_deadline_timer())
+        events.subscribe(DataReloaded, self.on_data_loaded)
+    
+    def on_data_loaded(self, event):
+        if self.pages.currentWidget() is self.loading_label:
+            self.pages.setCurrentWidget(self.tabs)
+            self.build_tab(self.tabs.currentIndex())
+        if not self.sample_data_checked:
+            self.sample_data_checked = True
+            self.load_sample_data()
+            self.run_daily_jobs()
+    
+    def run_daily_jobs(self):
+        # При запуске и после каждой полуночи: задачи по шаблонам и перенос старых выполненных в архив
+        self.manager.generate_occurrences_async()
+        self.manager.archive_completed_async()
+        midnight = QDateTime(QDate.currentDate().addDays(1), QTime(0, 0))
+        self.daily_timer.start(QDateTime.currentDateTime().msecsTo(midnight) + 1000)
+    
+    def arm_deadline_timer(self):
+        # Один таймер на ближайшую границу дедлайна вместо периодического опроса
+        seconds = self.manager.seconds_until_next_deadline()
+        if seconds is None:
+            self.deadline_timer.stop()
+            return
+        self.deadline_timer.start(min(int(seconds * 1000) + 1, 2 ** 31 - 1))
+    
+    def on_deadline_timer(self):
+        self.manager.check_deadlines()
+        self.arm_deadline_timer()
+    
+    def on_write_failed(self, event):
+        if event.operation == 'load_data':
+            self.loading_label.setText(f"Не удалось загрузить данные: {event.error}")
+            return
+        QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изменения: {event.error or event.operation}")
     
     def load_sample_data(self):
         if not self.manager.members:
@@ -104,25 +227,37 @@ class MainWindow(QMainWindow):
         main_layout.setContentsMargins(10, 10, 10, 10)
         central_widget.setLayout(main_layout)
         
-        tabs = QTabWidget()
-        tabs.setFont(QFont("Arial", 10))
-        main_layout.addWidget(tabs)
-        
-        members_tab = QWidget()
-        tabs.addTab(members_tab, "👪 Члены семьи")
-        self.setup_members_tab(members_tab)
-        
-        tasks_tab = QWidget()
-        tabs.addTab(tasks_tab, "📋 Задачи")
-        self.setup_tasks_tab(tasks_tab)
-        
-        assign_tab = QWidget()
-        tabs.addTab(assign_tab, "📌 Назначение")
-        self.setup_assign_tab(assign_tab)
-        
-        rating_tab = QWidget()
-        tabs.addTab(rating_tab, "🏆 Рейтинг")
-        self.setup_rating_tab(rating_tab)
+        self.pages = QStackedWidget()
+        main_layout.addWidget(self.pages)
+        
+        self.loading_label = QLabel("Загрузка данных…")
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet("font-size: 16px; color: #777;")
+        self.pages.addWidget(self.loading_label)
+        
+        self.tabs = QTabWidget()
+        self.tabs.setFont(QFont("Arial", 10))
+        self.pages.addWidget(self.tabs)
+        
+        # Содержимое вкладки строится при первом её открытии
+        self.tab_builders = {}
+        for title, builder in (("👪 Члены семьи", self.setup_members_tab),
+                               ("📋 Задачи", self.setup_tasks_tab),
+                               ("📌 Назначение", self.setup_assign_tab),
+                               ("🏆 Рейтинг", self.setup_rating_tab)):
+            self.tab_builders[self.tabs.addTab(QWidget(), title)] = builder
+        self.tabs.currentChanged.connect(self.build_tab)
+    
+    def build_tab(self, index):
+        builder = self.tab_builders.pop(index, None)
+        if builder is not None:
+            builder(self.tabs.widget(index))
+    
+    def create_list_view(self, model):
+        view = QListView()
+        view.setUniformItemSizes(True)
+        view.setModel(model)
+        return view
     
     def create_section(self, title):
         frame = QFrame()
@@ -159,8 +294,8 @@ class MainWindow(QMainWindow):
         layout.addWidget(add_frame)
         
         list_frame, list_layout = self.create_section("Список членов семьи")
-        self.members_list = QListWidget()
-        self.members_list.setStyleSheet("QListWidget { font-size: 13px; }")
+        self.members_list = self.create_list_view(self.members_model)
+        self.members_list.setStyleSheet("QListView { font-size: 13px; }")
         list_layout.addWidget(self.members_list)
         layout.addWidget(list_frame)
 
@@ -168,6 +303,10 @@ class MainWindow(QMainWindow):
         delete_member_button.clicked.connect(self.remove_member)
         delete_member_button.setStyleSheet("background-color: #f44336;")  # Красный цвет
         form.addRow(delete_member_button)
+        
+        self.sync_button = QPushButton("🔄 Синхронизировать с другим компьютером")
+        self.sync_button.clicked.connect(self.sync_devices)
+        form.addRow(self.sync_button)
     
     def setup_tasks_tab(self, tab):
         layout = QVBoxLayout(tab)
@@ -191,6 +330,11 @@ class MainWindow(QMainWindow):
         self.task_points_input.setPlaceholderText("Баллы за выполнение")
         form.addRow("Баллы:", self.task_points_input)
         
+        self.task_repeat_input = QComboBox()
+        for label, rule, weekdays in REPEAT_OPTIONS:
+            self.task_repeat_input.addItem(label, (rule, weekdays))
+        form.addRow("Повтор:", self.task_repeat_input)
+        
         add_button = QPushButton("➕ Добавить")
         add_button.clicked.connect(self.add_task)
         form.addRow(add_button)
@@ -198,9 +342,20 @@ class MainWindow(QMainWindow):
         add_layout.addLayout(form)
         layout.addWidget(add_frame)
         
+        search_frame, search_layout = self.create_section("Поиск задач")
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Слова из названия или описания")
+        self.search_input.textChanged.connect(lambda text: self.search_timer.start())
+        search_layout.addWidget(self.search_input)
+        self.search_results = self.create_list_view(self.search_model)
+        self.search_results.setMaximumHeight(120)
+        self.search_results.clicked.connect(self.select_search_result)
+        search_layout.addWidget(self.search_results)
+        layout.addWidget(search_frame)
+        
         list_frame, list_layout = self.create_section("Список задач")
-        self.tasks_list = QListWidget()
-        self.tasks_list.setStyleSheet("QListWidget { font-size: 13px; }")
+        self.tasks_list = self.create_list_view(self.tasks_model)
+        self.tasks_list.setStyleSheet("QListView { font-size: 13px; }")
         list_layout.addWidget(self.tasks_list)
         layout.addWidget(list_frame)
 
@@ -220,14 +375,14 @@ class MainWindow(QMainWindow):
         top_layout.setContentsMargins(10, 10, 10, 10)
         
         member_frame, member_layout = self.create_section("Выберите члена семьи")
-        self.assign_member_combo = QListWidget()
-        self.assign_member_combo.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.assign_member_combo = self.create_list_view(self.assign_members_model)
+        self.assign_member_combo.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         member_layout.addWidget(self.assign_member_combo)
         top_layout.addWidget(member_frame)
         
         task_frame, task_layout = self.create_section("Выберите задачу")
-        self.assign_task_combo = QListWidget()
-        self.assign_task_combo.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.assign_task_combo = self.create_list_view(self.available_tasks_model)
+        self.assign_task_combo.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         task_layout.addWidget(self.assign_task_combo)
         top_layout.addWidget(task_frame)
         
@@ -246,11 +401,15 @@ class MainWindow(QMainWindow):
         assign_button.clicked.connect(self.assign_task)
         form.addRow(assign_button)
         
+        auto_assign_button = QPushButton("⚖️ Распределить все свободные")
+        auto_assign_button.clicked.connect(self.auto_assign_tasks)
+        form.addRow(auto_assign_button)
+        
         form_layout.addLayout(form)
         layout.addWidget(form_frame)
         
         assigned_frame, assigned_layout = self.create_section("Назначенные задачи")
-        self.assigned_tasks_list = QListWidget()
+        self.assigned_tasks_list = self.create_list_view(self.assigned_tasks_model)
         assigned_layout.addWidget(self.assigned_tasks_list)
         
         complete_button = QPushButton("✅ Отметить как выполненную")
@@ -266,24 +425,24 @@ class MainWindow(QMainWindow):
         
         rating_frame, rating_layout = self.create_section("Рейтинг членов семьи")
         
-        self.rating_list = QListWidget()
+        self.rating_list = self.create_list_view(self.rating_model)
         self.rating_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 font-size: 14px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #e0e0e0;
             }
-            QListWidget::item:first {
+            QListView::item:first {
                 color: #FFD700;
                 font-weight: bold;
             }
-            QListWidget::item:nth-child(2) {
+            QListView::item:nth-child(2) {
                 color: #C0C0C0;
                 font-weight: bold;
             }
-            QListWidget::item:nth-child(3) {
+            QListView::item:nth-child(3) {
                 color: #CD7F32;
                 font-weight: bold;
             }
@@ -297,12 +456,32 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(rating_frame)
     
+    def run_search(self):
+        # Поиск идёт в потоке базы; ответ на устаревший запрос не показывается
+        query = self.search_input.text()
+        self.search_query = query
+        self.manager.search_tasks_async(query, lambda tasks, error: self.show_search_results(query, tasks, error))
+    
+    def show_search_results(self, query, tasks, error):
+        if query != self.search_query:
+            return
+        if error is not None:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось выполнить поиск: {error}")
+            return
+        self.search_model.set_results(tasks)
+    
+    def select_search_result(self, index):
+        row = self.tasks_model.row_of(index.data(Qt.ItemDataRole.UserRole))
+        if row >= 0:
+            task_index = self.tasks_model.index(row)
+            self.tasks_list.setCurrentIndex(task_index)
+            self.tasks_list.scrollTo(task_index)
+    
     def add_member(self):
         name = self.member_name_input.text().strip()
         if name:
             self.manager.add_member(name)
             self.member_name_input.clear()
-            self.update_members_list()
             QMessageBox.information(self, "Успех", f"Член семьи {name} добавлен!")
         else:
             QMessageBox.warning(self, "Ошибка", "Введите имя члена семьи!")
@@ -322,60 +501,58 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Баллы должны быть числом!")
             return
         
-        self.manager.add_task(title, description, points)
+        rule, weekdays = self.task_repeat_input.currentData()
+        repeat = self.task_repeat_input.currentText().lower()
+        if rule:
+            # Шаблон пишется в потоке базы, сообщение появится после записи
+            self.manager.add_template_async(lambda template, error: self.on_template_added(title, repeat, error),
+                                            title, description, points, rule, weekdays=weekdays)
+        else:
+            self.manager.add_task(title, description, points)
         self.task_title_input.clear()
         self.task_desc_input.clear()
         self.task_points_input.clear()
+        self.task_repeat_input.setCurrentIndex(0)
         
-        self.update_tasks_list()
-        self.update_assign_lists()
-        
-        QMessageBox.information(self, "Успех", f"Задача '{title}' добавлена!")
+        if not rule:
+            QMessageBox.information(self, "Успех", f"Задача '{title}' добавлена!")
+    
+    def on_template_added(self, title, repeat, error):
+        if error is not None:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось добавить задачу '{title}': {error}")
+            return
+        QMessageBox.information(self, "Успех", f"Задача '{title}' добавлена, повтор: {repeat}!")
     
     def remove_member(self):
-        selected = self.members_list.currentItem()
-        if not selected:
+        selected = self.members_list.currentIndex()
+        if not selected.isValid():
             QMessageBox.warning(self, "Ошибка", "Выберите члена семьи для удаления!")
             return
         
         member_id = selected.data(Qt.ItemDataRole.UserRole)
         member = self.manager.get_member(member_id)
         
-        reply = QMessageBox.question(
-            self, 'Подтверждение', 
-            f'Удалить {member.name}? Назначенные задачи останутся без исполнителя!',
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-        
-        if reply == QMessageBox.StandardButton.Yes:
-            if self.manager.remove_member(member_id):
-                self.update_members_list()
-                self.update_assign_lists()
-                self.update_assigned_tasks_list()
-                QMessageBox.information(self, "Успех", "Член семьи удален!")
-            else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось удалить члена семьи!")
+        # Вместо подтверждения - отмена через Ctrl+Z
+        if self.manager.remove_member(member_id):
+            self.statusBar().showMessage(f"{member.name} удален(а), задачи остались без исполнителя. "
+                                         f"Ctrl+Z - отменить", 8000)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Не удалось удалить члена семьи!")
     
     def assign_task(self):
-        selected_members = self.assign_member_combo.selectedItems()
-        selected_tasks = self.assign_task_combo.selectedItems()
+        selected_members = self.assign_member_combo.selectionModel().selectedIndexes()
+        selected_tasks = self.assign_task_combo.selectionModel().selectedIndexes()
         
         if not selected_members or not selected_tasks:
             QMessageBox.warning(self, "Ошибка", "Выберите и члена семьи, и задачу!")
             return
         
-        member_item = selected_members[0]
-        task_item = selected_tasks[0]
-        
-        member_id = member_item.data(Qt.ItemDataRole.UserRole)
-        task_id = task_item.data(Qt.ItemDataRole.UserRole)
+        member_id = selected_members[0].data(Qt.ItemDataRole.UserRole)
+        task_id = selected_tasks[0].data(Qt.ItemDataRole.UserRole)
         
         deadline = self.deadline_input.date().toString("yyyy-MM-dd")
         
         self.manager.assign_task(task_id, member_id, deadline)
-        self.update_assigned_tasks_list()
-        self.update_tasks_list()
-        self.update_assign_lists()
         
         member = self.manager.get_member(member_id)
         task = self.manager.get_task(task_id)
@@ -383,20 +560,47 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Успех", 
                               f"Задача '{task.title}' назначена на {member.name} до {deadline}!")
     
+    def auto_assign_tasks(self):
+        if not self.manager.members or not self.manager.get_available_tasks():
+            QMessageBox.warning(self, "Ошибка", "Нет свободных задач или членов семьи!")
+            return
+        
+        deadline = self.deadline_input.date().toString("yyyy-MM-dd")
+        assignments = self.manager.auto_assign(deadline)
+        
+        QMessageBox.information(self, "Успех",
+                              f"Распределено задач: {len(assignments)}, дедлайн {deadline}")
+    
+    def sync_devices(self):
+        # Файл базы другого компьютера: флешка, общая папка или сетевой диск
+        path, _ = QFileDialog.getOpenFileName(self, "База другого компьютера", "", "База данных (*.db)")
+        if not path:
+            return
+        
+        # Обмен идёт в потоке базы, окно остаётся отзывчивым
+        self.sync_button.setEnabled(False)
+        self.statusBar().showMessage("Синхронизация...")
+        self.manager.sync_async(path, self.on_sync_finished)
+    
+    def on_sync_finished(self, stats, error):
+        self.sync_button.setEnabled(True)
+        self.statusBar().clearMessage()
+        if error is not None:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось синхронизировать: {error}")
+            return
+        
+        QMessageBox.information(self, "Успех",
+                              f"Получено изменений: {stats['received']}, отправлено: {stats['sent']}")
+    
     def complete_task(self):
-        selected_tasks = self.assigned_tasks_list.selectedItems()
+        selected_tasks = self.assigned_tasks_list.selectionModel().selectedIndexes()
         if not selected_tasks:
             QMessageBox.warning(self, "Ошибка", "Выберите задачу для отметки!")
             return
         
-        task_item = selected_tasks[0]
-        task_id = task_item.data(Qt.ItemDataRole.UserRole)
+        task_id = selected_tasks[0].data(Qt.ItemDataRole.UserRole)
         
         if self.manager.complete_task(task_id):
-            self.assigned_tasks_list.takeItem(self.assigned_tasks_list.row(task_item))
-            self.update_tasks_list()
-            self.update_rating()
-            
             task = self.manager.get_task(task_id)
             member = self.manager.get_member(task.assigned_to)
             
@@ -408,28 +612,26 @@ class MainWindow(QMainWindow):
 
 
     def remove_task(self):
-        selected = self.tasks_list.currentItem()
-        if not selected:
+        selected = self.tasks_list.currentIndex()
+        if not selected.isValid():
             QMessageBox.warning(self, "Ошибка", "Выберите задачу для удаления!")
             return
         
         task_id = selected.data(Qt.ItemDataRole.UserRole)
         task = self.manager.get_task(task_id)
         
-        reply = QMessageBox.question(
-            self, 'Подтверждение', 
-            f'Удалить задачу "{task.title}"?',
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-        
-        if reply == QMessageBox.StandardButton.Yes:
-            if self.manager.remove_task(task_id):
-                self.update_tasks_list()
-                self.update_assign_lists()
-                self.update_assigned_tasks_list()
-                QMessageBox.information(self, "Успех", "Задача удалена!")
-            else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось удалить задачу!")
+        if self.manager.remove_task(task_id):
+            self.statusBar().showMessage(f'Задача "{task.title}" удалена. Ctrl+Z - отменить', 8000)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Не удалось удалить задачу!")
+    
+    def undo(self):
+        command = self.manager.undo()
+        self.statusBar().showMessage(f"Отменено: {command.label}" if command else "Нечего отменять", 5000)
+    
+    def redo(self):
+        command = self.manager.redo()
+        self.statusBar().showMessage(f"Повторено: {command.label}" if command else "Нечего повторять", 5000)
     
     def update_all_lists(self):
         self.update_members_list()
@@ -439,62 +641,20 @@ class MainWindow(QMainWindow):
         self.update_rating()
     
     def update_members_list(self):
-        self.members_list.clear()
-        for member in self.manager.members:
-            item = QListWidgetItem(f"👤 {member.name} (ID: {member.member_id})")
-            item.setData(Qt.ItemDataRole.UserRole, member.member_id)
-            self.members_list.addItem(item)
+        self.members_model.reload()
     
     def update_tasks_list(self):
-        self.tasks_list.clear()
-        for task in self.manager.tasks:
-            if not task.completed:
-                status = "🔴" if task.assigned_to else "🟢"
-                item_text = f"{status} {task.title} ({task.points} баллов)"
-                if task.assigned_to:
-                    member = self.manager.get_member(task.assigned_to)
-                    item_text += f" → {member.name}"
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.ItemDataRole.UserRole, task.task_id)
-                self.tasks_list.addItem(item)
+        self.tasks_model.reload()
     
     def update_assign_lists(self):
-        self.assign_member_combo.clear()
-        for member in self.manager.members:
-            item = QListWidgetItem(f"👤 {member.name}")
-            item.setData(Qt.ItemDataRole.UserRole, member.member_id)
-            self.assign_member_combo.addItem(item)
-        
-        self.assign_task_combo.clear()
-        for task in self.manager.get_available_tasks():
-            item = QListWidgetItem(f"{task.title} ({task.points} баллов)")
-            item.setData(Qt.ItemDataRole.UserRole, task.task_id)
-            self.assign_task_combo.addItem(item)
+        self.assign_members_model.reload()
+        self.available_tasks_model.reload()
     
     def update_assigned_tasks_list(self):
-        self.assigned_tasks_list.clear()
-        current_date = QDate.currentDate().toString("yyyy-MM-dd")
-        
-        for task in self.manager.get_assigned_tasks():
-            member = self.manager.get_member(task.assigned_to)
-            item_text = f"📌 {task.title} (на {member.name}, до {task.deadline}) - {task.points} баллов"
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.ItemDataRole.UserRole, task.task_id)
-            
-            if task.deadline < current_date:
-                item.setForeground(QColor("red"))
-            
-            self.assigned_tasks_list.addItem(item)
+        self.assigned_tasks_model.reload()
     
     def update_rating(self):
-        self.rating_list.clear()
-        rewards = self.manager.get_rewards()
-        
-        medals = ["🥇", "🥈", "🥉"]
-        for i, (member_id, name, points) in enumerate(rewards, 1):
-            medal = medals[i-1] if i <= 3 else f"{i}."
-            item = QListWidgetItem(f"{medal} {name}: {points} баллов")
-            self.rating_list.addItem(item)
+        self.rating_model.reload()
     
     def closeEvent(self, event):
         self.manager.close()
@@ -0,0 +1,232 @@
+import argparse
+import json
+import threading
+import uuid
+from contextlib import ExitStack
+from flask import Flask, Response, abort, g, redirect, render_template, request, url_for
+from events import CHANGE_EVENTS
+from households import HouseholdRegistry
+import instrumentation
+from manager import FamilyTaskManager
+
+TASK_STATUSES = ('open', 'available', 'assigned', 'completed')
+
+class HouseholdState:
+    def __init__(self, manager, household_id='default'):
+        self.manager = manager
+        self.household_id = household_id
+        # epoch отличает версии данных между перезапусками сервера
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.fragments = {}
+        self.lock = threading.RLock()
+        for event_type in CHANGE_EVENTS:
+            manager.events.subscribe(event_type, self.invalidate)
+    
+    def invalidate(self, event=None):
+        self.version += 1
+        self.fragments.clear()
+    
+    def etag(self):
+        return f'{self.household_id}-{self.epoch}-{self.version}'
+    
+    def fragment(self, key, render):
+        body = self.fragments.get(key)
+        if body is None:
+            body = self.fragments[key] = render()
+        return body
+
+def create_app(manager=None, registry=None):
+    # registry: страницы /h/<household_id>/... обслуживают отдельные базы семей
+    app = Flask(__name__)
+    default_state = None
+    if registry is None:
+        default_state = HouseholdState(manager or FamilyTaskManager(threaded=True))
+    states = {}
+    states_lock = threading.Lock()
+    app.extensions['familytasks'] = default_state or registry
+    
+    def drop_state(household_id, closed_manager):
+        # Вытесненная семья не держит в памяти ни закрытый менеджер, ни кэш фрагментов
+        with states_lock:
+            state = states.get(household_id)
+            if state is not None and state.manager is closed_manager:
+                del states[household_id]
+    
+    if registry is not None:
+        registry.on_close(drop_state)
+    
+    def route(rule, **options):
+        def decorator(view):
+            app.route(rule, defaults={'household_id': None}, **options)(view)
+            if registry is not None:
+                app.route(f'/h/<household_id>{rule}', **options)(view)
+            return view
+        return decorator
+    
+    @app.url_value_preprocessor
+    def pull_household(endpoint, values):
+        if values is not None:
+            g.household_id = values.pop('household_id', None)
+    
+    @app.url_defaults
+    def push_household(endpoint, values):
+        if g.get('household_id') and app.url_map.is_endpoint_expecting(endpoint, 'household_id'):
+            values.setdefault('household_id', g.household_id)
+    
+    @app.before_request
+    def open_household():
+        household_id = g.get('household_id')
+        if household_id is None:
+            if default_state is None:
+                abort(404)
+            g.state = default_state
+            return
+        g.resources = ExitStack()
+        try:
+            household_manager = g.resources.enter_context(registry.lease(household_id))
+        except ValueError:
+            abort(404)
+        with states_lock:
+            household_state = states.get(household_id)
+            if household_state is None or household_state.manager is not household_manager:
+                household_state = states[household_id] = HouseholdState(household_manager, household_id)
+        g.state = household_state
+    
+    @app.teardown_request
+    def close_household(error=None):
+        resources = g.pop('resources', None)
+        if resources is not None:
+            resources.close()
+    
+    def cached_response(key, render, mimetype='text/html'):
+        with g.state.lock:
+            g.state.manager.process_pending()
+            etag = g.state.etag()
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = Response(g.state.fragment(key, render), mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    def json_body(data):
+        return json.dumps(data, ensure_ascii=False)
+    
+    def task_rows(tasks):
+        rows = []
+        for task in tasks:
+            member = g.state.manager.get_member(task.assigned_to) if task.assigned_to else None
+            rows.append((task, member.name if member else None))
+        return rows
+    
+    @route('/')
+    def index():
+        manager = g.state.manager
+        return cached_response('index', lambda: render_template(
+            'tasks.html',
+            tasks=task_rows(manager.get_available_tasks() + manager.get_assigned_tasks()),
+        ))
+    
+    @route('/add', methods=['GET', 'POST'])
+    def add_task():
+        manager = g.state.manager
+        if request.method == 'GET':
+            with g.state.lock:
+                return render_template('add_task.html', members=manager.members)
+        title = request.form.get('title', '').strip()
+        if not title:
+            abort(400)
+        try:
+            points = int(request.form.get('points') or 0)
+            assigned_to = int(request.form['assigned_to']) if request.form.get('assigned_to') else None
+        except ValueError:
+            abort(400)
+        deadline = request.form.get('deadline') or None
+        with g.state.lock:
+            with manager.transaction():
+                task = manager.add_task(title, request.form.get('description', '').strip(), points)
+                if assigned_to and manager.get_member(assigned_to):
+                    manager.assign_task(task.task_id, assigned_to, deadline)
+        return redirect(url_for('index'))
+    
+    @route('/complete/<int:task_id>', methods=['POST'])
+    def complete_task(task_id):
+        with g.state.lock:
+            g.state.manager.complete_task(task_id)
+        return redirect(url_for('index'))
+    
+    @route('/api/tasks')
+    def api_tasks():
+        status = request.args.get('status', 'open')
+        if status not in TASK_STATUSES:
+            abort(400)
+        manager = g.state.manager
+        
+        def render():
+            if status == 'open':
+                tasks = manager.get_available_tasks() + manager.get_assigned_tasks()
+            else:
+                tasks = getattr(manager, f'get_{status}_tasks')()
+            return json_body([task.as_dict() for task in tasks])
+        
+        return cached_response(('tasks', status), render, 'application/json')
+    
+    @route('/api/members')
+    def api_members():
+        return cached_response('members', lambda: json_body([
+            member.as_dict() for member in g.state.manager.members
+        ]), 'application/json')
+    
+    @route('/api/rewards')
+    def api_rewards():
+        return cached_response('rewards', lambda: json_body([
+            {'member_id': member_id, 'name': name, 'points': points}
+            for member_id, name, points in g.state.manager.get_rewards()
+        ]), 'application/json')
+    
+    @route('/api/tasks', methods=['POST'])
+    def api_add_task():
+        data = request.get_json(silent=True) or {}
+        if not data.get('title'):
+            abort(400)
+        with g.state.lock:
+            task = g.state.manager.add_task(data['title'], data.get('description', ''), int(data.get('points', 0)))
+        return Response(json_body(task.as_dict()), status=201, mimetype='application/json')
+    
+    @route('/api/tasks/<int:task_id>/assign', methods=['POST'])
+    def api_assign_task(task_id):
+        data = request.get_json(silent=True) or {}
+        with g.state.lock:
+            manager = g.state.manager
+            if not manager.get_task(task_id) or not manager.get_member(data.get('member_id')):
+                abort(404)
+            manager.assign_task(task_id, data['member_id'], data.get('deadline'))
+            task = manager.get_task(task_id)
+        return Response(json_body(task.as_dict()), mimetype='application/json')
+    
+    @route('/api/tasks/<int:task_id>/complete', methods=['POST'])
+    def api_complete_task(task_id):
+        with g.state.lock:
+            if not g.state.manager.complete_task(task_id):
+                abort(409)
+            task = g.state.manager.get_task(task_id)
+        return Response(json_body(task.as_dict()), mimetype='application/json')
+    
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description='Family Task Manager web server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--households', metavar='DIR', help='каталог с базами семей')
+    parser.add_argument('--profile', action='store_true', help='собрать статистику времени работы')
+    args = parser.parse_args()
+    if instrumentation.enabled(args.profile):
+        instrumentation.install()
+    registry = HouseholdRegistry(args.households) if args.households else None
+    create_app(registry=registry).run(host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file